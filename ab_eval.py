@@ -0,0 +1,270 @@
+"""
+Rule Pack A/B Evaluation for WealthWise AI
+Score a population under a baseline and a candidate rule pack in one pass
+
+Derived metrics are computed once per chunk and shared by both packs.
+The baseline matches every category; the candidate only re-matches the
+categories whose conditions or weighted impacts differ and reuses the
+baseline's matches for the rest, so changing one threshold costs one
+extra category per profile. Scores are summed in each pack's category
+order, exactly as evaluate_batch would.
+
+Usage:
+    python ab_eval.py candidate.json profiles.csv
+    python ab_eval.py candidate.yaml --generate 5000000 --affected affected.csv
+    python ab_eval.py candidate.json profiles.csv --baseline current.json -o report.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference_engine import (
+    DEFAULT_RULE_PACK, GRADE_THRESHOLDS, GRADES, INPUT_FIELDS, ProfileColumns, WealthWiseInferenceEngine,
+    load_rule_pack
+)
+from rule_pack import RulePackError
+
+# Rows scored at a time
+CHUNK_SIZE = 250_000
+
+
+def _signature(compiled):
+    """What decides a category's score: its conditions and weighted impacts, in order"""
+    return tuple((rule.condition.source, rule.score_impact) for rule in compiled.rules)
+
+
+def changed_categories(baseline, candidate):
+    """Names of the candidate's categories that score differently from the baseline's"""
+    baseline_signatures = {compiled.name: _signature(compiled) for compiled in baseline.compiled_rules}
+    return [
+        compiled.name for compiled in candidate.compiled_rules
+        if baseline_signatures.get(compiled.name) != _signature(compiled)
+    ]
+
+
+class RulePackComparison:
+    """Running comparison of two rule packs over chunks of profiles
+
+    add() scores a chunk under both packs and returns its affected rows;
+    the transition matrix and rule hit counts accumulate across chunks.
+    """
+
+    def __init__(self, candidate, baseline=None, engine=None):
+        self.baseline = baseline or DEFAULT_RULE_PACK
+        self.candidate = candidate
+        # Only used for its column-wise matching; condition errors land in its metrics
+        self.engine = engine or WealthWiseInferenceEngine()
+        self.changed = changed_categories(self.baseline, candidate)
+        candidate_names = {compiled.name for compiled in candidate.compiled_rules}
+        self.removed = [compiled.name for compiled in self.baseline.compiled_rules
+                        if compiled.name not in candidate_names]
+        self.profiles = 0
+        self.invalid = 0
+        self.transitions = np.zeros((len(GRADES), len(GRADES)), dtype=np.int64)
+        # (pack, category) -> hit counts per rule index, the last for no match
+        self.rule_hits = {}
+        for pack, rule_pack in (('baseline', self.baseline), ('candidate', candidate)):
+            for compiled in rule_pack.compiled_rules:
+                if compiled.name in self.changed or compiled.name in self.removed:
+                    self.rule_hits[(pack, compiled.name)] = np.zeros(len(compiled.rules) + 1, dtype=np.int64)
+
+    def _score(self, rule_pack, columns, size, matches):
+        """Score of every row under rule_pack, matching only categories not in matches"""
+        score = np.full(size, float(self.engine.base_score))
+        for compiled in rule_pack.compiled_rules:
+            if compiled.name not in matches:
+                matches[compiled.name] = self.engine._match_category_columns(compiled, columns, size)
+            impacts = np.array([rule.score_impact for rule in compiled.rules] + [0.0])
+            score += impacts[matches[compiled.name]]
+        return np.clip(score, 0, 100)
+
+    def add(self, df):
+        """Score a DataFrame chunk under both packs
+
+        Returns the rows whose final score changed, with their inputs and
+        baseline and candidate final_score and grade. Rows that cannot be
+        scored (zero income or expenses) are counted in invalid only.
+        """
+        size = len(df)
+        columns = ProfileColumns({field: df[field].to_numpy(dtype=np.float64) for field in INPUT_FIELDS})
+        invalid = (columns['monthly_income'] == 0) | (columns['monthly_expenses'] == 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns.update(self.engine._calculate_derived_metrics_columns(columns))
+
+        baseline_matches = {}
+        baseline_score = self._score(self.baseline, columns, size, baseline_matches)
+        # Unchanged categories keep the baseline's matches
+        candidate_matches = {name: rule_index for name, rule_index in baseline_matches.items()
+                             if name not in self.changed}
+        candidate_score = self._score(self.candidate, columns, size, candidate_matches)
+
+        valid = ~invalid
+        self.profiles += int(valid.sum())
+        self.invalid += int(invalid.sum())
+        baseline_grade = np.searchsorted(GRADE_THRESHOLDS, baseline_score[valid], side='right')
+        candidate_grade = np.searchsorted(GRADE_THRESHOLDS, candidate_score[valid], side='right')
+        self.transitions += np.bincount(
+            baseline_grade * len(GRADES) + candidate_grade, minlength=len(GRADES) ** 2
+        ).reshape(len(GRADES), len(GRADES))
+        for (pack, category), counts in self.rule_hits.items():
+            rule_index = (baseline_matches if pack == 'baseline' else candidate_matches)[category][valid]
+            counts += np.bincount(np.where(rule_index < 0, len(counts) - 1, rule_index), minlength=len(counts))
+
+        baseline_final = np.round(baseline_score)
+        candidate_final = np.round(candidate_score)
+        rows = np.flatnonzero(valid & (baseline_final != candidate_final))
+        grades = np.array(GRADES, dtype=object)
+        affected = df.iloc[rows][list(INPUT_FIELDS)].copy()
+        affected['baseline_score'] = baseline_final[rows].astype(np.int64)
+        affected['baseline_grade'] = grades[np.searchsorted(GRADE_THRESHOLDS, baseline_score[rows], side='right')]
+        affected['candidate_score'] = candidate_final[rows].astype(np.int64)
+        affected['candidate_grade'] = grades[np.searchsorted(GRADE_THRESHOLDS, candidate_score[rows], side='right')]
+        return affected
+
+    def transition_matrix(self):
+        """Profiles per (baseline grade, candidate grade); rows are baseline grades"""
+        return pd.DataFrame(
+            self.transitions,
+            index=pd.Index(GRADES, name='baseline'), columns=pd.Index(GRADES, name='candidate')
+        )
+
+    def grade_changes(self):
+        """Counts of profiles whose grade went up, down or stayed"""
+        upper = int(np.triu(self.transitions, 1).sum())
+        lower = int(np.tril(self.transitions, -1).sum())
+        return {'up': upper, 'down': lower, 'same': int(np.trace(self.transitions))}
+
+    def rule_hit_rates(self):
+        """Hit rate of every rule in the changed categories under each pack
+
+        Rules are matched up by category and position; 'condition' is the
+        candidate's when the pack has that rule, else the baseline's.
+        """
+        conditions = {}
+        for pack, rule_pack in (('baseline', self.baseline), ('candidate', self.candidate)):
+            for compiled in rule_pack.compiled_rules:
+                for rule in compiled.rules:
+                    conditions.setdefault(compiled.name, {})[rule.index] = rule.condition.source
+        records = []
+        for category in dict.fromkeys(name for _, name in self.rule_hits):
+            baseline = self.rule_hits.get(('baseline', category))
+            candidate = self.rule_hits.get(('candidate', category))
+            rules = max(len(counts) - 1 for counts in (baseline, candidate) if counts is not None)
+            for position in list(range(rules)) + [-1]:
+                rates = []
+                for counts in (baseline, candidate):
+                    if counts is None or (position >= len(counts) - 1):
+                        rates.append(np.nan)
+                    else:
+                        rates.append(counts[position] / self.profiles if self.profiles else np.nan)
+                records.append({
+                    'category': category,
+                    'rule': position if position >= 0 else 'none',
+                    'condition': conditions[category].get(position, "(no rule matched)"),
+                    'baseline_rate': rates[0],
+                    'candidate_rate': rates[1],
+                    # A rule only one pack has counts as never hit in the other
+                    'delta': np.nan_to_num(rates[1]) - np.nan_to_num(rates[0])
+                })
+        return pd.DataFrame(records, columns=['category', 'rule', 'condition', 'baseline_rate',
+                                              'candidate_rate', 'delta'])
+
+    def report(self):
+        """Everything accumulated so far as plain JSON-ready data"""
+        return {
+            'baseline_version': self.baseline.version,
+            'candidate_version': self.candidate.version,
+            'changed_categories': self.changed,
+            'removed_categories': self.removed,
+            'profiles': self.profiles,
+            'invalid': self.invalid,
+            'grade_changes': self.grade_changes(),
+            'transition_matrix': {
+                baseline: {candidate: int(count) for candidate, count in row.items() if count}
+                for baseline, row in self.transition_matrix().iterrows()
+            },
+            'rule_hit_rates': json.loads(self.rule_hit_rates().to_json(orient='records'))
+        }
+
+
+def compare(candidate, profiles, baseline=None, affected=None):
+    """Run a RulePackComparison over DataFrame chunks
+
+    affected, if given, is a writable text file that receives the
+    affected rows as CSV, one chunk at a time. Returns the comparison and
+    the number of affected rows.
+    """
+    comparison = RulePackComparison(candidate, baseline)
+    affected_rows = 0
+    header = True
+    for df in profiles:
+        for start in range(0, len(df), CHUNK_SIZE):
+            chunk = comparison.add(df.iloc[start:start + CHUNK_SIZE])
+            if affected is not None:
+                chunk.to_csv(affected, header=header, index_label='row')
+                header = False
+            affected_rows += len(chunk)
+    return comparison, affected_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare a candidate rule pack with the baseline on a population")
+    parser.add_argument('candidate', help="candidate JSON/YAML rule pack")
+    parser.add_argument('input', nargs='?', help="CSV of profiles")
+    parser.add_argument('--baseline', help="baseline JSON/YAML rule pack (default: built-in rules)")
+    parser.add_argument('--generate', type=int, metavar='N', help="compare on N synthetic profiles instead")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--affected', help="write profiles whose score changed to this CSV")
+    parser.add_argument('-o', '--output', help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        candidate = load_rule_pack(args.candidate)
+        baseline = load_rule_pack(args.baseline) if args.baseline else None
+    except RulePackError as e:
+        parser.error(f"invalid rule pack: {e}")
+    if args.generate:
+        from profile_generator import generate_profiles
+        profiles = [generate_profiles(args.generate, seed=args.seed)]
+    elif args.input:
+        profiles = pd.read_csv(args.input, chunksize=CHUNK_SIZE)
+    else:
+        parser.error("give an input CSV or --generate N")
+
+    start = time.perf_counter()
+    affected = open(args.affected, 'w', encoding='utf-8', newline='') if args.affected else None
+    try:
+        comparison, affected_rows = compare(candidate, profiles, baseline, affected)
+    finally:
+        if affected is not None:
+            affected.close()
+    elapsed = time.perf_counter() - start
+
+    if not comparison.changed and not comparison.removed:
+        print("The packs score every profile the same; no category differs.")
+    changes = comparison.grade_changes()
+    print(f"Baseline {comparison.baseline.version} -> candidate {comparison.candidate.version}; "
+          f"re-evaluated: {', '.join(comparison.changed) or 'none'}")
+    print(f"{comparison.profiles:,} profiles ({comparison.invalid:,} unscorable skipped) in {elapsed:.1f}s: "
+          f"{changes['up']:,} up a grade or more, {changes['down']:,} down, "
+          f"{affected_rows:,} with a different score")
+    with pd.option_context('display.width', 160, 'display.max_columns', 20, 'display.max_colwidth', 60):
+        # Grades nobody has under either pack are left out
+        matrix = comparison.transition_matrix()
+        print("\nGrade transitions (rows: baseline, columns: candidate)")
+        print(matrix.loc[matrix.sum(axis=1) > 0, matrix.sum(axis=0) > 0])
+        rates = comparison.rule_hit_rates()
+        if len(rates):
+            print("\nRule hit rates in the changed categories")
+            print(rates.to_string(index=False, float_format=lambda value: f"{value:.2%}"))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(comparison.report(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Analytics Store for WealthWise AI
+Scored populations in partitioned Arrow files, queried column-wise for portfolio reporting
+
+Batch results are written as uncompressed Arrow IPC files in a hive-style
+layout, root/age_band=30/grade=B+/part-....arrow, so queries memory-map
+the files, read only the columns they use and skip every partition that
+an age or grade filter rules out.
+
+Usage:
+    python analytics_store.py build profiles.csv scored/          # score a CSV into scored/
+    python analytics_store.py build --generate 1000000 scored/    # or synthetic profiles
+    python analytics_store.py summary scored/ --min-age 30 --grades A B
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+from inference_engine import DERIVED_METRIC_FORMULAS, GRADES, INPUT_FIELDS, WealthWiseInferenceEngine
+from knowledge_base import RETIREMENT_AGE_BRACKETS
+from quantile_sketch import POPULATION_METRICS
+
+# First age of each band; the same brackets as the retirement benchmarks
+AGE_BANDS = (18,) + tuple(RETIREMENT_AGE_BRACKETS)
+
+PARTITIONING = ds.partitioning(pa.schema([('age_band', pa.int16()), ('grade', pa.string())]), flavor='hive')
+
+# Stored per profile with the inputs, final_score, rule_pack_version and {category}_rule columns
+METRIC_COLUMNS = POPULATION_METRICS
+
+# Groupings understood by the aggregate queries
+GROUP_BY = ('age_band', 'grade', 'income_decile')
+
+# Rows scored and written at a time by build
+BUILD_CHUNK_SIZE = 250_000
+
+
+def age_band(age):
+    """First age of the band holding age"""
+    return AGE_BANDS[max(0, int(np.searchsorted(AGE_BANDS, age, side='right')) - 1)]
+
+
+def age_band_label(band):
+    position = AGE_BANDS.index(band)
+    if position + 1 < len(AGE_BANDS):
+        return f"{band}-{AGE_BANDS[position + 1] - 1}"
+    return f"{band}+"
+
+
+def write_batch(root, df, results):
+    """Append a scored batch (df and its evaluate_batch result) under root
+
+    Rows that could not be scored are left out. Each call adds one file
+    per partition it touches, so write tens of thousands of rows at a time.
+    Returns the number of rows written.
+    """
+    valid = results['final_score'].notna().to_numpy()
+    df = df[valid]
+    results = results[valid]
+    ages = df['age'].to_numpy(dtype=np.float64)
+
+    columns = {field: df[field].to_numpy(dtype=np.float64) for field in INPUT_FIELDS}
+    for name in METRIC_COLUMNS:
+        columns[name] = DERIVED_METRIC_FORMULAS[name][1](columns)
+
+    table = pa.table({
+        **columns,
+        'final_score': pa.array(results['final_score'].to_numpy(dtype=np.int16)),
+        'rule_pack_version': pa.array(
+            [results.attrs.get('rule_pack_version', '')] * len(results), pa.dictionary(pa.int8(), pa.string())
+        ),
+        **{name: pa.array(results[name].to_numpy()) for name in results.columns if name.endswith('_rule')},
+        'age_band': pa.array(np.asarray(AGE_BANDS, dtype=np.int16)[
+            np.clip(np.searchsorted(AGE_BANDS, ages, side='right') - 1, 0, None)
+        ]),
+        'grade': pa.array(results['grade'].to_numpy(dtype=object), pa.string())
+    })
+    ds.write_dataset(
+        table, root, format='arrow', partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.arrow",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+    return table.num_rows
+
+
+def open_dataset(root):
+    """The stored population, read through memory maps"""
+    return ds.dataset(
+        root, format='arrow', partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+
+
+def store_signature(root):
+    """(file count, newest modification time) of a store, to key cached query results"""
+    files, newest = 0, 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            files += 1
+            newest = max(newest, os.stat(os.path.join(directory, name)).st_mtime_ns)
+    return files, newest
+
+
+def build_filter(min_age=None, max_age=None, grades=None, rule_pack_version=None):
+    """Row filter whose partition-key terms let the scan skip whole partitions"""
+    terms = []
+    if min_age is not None:
+        terms += [ds.field('age_band') >= age_band(min_age), ds.field('age') >= min_age]
+    if max_age is not None:
+        terms += [ds.field('age_band') <= age_band(max_age), ds.field('age') <= max_age]
+    if grades:
+        terms.append(ds.field('grade').isin(list(grades)))
+    if rule_pack_version is not None:
+        terms.append(ds.field('rule_pack_version') == rule_pack_version)
+    expression = None
+    for term in terms:
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def read_columns(dataset, columns, **filters):
+    """Only the named columns of the matching rows, as numpy arrays
+
+    grade comes back as positions in GRADES, so it can be counted directly.
+    """
+    table = dataset.to_table(columns=list(dict.fromkeys(columns)), filter=build_filter(**filters))
+    arrays = {}
+    for name in table.column_names:
+        column = table[name]
+        if name == 'grade':
+            column = pc.index_in(column, value_set=pa.array(GRADES))
+        elif pa.types.is_dictionary(column.type):
+            column = column.cast(pa.string())
+        arrays[name] = column.to_numpy()
+    return arrays
+
+
+def _group_codes(columns, by):
+    """(group code per row, group labels) for one of GROUP_BY"""
+    if by == 'age_band':
+        codes = np.searchsorted(AGE_BANDS, columns['age_band'])
+        return codes, [age_band_label(band) for band in AGE_BANDS]
+    if by == 'grade':
+        return columns['grade'], list(GRADES)
+    if by == 'income_decile':
+        income = columns['monthly_income']
+        edges = np.quantile(income, np.linspace(0.1, 0.9, 9)) if len(income) else np.zeros(9)
+        labels = [f"D{decile + 1}" for decile in range(10)]
+        return np.searchsorted(edges, income, side='right'), labels
+    raise ValueError(f"Unknown grouping {by!r}; expected one of {', '.join(GROUP_BY)}")
+
+
+def _group_columns(by):
+    return {'age_band': ['age_band'], 'grade': ['grade'], 'income_decile': ['monthly_income']}[by]
+
+
+def _counts(codes, groups, values, width):
+    """groups x width matrix of counts of each value per group, in one bincount"""
+    return np.bincount(codes * width + values, minlength=groups * width).reshape(groups, width)
+
+
+def grade_distribution(dataset, by='income_decile', normalize=True, **filters):
+    """Share (or count) of each grade per group; rows are groups, columns grades"""
+    columns = read_columns(dataset, _group_columns(by) + ['grade'], **filters)
+    codes, labels = _group_codes(columns, by)
+    counts = _counts(codes, len(labels), columns['grade'], len(GRADES))
+    frame = pd.DataFrame(counts, index=pd.Index(labels, name=by), columns=list(GRADES))
+    return _normalize(frame) if normalize else frame
+
+
+def rule_hit_rates(dataset, category, rules, by='age_band', normalize=True, **filters):
+    """Share (or count) of profiles matching each rule of a category per group
+
+    rules is the category's rule count; the last column is 'none' for
+    profiles no rule matched. Rule indexes refer to the pack that scored
+    the rows, so filter on rule_pack_version when several were used.
+    """
+    column = f'{category}_rule'
+    columns = read_columns(dataset, _group_columns(by) + [column], **filters)
+    codes, labels = _group_codes(columns, by)
+    values = columns[column].astype(np.int64)
+    if len(values) and values.max() >= rules:
+        raise ValueError(f"{category} has rule indexes beyond {rules} rules; filter on rule_pack_version")
+    # -1 (no match) goes to the trailing column
+    values = np.where(values < 0, rules, values)
+    counts = _counts(codes, len(labels), values, rules + 1)
+    frame = pd.DataFrame(counts, index=pd.Index(labels, name=by), columns=list(range(rules)) + ['none'])
+    return _normalize(frame) if normalize else frame
+
+
+def score_summary(dataset, by='age_band', **filters):
+    """Profiles, mean score and mean key ratios per group"""
+    fields = ['final_score', 'debt_ratio', 'savings_rate', 'housing_ratio', 'coverage_months']
+    columns = read_columns(dataset, _group_columns(by) + fields, **filters)
+    codes, labels = _group_codes(columns, by)
+    profiles = np.bincount(codes, minlength=len(labels))
+    summary = {'profiles': profiles}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for field in fields:
+            summary[f'mean_{field}'] = np.bincount(codes, columns[field].astype(np.float64), len(labels)) / profiles
+    return pd.DataFrame(summary, index=pd.Index(labels, name=by))
+
+
+def _normalize(frame):
+    totals = frame.sum(axis=1).replace(0, np.nan)
+    return frame.div(totals, axis=0)
+
+
+def build(root, profiles, engine=None, chunk_size=BUILD_CHUNK_SIZE):
+    """Score DataFrame chunks with evaluate_batch and write them under root"""
+    engine = engine or WealthWiseInferenceEngine()
+    written = 0
+    for df in profiles:
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            written += write_batch(root, chunk, engine.evaluate_batch(chunk))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WealthWise AI population analytics store")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_command = commands.add_parser('build', help="score profiles and add them to the store")
+    build_command.add_argument('input', nargs='?', help="CSV of profiles")
+    build_command.add_argument('root', help="store directory")
+    build_command.add_argument('--generate', type=int, metavar='N', help="score N synthetic profiles instead")
+    build_command.add_argument('--seed', type=int, default=42)
+    summary_command = commands.add_parser('summary', help="print group-by statistics")
+    summary_command.add_argument('root')
+    summary_command.add_argument('--by', choices=GROUP_BY, default='age_band')
+    summary_command.add_argument('--min-age', type=int)
+    summary_command.add_argument('--max-age', type=int)
+    summary_command.add_argument('--grades', nargs='+', choices=GRADES)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'build':
+        if args.generate:
+            from profile_generator import generate_profiles
+            profiles = [generate_profiles(args.generate, seed=args.seed)]
+        elif args.input:
+            profiles = pd.read_csv(args.input, chunksize=BUILD_CHUNK_SIZE)
+        else:
+            parser.error("give an input CSV or --generate N")
+        written = build(args.root, profiles)
+        print(f"Wrote {written:,} scored profiles to {args.root} in {time.perf_counter() - start:.1f}s")
+        return
+
+    if not os.path.isdir(args.root):
+        print(f"No analytics store at {args.root}", file=sys.stderr)
+        sys.exit(1)
+    filters = {'min_age': args.min_age, 'max_age': args.max_age, 'grades': args.grades}
+    dataset = open_dataset(args.root)
+    with pd.option_context('display.width', 160, 'display.max_columns', 20, 'display.precision', 3):
+        print(score_summary(dataset, args.by, **filters))
+        print()
+        print(grade_distribution(dataset, args.by, **filters))
+    print(f"\n{time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Shared Streamlit resources for WealthWise AI
+Process-wide objects used by the main app and its pages
+"""
+
+import hmac
+import os
+
+import streamlit as st
+
+from history_store import HistoryStore
+from inference_engine import WealthWiseInferenceEngine
+from quantile_sketch import PopulationStats
+from result_cache import CachedEvaluator
+
+# Upper bound on cached evaluation results shared by all sessions
+RESULT_CACHE_SIZE = int(os.environ.get('WEALTHWISE_RESULT_CACHE_SIZE', 1024))
+
+# Optional JSON/YAML rule pack replacing the built-in rules, reloaded on change
+RULE_PACK_PATH = os.environ.get('WEALTHWISE_RULE_PACK')
+
+# Optional SQLite file keeping every assessment; history is off when unset
+HISTORY_DB_PATH = os.environ.get('WEALTHWISE_HISTORY_DB')
+
+# Optional JSON file keeping the population stats across restarts; in memory when unset
+POPULATION_PATH = os.environ.get('WEALTHWISE_POPULATION')
+
+# Token unlocking the admin metrics page; the page is off when unset
+ADMIN_TOKEN = os.environ.get('WEALTHWISE_ADMIN_TOKEN')
+
+def _no_fragment(func=None, **options):
+    """Stand-in for st.fragment: runs func as a plain function, with or without options"""
+    return func if func is not None else _no_fragment
+
+# Partial reruns: st.fragment, which requirements.txt guarantees (Streamlit 1.37+).
+# The fallbacks only keep the module importable on an older local install.
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or _no_fragment
+
+@st.cache_resource
+def get_evaluator():
+    """One engine and result cache per process, shared by every session"""
+    engine = WealthWiseInferenceEngine()
+    if RULE_PACK_PATH:
+        # Swaps in the new pack whenever the file changes, for the life of the process
+        engine.watch_rule_pack(RULE_PACK_PATH)
+    return CachedEvaluator(engine, maxsize=RESULT_CACHE_SIZE)
+
+@st.cache_resource
+def get_history_store():
+    """The process-wide assessment history, or None when it is disabled"""
+    if not HISTORY_DB_PATH:
+        return None
+    return HistoryStore(HISTORY_DB_PATH)
+
+@st.cache_resource
+def get_population_stats():
+    """Score and metric distribution of every analysis in this process, for rankings"""
+    return PopulationStats(POPULATION_PATH)
+
+def is_admin_token(token):
+    """Whether token unlocks the admin pages; always False when no token is configured"""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
@@ -0,0 +1,205 @@
+"""
+Assessment records for WealthWise AI
+Immutable results returned by the reentrant evaluation path
+"""
+
+import time
+from types import MappingProxyType
+
+
+class FrozenRecord:
+    """Slotted record that cannot be modified after construction
+
+    Fields can also be read dict-style (record['grade']) so results work
+    wherever the old result dicts were used. Subclasses list their public
+    fields in _fields; by default these are the slots.
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if '_fields' not in cls.__dict__:
+            cls._fields = cls.__slots__
+
+    def __init__(self, *values):
+        for name, value in zip(self._fields, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def keys(self):
+        return self._fields
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self._fields))
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self._fields))
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+class EvaluationContext:
+    """Per-evaluation values shared by an Assessment and its recommendations
+
+    Only what is costly to recompute is kept: the raw input values and
+    any lazy metric already computed. schema rebuilds the inputs and
+    derived metrics (the explanation parameters) from them whenever data
+    is read. observe optionally receives the time spent rendering each
+    explanation, in seconds.
+    """
+
+    __slots__ = ('values', 'lazy', 'schema', 'observe')
+
+    def __init__(self, values, lazy, schema, observe=None):
+        self.values = values
+        # Computed lazy metrics as schema.lazy_values() gives them, or None
+        self.lazy = lazy
+        self.schema = schema
+        self.observe = observe
+
+    @property
+    def data(self):
+        return self.schema.unpack(self.values, self.lazy)
+
+    @property
+    def metric_names(self):
+        return self.schema.metric_names
+
+    def render(self, template):
+        data = self.data
+        if self.observe is None:
+            explanation = template.render(data)
+        else:
+            start = time.perf_counter()
+            explanation = template.render(data)
+            self.observe(time.perf_counter() - start)
+        # Keep lazy metrics the template computed, so no later read pays again
+        lazy = self.schema.lazy_values(data)
+        if lazy != self.lazy:
+            self.lazy = lazy
+        return explanation
+
+    def __reduce__(self):
+        return (EvaluationContext, (self.values, self.lazy, self.schema))
+
+
+class Recommendation(FrozenRecord):
+    """Outcome of one knowledge base category
+
+    Static fields (message, severity, weighted impact) are read from the
+    shared compiled rule; the record itself only holds the rule and the
+    evaluation context. The explanation is rendered the first time it is
+    read, so callers that only need scores never format text.
+    """
+
+    __slots__ = ('rule', '_explanation')
+    _fields = ('category', 'message', 'severity', 'explanation', 'score_impact', 'weight')
+
+    def __init__(self, rule, explanation):
+        object.__setattr__(self, 'rule', rule)
+        # Either the rendered text or the EvaluationContext to render it from
+        object.__setattr__(self, '_explanation', explanation)
+
+    category = property(lambda self: self.rule.category)
+    message = property(lambda self: self.rule.message)
+    severity = property(lambda self: self.rule.severity)
+    score_impact = property(lambda self: self.rule.score_impact)
+    weight = property(lambda self: self.rule.weight)
+    rule_index = property(lambda self: self.rule.index)
+
+    @property
+    def explanation(self):
+        explanation = self._explanation
+        if isinstance(explanation, EvaluationContext):
+            explanation = explanation.render(self.rule.explanation)
+            object.__setattr__(self, '_explanation', explanation)
+        return explanation
+
+    def __reduce__(self):
+        return (Recommendation, (self.rule, self.explanation))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self._fields}
+
+
+class Assessment(FrozenRecord):
+    """Immutable result of evaluating one profile
+
+    final_score is the rounded score shown to users; score is the clamped,
+    unrounded value the grade is derived from. inputs and metrics are
+    read-only views over the evaluation context, which the engine also uses
+    to update() the assessment incrementally. rule_pack_version identifies
+    the rules that produced it.
+    """
+
+    __slots__ = ('final_score', 'grade', 'rules', 'score', 'context', 'rule_pack_version', '_recommendations')
+    _fields = ('final_score', 'grade', 'recommendations', 'metrics', 'score', 'inputs', 'rule_pack_version')
+
+    def __init__(self, final_score, grade, rules, score, context, rule_pack_version=None):
+        values = (final_score, grade, tuple(rules), score, context, rule_pack_version, None)
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    @property
+    def recommendations(self):
+        """One Recommendation per category, made on first read
+
+        Until then only the shared compiled rules are referenced, so results
+        that are stored but never shown cost no per-category objects.
+        """
+        recommendations = self._recommendations
+        if recommendations is None:
+            recommendations = tuple(Recommendation(rule, self.context) for rule in self.rules)
+            object.__setattr__(self, '_recommendations', recommendations)
+        return recommendations
+
+    @property
+    def metrics(self):
+        data = self.context.data
+        return MappingProxyType({name: data[name] for name in self.context.metric_names if name in data})
+
+    @property
+    def inputs(self):
+        context = self.context
+        return MappingProxyType({k: v for k, v in zip(context.schema.fields, context.values) if v is not None})
+
+    def __hash__(self):
+        return hash((self.final_score, self.grade, self.rules, self.score, self.rule_pack_version))
+
+    def __reduce__(self):
+        return (Assessment, (self.final_score, self.grade, self.rules, self.score, self.context, self.rule_pack_version))
+
+    def to_dict(self):
+        """Plain, JSON-serializable dict in the legacy result layout"""
+        return {
+            'final_score': self.final_score,
+            'grade': self.grade,
+            'recommendations': [rec.to_dict() for rec in self.recommendations],
+            'metrics': dict(self.metrics),
+            'rule_pack_version': self.rule_pack_version
+        }
@@ -0,0 +1,104 @@
+"""
+Assessment Store for WealthWise AI
+Column-oriented form for holding many assessments at once
+"""
+
+import numpy as np
+
+from inference_engine import COMPILED_RULES, GRADES, GRADE_THRESHOLDS
+from rule_compiler import NO_MATCH
+
+
+class AssessmentArray:
+    """Many assessments as one small integer column per category plus the scores
+
+    Each row only stores which rule matched in every category; messages,
+    severities and impacts are read from the shared compiled rules, so a
+    row costs a few bytes instead of a full Assessment. Explanations are
+    not kept since they depend on the profile values.
+    """
+
+    def __init__(self, compiled_rules=COMPILED_RULES, capacity=1024):
+        self.compiled_rules = compiled_rules
+        self._size = 0
+        self._rule_indexes = {
+            compiled.name: np.full(capacity, NO_MATCH, dtype=self._dtype(compiled))
+            for compiled in compiled_rules
+        }
+        self._score = np.full(capacity, np.nan)
+
+    @staticmethod
+    def _dtype(compiled):
+        return np.int8 if len(compiled.rules) < 128 else np.int16
+
+    @classmethod
+    def from_frame(cls, batch_results, compiled_rules=COMPILED_RULES):
+        """Build from evaluate_batch output; rows without a score stay NaN"""
+        store = cls(compiled_rules, capacity=max(len(batch_results), 1))
+        size = len(batch_results)
+        score = np.full(size, 100.0)
+        for compiled in compiled_rules:
+            rule_index = batch_results[f'{compiled.name}_rule'].to_numpy()
+            store._rule_indexes[compiled.name][:size] = rule_index
+            impacts = np.array([r.score_impact for r in compiled.rules] + [0.0])
+            # Same summation order as the engine, so scores match exactly
+            score += impacts[rule_index]
+        score = np.clip(score, 0, 100)
+        score[batch_results['final_score'].isna().to_numpy()] = np.nan
+        store._score[:size] = score
+        store._size = size
+        return store
+
+    def append(self, assessment):
+        """Add one Assessment, growing the columns when full"""
+        if self._size == len(self._score):
+            self._grow(max(2 * len(self._score), 1))
+        for compiled, rule in zip(self.compiled_rules, assessment.rules):
+            self._rule_indexes[compiled.name][self._size] = rule.index
+        self._score[self._size] = assessment.score
+        self._size += 1
+
+    def _grow(self, capacity):
+        for name, column in self._rule_indexes.items():
+            grown = np.full(capacity, NO_MATCH, dtype=column.dtype)
+            grown[:len(column)] = column
+            self._rule_indexes[name] = grown
+        grown = np.full(capacity, np.nan)
+        grown[:len(self._score)] = self._score
+        self._score = grown
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def score(self):
+        return self._score[:self._size]
+
+    @property
+    def final_score(self):
+        return np.round(self.score)
+
+    @property
+    def grades(self):
+        score = self.score
+        grades = np.array(GRADES, dtype=object)[np.searchsorted(GRADE_THRESHOLDS, score, side='right')]
+        grades[np.isnan(score)] = None
+        return grades
+
+    def rule_indexes(self, category):
+        """Matched rule index per row for one category (-1 when none matched)"""
+        return self._rule_indexes[category][:self._size]
+
+    def rules(self, row):
+        """Shared CompiledRule chosen in every category for one row"""
+        chosen = []
+        for compiled in self.compiled_rules:
+            index = int(self._rule_indexes[compiled.name][row])
+            chosen.append(compiled.neutral if index == NO_MATCH else compiled.rules[index])
+        return chosen
+
+    @property
+    def nbytes(self):
+        """Bytes used by the stored rows"""
+        per_row = self._score.itemsize + sum(column.itemsize for column in self._rule_indexes.values())
+        return per_row * self._size
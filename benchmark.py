@@ -0,0 +1,279 @@
+"""
+Benchmarks for WealthWise AI
+
+    python benchmark.py micro                 eval() vs compiled rules, rule scan vs bisect
+    python benchmark.py suite -o run.json     full suite as machine-readable JSON
+    python benchmark.py suite --compare baseline.json
+                                              same, flagging regressions against a baseline
+"""
+
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from inference_engine import WealthWiseInferenceEngine, INPUT_FIELDS, DERIVED_METRICS, METRIC_INPUTS
+from knowledge_base import FINANCIAL_RULES
+from profile_generator import generate_profiles, iter_profiles, rule_coverage
+from retirement_projection import growth_factors, project
+from rule_compiler import compile_knowledge_base
+from rule_pack import RulePack
+
+# Fresh interpreters import the app's modules from here, wherever the suite is run from
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Default values of the Streamlit sidebar
+DEFAULT_PROFILE = {
+    'age': 25,
+    'monthly_income': 5000,
+    'monthly_expenses': 3500,
+    'housing_cost': 1500,
+    'emergency_savings': 5000,
+    'retirement_savings': 15000,
+    'monthly_savings': 500,
+    'total_monthly_debt': 800
+}
+
+
+class LegacyEvalEngine(WealthWiseInferenceEngine):
+    """Engine that checks conditions the way it did before rule compilation"""
+
+    def __init__(self):
+        # Every rule goes through _evaluate_condition, as before interval indexes
+        super().__init__(rule_pack=RulePack(FINANCIAL_RULES, compile_knowledge_base(
+            FINANCIAL_RULES, INPUT_FIELDS + DERIVED_METRICS, build_indexes=False
+        ), METRIC_INPUTS))
+
+    def _evaluate_condition(self, condition, data):
+        try:
+            safe_dict = {k: v for k, v in data.items() if not k.startswith('_')}
+            return eval(condition.source, {"__builtins__": {}}, safe_dict)
+        except Exception as e:
+            print(f"Error evaluating condition: {condition.source} - {e}")
+            return False
+
+
+def banded_knowledge_base(bands):
+    """Copy of FINANCIAL_RULES with `bands` range rules in each ratio category"""
+    knowledge_base = copy.deepcopy(FINANCIAL_RULES)
+    for category, variable in [('debt_to_income', 'debt_ratio'),
+                               ('housing_cost', 'housing_ratio'),
+                               ('savings_rate', 'savings_rate')]:
+        rules = []
+        for band in range(bands):
+            low, high = band / bands, (band + 1) / bands
+            rules.append({
+                'condition': f"{variable} >= {low!r} and {variable} < {high!r}",
+                'score_impact': round(15 - 30 * low),
+                'recommendation': f"{variable} band {band}",
+                'severity': 'medium',
+                'explanation_template': f"Your {variable} is {{{variable}:.1%}}"
+            })
+        knowledge_base[category]['rules'] = rules
+    return knowledge_base
+
+
+def banded_engine(bands, build_indexes):
+    """Engine running on a banded rule pack, with or without interval indexes"""
+    knowledge_base = banded_knowledge_base(bands)
+    compiled_rules = compile_knowledge_base(
+        knowledge_base, INPUT_FIELDS + DERIVED_METRICS, build_indexes=build_indexes
+    )
+    return WealthWiseInferenceEngine(rule_pack=RulePack(knowledge_base, compiled_rules, METRIC_INPUTS))
+
+
+def time_per_profile(engine, profile, number, repeat):
+    """Best-of-repeat latency of one evaluation, in microseconds"""
+    timer = timeit.Timer(lambda: engine.evaluate_financial_health(dict(profile)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def run_micro(args):
+    """Print the eval()/compiled and rule scan/bisect comparisons"""
+    before = time_per_profile(LegacyEvalEngine(), DEFAULT_PROFILE, args.number, args.repeat)
+    after = time_per_profile(WealthWiseInferenceEngine(), DEFAULT_PROFILE, args.number, args.repeat)
+
+    print(f"eval() conditions:    {before:8.2f} µs/profile")
+    print(f"compiled conditions:  {after:8.2f} µs/profile")
+    print(f"speedup:              {before / after:8.2f}x")
+
+    linear = time_per_profile(banded_engine(args.bands, False), DEFAULT_PROFILE, args.number, args.repeat)
+    indexed = time_per_profile(banded_engine(args.bands, True), DEFAULT_PROFILE, args.number, args.repeat)
+
+    print(f"{args.bands} bands, rule scan:   {linear:8.2f} µs/profile")
+    print(f"{args.bands} bands, bisect:      {indexed:8.2f} µs/profile")
+
+
+# Direction of each suite metric: True when a larger value is better
+HIGHER_IS_BETTER = {
+    'single_profile_latency_us': False,
+    'batch_throughput_rows_per_s': True,
+    'peak_memory_mb_per_1m_profiles': False,
+    'cold_import_s': False,
+    'retirement_projection_ms': False
+}
+
+
+def bench_single_latency(engine, profiles):
+    """Latency percentiles of evaluate() and evaluate_financial_health(), in microseconds"""
+    results = {}
+    for name, method in [('evaluate', engine.evaluate), ('evaluate_financial_health', engine.evaluate_financial_health)]:
+        samples = []
+        for profile in profiles:
+            start = time.perf_counter()
+            try:
+                method(dict(profile))
+            except ZeroDivisionError:
+                continue
+            samples.append((time.perf_counter() - start) * 1e6)
+        results[f'{name}_p50'] = float(np.percentile(samples, 50))
+        results[f'{name}_p95'] = float(np.percentile(samples, 95))
+    return results
+
+
+def bench_batch_throughput(engine, sizes, seed):
+    """Rows per second of evaluate_batch at each size"""
+    results = {}
+    for size in sizes:
+        df = generate_profiles(size, seed)
+        start = time.perf_counter()
+        engine.evaluate_batch(df)
+        results[str(size)] = size / (time.perf_counter() - start)
+    return results
+
+
+def bench_peak_memory(engine, size, seed):
+    """Peak traced allocation of evaluate_batch, scaled to one million profiles"""
+    df = generate_profiles(size, seed)
+    tracemalloc.start()
+    try:
+        engine.evaluate_batch(df)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'evaluate_batch': peak / 2 ** 20 * (1_000_000 / size)}
+
+
+def bench_retirement_projection(paths, repeat):
+    """Best-of-repeat time of one full projection (40 years), cold and with cached paths, in ms"""
+    growth_factors.cache_clear()
+    start = time.perf_counter()
+    project(25, 15000, 500, 60000, paths=paths)
+    cold = time.perf_counter() - start
+    warm = min(timeit.repeat(lambda: project(25, 15000, 500, 60000, paths=paths), number=1, repeat=repeat))
+    return {f'project_{paths}_paths_cold': cold * 1e3, f'project_{paths}_paths': warm * 1e3}
+
+
+def bench_cold_import(modules, repeat):
+    """Best-of-repeat import time of each module in a fresh interpreter"""
+    results = {}
+    for module in modules:
+        code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+        timings = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True,
+                                    check=True)
+            timings.append(float(output.stdout.strip().splitlines()[-1]))
+        results[module] = min(timings)
+    return results
+
+
+def run_suite(args):
+    """Run every benchmark and return the JSON report"""
+    engine = WealthWiseInferenceEngine()
+    sizes = [1_000, 10_000, 100_000] if args.quick else [1_000, 10_000, 100_000, 1_000_000]
+
+    coverage = rule_coverage(engine.evaluate_batch(generate_profiles(args.profiles, args.seed)))
+    uncovered = [f"{category}[{rule}]" for category, hits in coverage.items()
+                 for rule, count in hits.items() if rule >= 0 and count == 0]
+
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'profiles': args.profiles,
+            'uncovered_rules': uncovered
+        },
+        'results': {
+            'single_profile_latency_us': bench_single_latency(engine, list(iter_profiles(args.profiles, args.seed))),
+            'batch_throughput_rows_per_s': bench_batch_throughput(engine, sizes, args.seed),
+            'peak_memory_mb_per_1m_profiles': bench_peak_memory(engine, 100_000 if args.quick else 1_000_000, args.seed),
+            'cold_import_s': bench_cold_import(['inference_engine', 'streamlit'], 1 if args.quick else 3),
+            'retirement_projection_ms': bench_retirement_projection(10_000, 3 if args.quick else 10)
+        }
+    }
+
+
+def compare_reports(baseline, current, tolerance):
+    """Return (lines, regressed) comparing every shared metric of two reports"""
+    lines = []
+    regressed = False
+    for group, higher_is_better in HIGHER_IS_BETTER.items():
+        for name, value in current['results'].get(group, {}).items():
+            base = baseline.get('results', {}).get(group, {}).get(name)
+            if not base:
+                continue
+            change = (value - base) / base
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse > tolerance else "ok"
+            regressed = regressed or worse > tolerance
+            lines.append(f"{flag:10} {group}.{name}: {base:.4g} -> {value:.4g} ({change:+.1%})")
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WealthWise AI benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    micro = commands.add_parser('micro', help="eval() vs compiled rules and rule scan vs bisect")
+    micro.add_argument('--number', type=int, default=5000, help="evaluations per timing run")
+    micro.add_argument('--repeat', type=int, default=5, help="timing runs (best is reported)")
+    micro.add_argument('--bands', type=int, default=500, help="range rules per category in the banded pack")
+
+    suite = commands.add_parser('suite', help="full benchmark suite as JSON")
+    suite.add_argument('-o', '--output', help="write the JSON report here (default: stdout)")
+    suite.add_argument('--seed', type=int, default=0, help="synthetic profile seed")
+    suite.add_argument('--profiles', type=int, default=2000, help="profiles for latency and rule coverage")
+    suite.add_argument('--quick', action='store_true', help="smaller sizes for a fast smoke run")
+    suite.add_argument('--compare', metavar='BASELINE', help="flag regressions against a stored JSON report")
+    suite.add_argument('--tolerance', type=float, default=0.10, help="allowed relative slowdown (default: 0.10)")
+
+    args = parser.parse_args()
+    if args.command == 'micro':
+        run_micro(args)
+        return
+
+    report = run_suite(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if report['meta']['uncovered_rules']:
+        print(f"warning: rules never hit: {', '.join(report['meta']['uncovered_rules'])}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        lines, regressed = compare_reports(baseline, report, args.tolerance)
+        print('\n'.join(lines), file=sys.stderr)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
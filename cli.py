@@ -0,0 +1,224 @@
+"""
+Command-line scoring for WealthWise AI
+Streams profiles from CSV/JSONL through a process pool and writes JSONL results
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from inference_engine import WealthWiseInferenceEngine, INPUT_FIELDS, load_rule_pack
+from quantile_sketch import PopulationStats
+from rule_pack import RulePackError
+
+# One engine per worker process, created by the pool initializer
+_worker_engine = None
+
+
+def _init_worker(rule_pack_path=None, population=False):
+    global _worker_engine
+    rule_pack = load_rule_pack(rule_pack_path) if rule_pack_path else None
+    _worker_engine = WealthWiseInferenceEngine(
+        rule_pack=rule_pack, population=PopulationStats() if population else None
+    )
+
+
+def parse_number(value):
+    """Parse a CSV/JSON field into an int or float; NaN and infinities are rejected"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        number = value
+    else:
+        text = str(value).strip()
+        try:
+            number = int(text)
+        except ValueError:
+            number = float(text)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+def read_records(stream, fmt):
+    """Yield (row_number, record) pairs; record is an Exception for unreadable rows"""
+    if fmt == 'csv':
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, row
+    else:
+        row_number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as e:
+                yield row_number, ValueError(f"invalid JSON: {e}")
+
+
+def to_profile(record):
+    """Extract the engine's input fields from a raw record"""
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+    missing = [field for field in INPUT_FIELDS if record.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    try:
+        return {field: parse_number(record[field]) for field in INPUT_FIELDS}
+    except ValueError as e:
+        raise ValueError(f"non-numeric field value: {e}") from None
+
+
+def score_record(engine, row_number, record):
+    """Score one record, turning any failure into an error record"""
+    try:
+        results = engine.evaluate(to_profile(record))
+    except Exception as e:
+        return {'row': row_number, 'error': f"{type(e).__name__}: {e}"}
+
+    return {
+        'row': row_number,
+        'final_score': results['final_score'],
+        'grade': results['grade'],
+        'metrics': dict(results['metrics']),
+        'recommendations': [
+            {
+                'category': rec['category'],
+                'severity': rec['severity'],
+                'message': rec['message'],
+                'explanation': rec['explanation'],
+                'score_impact': rec['score_impact']
+            }
+            for rec in results['recommendations']
+        ],
+        'rule_pack_version': results['rule_pack_version']
+    }
+
+
+def score_chunk(chunk):
+    """Score a chunk of (row_number, record) pairs
+    
+    Returns (lines, error count, population counts of the chunk or None).
+    """
+    results = [score_record(_worker_engine, row_number, record) for row_number, record in chunk]
+    population = record_population(_worker_engine.population, results)
+    return [json.dumps(result) for result in results], sum('error' in result for result in results), population
+
+
+def record_population(population, results):
+    """Add scored results to population and return its drained counts (None without one)"""
+    if population is None:
+        return None
+    for result in results:
+        if 'error' not in result:
+            population.add(result)
+    return population.drain()
+
+
+def iter_chunks(records, chunk_size):
+    """Group records into lists of at most chunk_size"""
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_stream(records, output, workers, chunk_size, rule_pack_path=None, population=None):
+    """Score records in order, keeping at most 2 chunks per worker in flight
+    
+    With a PopulationStats, the counts of every worker are merged into it.
+    """
+    rows = errors = 0
+
+    def write(scored):
+        nonlocal rows, errors
+        lines, chunk_errors, chunk_population = scored
+        for line in lines:
+            output.write(line + '\n')
+        rows += len(lines)
+        errors += chunk_errors
+        if chunk_population is not None:
+            population.merge(chunk_population)
+
+    chunks = iter_chunks(records, chunk_size)
+    initargs = (rule_pack_path, population is not None)
+    if workers <= 1:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            write(score_chunk(chunk))
+        return rows, errors
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return rows, errors
+
+
+def detect_format(path, fmt):
+    """Pick the input format from --format or the file extension"""
+    if fmt:
+        return fmt
+    if path != '-' and path.lower().endswith('.csv'):
+        return 'csv'
+    return 'jsonl'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score WealthWise AI profiles from a CSV or JSONL file")
+    parser.add_argument('input', nargs='?', default='-', help="input file, or - for stdin (default)")
+    parser.add_argument('-o', '--output', default='-', help="output JSONL file, or - for stdout (default)")
+    parser.add_argument('-f', '--format', choices=['csv', 'jsonl'], help="input format (default: from extension, else jsonl)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument('-c', '--chunk-size', type=int, default=1000, help="rows per chunk sent to a worker (default: 1000)")
+    parser.add_argument('-r', '--rule-pack', help="JSON/YAML rule pack to score with (default: built-in rules)")
+    parser.add_argument('-p', '--population', help="add the scored profiles to the population stats in this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.rule_pack:
+        # Fail before any worker starts if the pack is invalid
+        try:
+            load_rule_pack(args.rule_pack)
+        except RulePackError as e:
+            print(f"Invalid rule pack: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    fmt = detect_format(args.input, args.format)
+    source = sys.stdin if args.input == '-' else open(args.input, newline='' if fmt == 'csv' else None, encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+
+    population = PopulationStats(args.population) if args.population else None
+    start = time.perf_counter()
+    try:
+        rows, errors = score_stream(
+            read_records(source, fmt), output, args.workers, max(1, args.chunk_size), args.rule_pack, population
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+    if population is not None:
+        population.save()
+        print(f"Population stats in {args.population} now cover {population.count} profiles", file=sys.stderr)
+
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"Scored {rows} rows ({errors} errors) in {elapsed:.2f}s - {rate:,.0f} rows/sec", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
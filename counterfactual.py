@@ -0,0 +1,221 @@
+"""
+Counterfactual Plans for WealthWise AI
+Cheapest input changes that lift a profile to the next grade
+
+A category's score only changes where one of its conditions flips, and
+every condition compares monomials of the inputs (debt_ratio > 0.40 is
+total_monthly_debt * monthly_income^-1 > 0.40). Solving each comparison
+for one input gives the exact values where the score can change, so the
+solver checks a handful of candidate amounts per input instead of
+searching. Every plan it returns was scored by the engine.
+"""
+
+import ast
+import math
+from bisect import bisect_right
+from itertools import combinations, product
+
+from inference_engine import (
+    GRADE_THRESHOLDS, GRADES, INPUT_FIELDS, METRIC_INPUTS, RETIREMENT_RULE_PATHS, WealthWiseInferenceEngine
+)
+
+# One-off amounts are costed as if set aside over this many months
+LUMP_SUM_MONTHS = 12
+
+# Inputs a plan may change: field -> (direction, monthly cost per dollar changed, action template)
+LEVERS = {
+    'total_monthly_debt': (-1, 1.0, "Cut monthly debt payments by ${change:,.0f}"),
+    'housing_cost': (-1, 1.0, "Cut monthly housing cost by ${change:,.0f}"),
+    'monthly_expenses': (-1, 1.0, "Cut monthly expenses by ${change:,.0f}"),
+    'monthly_savings': (1, 1.0, "Save ${change:,.0f} more each month"),
+    'monthly_income': (1, 1.0, "Raise monthly income by ${change:,.0f}"),
+    'emergency_savings': (1, 1 / LUMP_SUM_MONTHS, "Add ${change:,.0f} to emergency savings"),
+    'retirement_savings': (1, 1 / LUMP_SUM_MONTHS, "Add ${change:,.0f} to retirement savings"),
+}
+
+# Crossings beyond this many dollars are not plans anyone can act on
+MAX_AMOUNT = 1e12
+
+# Derived metrics as monomials of the inputs: coefficient, {input: exponent}.
+# Metrics missing here are only used as constants, for inputs they do not read.
+METRIC_MONOMIALS = {
+    'debt_ratio': (1.0, {'total_monthly_debt': 1, 'monthly_income': -1}),
+    'housing_ratio': (1.0, {'housing_cost': 1, 'monthly_income': -1}),
+    'savings_rate': (1.0, {'monthly_savings': 1, 'monthly_income': -1}),
+    'annual_income': (12.0, {'monthly_income': 1}),
+    'coverage_months': (1.0, {'emergency_savings': 1, 'monthly_expenses': -1}),
+}
+
+
+def _retirement_success_crossing(data, field, bound):
+    from retirement_projection import success_threshold
+    if field not in ('retirement_savings', 'monthly_savings'):
+        return None
+    return success_threshold(
+        data['age'], data['retirement_savings'], data['monthly_savings'],
+        data['monthly_income'] * 12, bound, field, RETIREMENT_RULE_PATHS
+    )
+
+
+# Metrics solved numerically: name -> function(data, field, bound) giving the
+# value of field where the metric crosses bound, or None
+METRIC_INVERTERS = {
+    'retirement_success_probability': _retirement_success_crossing,
+}
+
+
+def _monomial(node, data, field):
+    """(coefficient, {input: exponent}) of an expression, with names not reading field as constants"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return float(node.value), {}
+    if isinstance(node, ast.Name):
+        if node.id in METRIC_MONOMIALS:
+            return METRIC_MONOMIALS[node.id][0], dict(METRIC_MONOMIALS[node.id][1])
+        if node.id in INPUT_FIELDS:
+            return 1.0, {node.id: 1}
+        if field in METRIC_INPUTS.get(node.id, ()):
+            return None
+        return float(data[node.id]), {}
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mult, ast.Div)):
+        left, right = _monomial(node.left, data, field), _monomial(node.right, data, field)
+        if left is None or right is None:
+            return None
+        sign = 1 if isinstance(node.op, ast.Mult) else -1
+        exponents = dict(left[1])
+        for name, exponent in right[1].items():
+            exponents[name] = exponents.get(name, 0) + sign * exponent
+        return (left[0] * right[0] if sign == 1 else left[0] / right[0]), exponents
+    return None
+
+
+def _crossing(left, right, data, field):
+    """Value of field where left == right, when both sides are monomials"""
+    left, right = _monomial(left, data, field), _monomial(right, data, field)
+    if left is None or right is None or right[0] == 0:
+        return None
+    coefficient = left[0] / right[0]
+    exponents = dict(left[1])
+    for name, exponent in right[1].items():
+        exponents[name] = exponents.get(name, 0) - exponent
+    power = exponents.pop(field, 0)
+    if not power:
+        return None
+    rest = coefficient
+    for name, exponent in exponents.items():
+        if exponent:
+            value = float(data[name])
+            if value == 0:
+                return None
+            rest *= value ** exponent
+    if rest <= 0 or not math.isfinite(rest):
+        return None
+    return (1 / rest) ** (1 / power)
+
+
+def crossings(rule_pack, data, field):
+    """Every value of field at which a condition of the rule pack flips"""
+    values = set()
+    for category in rule_pack.dependency_graph.affected_categories({field}):
+        compiled = next(c for c in rule_pack.compiled_rules if c.name == category)
+        for compiled_rule in compiled.rules:
+            for node in ast.walk(compiled_rule.condition.tree):
+                if not isinstance(node, ast.Compare):
+                    continue
+                operands = [node.left] + node.comparators
+                for left, right in zip(operands, operands[1:]):
+                    for metric, bound in ((left, right), (right, left)):
+                        if (isinstance(metric, ast.Name) and metric.id in METRIC_INVERTERS
+                                and isinstance(bound, ast.Constant)):
+                            values.add(METRIC_INVERTERS[metric.id](data, field, float(bound.value)))
+                    values.add(_crossing(left, right, data, field))
+    values.discard(None)
+    return sorted(value for value in values if 0 <= value <= MAX_AMOUNT)
+
+
+def _candidate_amounts(current, crossing_values, direction):
+    """Whole-dollar amounts on and just past each crossing, in the lever's direction"""
+    amounts = set()
+    for value in crossing_values:
+        for amount in (math.floor(value) - 1, math.floor(value), math.ceil(value), math.ceil(value) + 1):
+            if amount >= 0 and (amount - current) * direction > 0:
+                amounts.add(amount)
+    return sorted(amounts, key=lambda amount: abs(amount - current))
+
+
+def _plan(changes, inputs, result):
+    steps = []
+    cost = 0.0
+    for field, amount in changes.items():
+        _, cost_per_dollar, action = LEVERS[field]
+        change = abs(amount - inputs[field])
+        cost += change * cost_per_dollar
+        steps.append({'field': field, 'action': action.format(change=change), 'from': inputs[field],
+                      'to': amount, 'change': change})
+    return {
+        'changes': dict(changes), 'steps': steps, 'monthly_cost': cost,
+        'score': result.score, 'final_score': result.final_score, 'grade': result.grade, 'assessment': result
+    }
+
+
+def next_grade_plans(engine, assessment, k=3, target_grade=None, max_changes=2):
+    """Up to k cheapest plans lifting an Assessment to target_grade (default: the next grade)
+
+    Each plan changes at most max_changes inputs from LEVERS; its
+    monthly_cost adds dollars per month and one-off amounts spread over
+    LUMP_SUM_MONTHS. Plans are sorted by cost and none contains the
+    changes of a cheaper plan. Returns [] at the top grade. Only
+    engine's rule pack is used; its metrics are left untouched.
+    """
+    current = bisect_right(GRADE_THRESHOLDS, assessment.score)
+    grade_index = GRADES.index(target_grade) if target_grade else current + 1
+    if grade_index <= current or grade_index >= len(GRADES):
+        return []
+    target = GRADE_THRESHOLDS[grade_index - 1]
+    inputs = dict(assessment.inputs)
+    data = assessment.context.data
+    rule_pack = engine.rule_pack
+    # Probes are not real evaluations, so they must not reach the engine's
+    # metrics: score them on an engine of their own with throwaway counters
+    engine = WealthWiseInferenceEngine(rule_pack=rule_pack)
+
+    # Per lever, the amounts that raise the score over every cheaper amount: (cost, amount, gain)
+    options = {}
+    for field, (direction, cost_per_dollar, _) in LEVERS.items():
+        best = assessment.score
+        steps = []
+        for amount in _candidate_amounts(inputs[field], crossings(rule_pack, data, field), direction):
+            try:
+                score = engine.update(assessment, {field: amount}).score
+            except ZeroDivisionError:
+                continue
+            if score > best:
+                best = score
+                steps.append((abs(amount - inputs[field]) * cost_per_dollar, amount, score - assessment.score))
+        if steps:
+            options[field] = steps
+
+    # Category scores add up, so a combination's score is predicted from its
+    # steps and only the promising combinations are scored by the engine
+    candidates = []
+    for size in range(1, max_changes + 1):
+        for fields in combinations(options, size):
+            for steps in product(*(options[field] for field in fields)):
+                if assessment.score + sum(step[2] for step in steps) >= target:
+                    candidates.append((sum(step[0] for step in steps), dict(zip(fields, (s[1] for s in steps)))))
+    candidates.sort(key=lambda candidate: (candidate[0], len(candidate[1])))
+
+    plans = []
+    for _, changes in candidates:
+        if any(set(plan['changes']) <= set(changes) and all(
+                (changes[field] - plan['changes'][field]) * LEVERS[field][0] >= 0 for field in plan['changes'])
+               for plan in plans):
+            continue
+        try:
+            result = engine.update(assessment, changes)
+        except ZeroDivisionError:
+            continue
+        if result.score >= target:
+            plans.append(_plan(changes, inputs, result))
+            if len(plans) == k:
+                break
+    return plans
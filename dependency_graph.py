@@ -0,0 +1,31 @@
+"""
+Dependency Graph for WealthWise AI
+Maps raw inputs through derived metrics to the categories that read them
+"""
+
+
+class DependencyGraph:
+    """Which metrics and categories must be recomputed when inputs change"""
+
+    def __init__(self, metric_inputs, compiled_rules):
+        # metric -> raw inputs it is computed from
+        self.metric_inputs = {metric: frozenset(inputs) for metric, inputs in metric_inputs.items()}
+        # category -> every variable its conditions and explanations read
+        self.category_names = {}
+        for compiled in compiled_rules:
+            names = set()
+            for compiled_rule in compiled.rules:
+                names.update(compiled_rule.condition.names)
+                names.update(compiled_rule.explanation.names)
+            self.category_names[compiled.name] = frozenset(names)
+
+    def affected_metrics(self, changed_fields):
+        """Derived metrics whose inputs include any changed field, in table order"""
+        changed = set(changed_fields)
+        return tuple(metric for metric, inputs in self.metric_inputs.items() if inputs & changed)
+
+    def affected_categories(self, changed_fields):
+        """Categories reading a changed field or a metric derived from one"""
+        names = set(changed_fields)
+        names.update(self.affected_metrics(changed_fields))
+        return frozenset(category for category, used in self.category_names.items() if used & names)
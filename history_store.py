@@ -0,0 +1,334 @@
+"""
+History Store for WealthWise AI
+Optional SQLite history of assessments with a background writer and running trends
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    score REAL NOT NULL,
+    final_score INTEGER NOT NULL,
+    grade TEXT NOT NULL,
+    rule_pack_version TEXT,
+    inputs TEXT NOT NULL,
+    metrics TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assessments_user_time ON assessments (user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS category_hits (
+    assessment_id INTEGER NOT NULL REFERENCES assessments (id),
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    category TEXT NOT NULL,
+    rule_index INTEGER NOT NULL,
+    severity TEXT NOT NULL,
+    score_impact REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS category_hits_user_category_time ON category_hits (user_id, category, created_at);
+
+CREATE TABLE IF NOT EXISTS score_trends (
+    user_id TEXT PRIMARY KEY,
+    evaluations INTEGER NOT NULL,
+    first_at REAL NOT NULL,
+    last_at REAL NOT NULL,
+    last_score REAL NOT NULL,
+    previous_score REAL,
+    ema_score REAL NOT NULL,
+    best_score REAL NOT NULL,
+    worst_score REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS category_trends (
+    user_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    rule_index INTEGER NOT NULL,
+    severity TEXT NOT NULL,
+    previous_severity TEXT,
+    changes INTEGER NOT NULL,
+    since REAL NOT NULL,
+    PRIMARY KEY (user_id, category)
+) WITHOUT ROWID;
+"""
+
+SCORE_TREND_FIELDS = ('evaluations', 'first_at', 'last_at', 'last_score', 'previous_score',
+                      'ema_score', 'best_score', 'worst_score')
+CATEGORY_TREND_FIELDS = ('rule_index', 'severity', 'previous_severity', 'changes', 'since')
+
+# Marks the end of the write queue
+_CLOSE = object()
+
+
+def connect(path):
+    """Open the database in WAL mode so readers never wait for the writer"""
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class HistoryStore:
+    """Append-only assessment history with trend aggregates kept up to date
+
+    record() only queues the rows; a background thread writes queued rows
+    in batches, one transaction per batch, and folds them into per-user
+    trends kept in a bounded LRU. trend() reads the aggregates in
+    constant time, counting records still in the queue, and history()
+    runs indexed per-user queries. Use one store per database file and
+    process, since the trends are maintained by the process that records.
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=0.5, ema_alpha=0.3, max_pending=10000,
+                 max_cached_users=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Weight of the newest score in the moving average
+        self.ema_alpha = ema_alpha
+        self.max_cached_users = max_cached_users
+        self.written = 0
+        self.dropped = 0
+
+        self._reader = connect(path)
+        self._reader.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        # Guards _trends; the writer takes it before _pending_lock
+        self._trend_lock = threading.Lock()
+        # user_id -> (score trend dict, {category: category trend dict}) of the
+        # records the writer has handled, least recently used first
+        self._trends = OrderedDict()
+        # Guards _pending and the queue order; never held while touching the disk
+        self._pending_lock = threading.Lock()
+        # user_id -> deque of (score, hits, created_at) queued but not yet handled
+        self._pending = {}
+        self._queue = queue.Queue(max_pending)
+        self._writer = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def record(self, user_id, assessment, created_at=None):
+        """Queue an assessment for writing; never waits on the disk
+
+        Returns False, and counts the record as dropped, when the write
+        queue is full.
+        """
+        created_at = time.time() if created_at is None else created_at
+        hits = [(rule.category, rule.index, rule.severity, rule.score_impact) for rule in assessment.rules]
+        row = (
+            user_id, created_at, assessment.score, assessment.final_score, assessment.grade,
+            assessment.rule_pack_version, json.dumps(dict(assessment.inputs)), json.dumps(dict(assessment.metrics))
+        )
+
+        with self._pending_lock:
+            try:
+                self._queue.put_nowait((row, hits))
+            except queue.Full:
+                self.dropped += 1
+                return False
+            self._pending.setdefault(user_id, deque()).append((assessment.score, hits, created_at))
+        return True
+
+    def _apply(self, trends, score, hits, created_at):
+        """Trends after one more record, and the category trends it changed"""
+        score_trend, category_trends = trends
+        score_trend = self._next_score_trend(score_trend, score, created_at)
+        changed = {}
+        for category, rule_index, severity, _ in hits:
+            updated = self._next_category_trend(category_trends.get(category), rule_index, severity, created_at)
+            if updated is not category_trends.get(category):
+                changed[category] = updated
+        return (score_trend, {**category_trends, **changed}), changed
+
+    def _next_score_trend(self, trend, score, created_at):
+        if trend is None:
+            return {'evaluations': 1, 'first_at': created_at, 'last_at': created_at, 'last_score': score,
+                    'previous_score': None, 'ema_score': score, 'best_score': score, 'worst_score': score}
+        return {
+            'evaluations': trend['evaluations'] + 1,
+            'first_at': trend['first_at'],
+            'last_at': created_at,
+            'last_score': score,
+            'previous_score': trend['last_score'],
+            'ema_score': self.ema_alpha * score + (1 - self.ema_alpha) * trend['ema_score'],
+            'best_score': max(trend['best_score'], score),
+            'worst_score': min(trend['worst_score'], score)
+        }
+
+    def _next_category_trend(self, trend, rule_index, severity, created_at):
+        """New category trend, or the same object when the matched rule did not change"""
+        if trend is None:
+            return {'rule_index': rule_index, 'severity': severity, 'previous_severity': None,
+                    'changes': 0, 'since': created_at}
+        if trend['rule_index'] == rule_index:
+            return trend
+        return {'rule_index': rule_index, 'severity': severity, 'previous_severity': trend['severity'],
+                'changes': trend['changes'] + 1, 'since': created_at}
+
+    def _read_trend(self, connection, user_id):
+        """Trends of a user as stored in the database"""
+        row = connection.execute(
+            f"SELECT {', '.join(SCORE_TREND_FIELDS)} FROM score_trends WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        categories = connection.execute(
+            f"SELECT category, {', '.join(CATEGORY_TREND_FIELDS)} FROM category_trends WHERE user_id = ?",
+            (user_id,)
+        ).fetchall()
+        score_trend = dict(zip(SCORE_TREND_FIELDS, row)) if row else None
+        return score_trend, {category: dict(zip(CATEGORY_TREND_FIELDS, values)) for category, *values in categories}
+
+    def trend(self, user_id):
+        """Running aggregates of a user, including queued records; None if never recorded
+
+        Returns the score trend (count, first/last time, last, previous,
+        moving average, best and worst score) with a 'categories' dict of
+        the current rule, severity and number of changes per category.
+        """
+        with self._trend_lock:
+            trends = self._trends.get(user_id)
+            if trends is None:
+                # Users leave the cache only once their trends are committed
+                with self._read_lock:
+                    trends = self._read_trend(self._reader, user_id)
+            with self._pending_lock:
+                pending = list(self._pending.get(user_id, ()))
+        for score, hits, created_at in pending:
+            trends, _ = self._apply(trends, score, hits, created_at)
+        score_trend, category_trends = trends
+        if score_trend is None:
+            return None
+        trend = dict(score_trend)
+        trend['categories'] = {category: dict(values) for category, values in category_trends.items()}
+        return trend
+
+    def history(self, user_id, limit=100, since=None):
+        """Newest-first assessments of a user that have been written"""
+        query = ("SELECT id, created_at, score, final_score, grade, rule_pack_version FROM assessments "
+                 "WHERE user_id = ?")
+        params = [user_id]
+        if since is not None:
+            query += " AND created_at >= ?"
+            params.append(since)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._read_lock:
+            rows = self._reader.execute(query, params).fetchall()
+        fields = ('id', 'created_at', 'score', 'final_score', 'grade', 'rule_pack_version')
+        return [dict(zip(fields, row)) for row in rows]
+
+    def category_history(self, user_id, category, limit=100):
+        """Newest-first (created_at, rule_index, severity, score_impact) of one category"""
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT created_at, rule_index, severity, score_impact FROM category_hits "
+                "WHERE user_id = ? AND category = ? ORDER BY created_at DESC LIMIT ?",
+                (user_id, category, limit)
+            ).fetchall()
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued, then stop the writer"""
+        self._queue.put(_CLOSE)
+        self._writer.join()
+        self._reader.close()
+
+    def _run(self):
+        connection = connect(self.path)
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather more records for up to flush_interval, so bursts share a transaction
+            while batch[-1] is not _CLOSE and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch[-1] is _CLOSE:
+                closing = True
+                batch.pop()
+            try:
+                self._write(connection, batch)
+            except Exception as e:
+                # The writer must outlive a bad batch, or every later record is lost
+                print(f"Error writing assessment history: {e!r}")
+            finally:
+                for _ in range(len(batch) + closing):
+                    self._queue.task_done()
+        connection.close()
+
+    def _release_pending(self, batch):
+        """Drop a handled batch, written or not, from the pending records"""
+        with self._pending_lock:
+            for row, _ in batch:
+                pending = self._pending[row[0]]
+                pending.popleft()
+                if not pending:
+                    del self._pending[row[0]]
+
+    def _write(self, connection, batch):
+        # Fold the batch into copies of the trends; the cache changes only once the batch is committed
+        trends = {}
+        try:
+            updates = []
+            for row, hits in batch:
+                user_id, created_at, score = row[0], row[1], row[2]
+                if user_id not in trends:
+                    trends[user_id] = self._trends.get(user_id) or self._read_trend(connection, user_id)
+                trends[user_id], changed = self._apply(trends[user_id], score, hits, created_at)
+                updates.append((trends[user_id][0], changed))
+
+            for (row, hits), (score_trend, changed) in zip(batch, updates):
+                user_id, created_at = row[0], row[1]
+                cursor = connection.execute(
+                    "INSERT INTO assessments (user_id, created_at, score, final_score, grade, "
+                    "rule_pack_version, inputs, metrics) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row
+                )
+                connection.executemany(
+                    "INSERT INTO category_hits VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, user_id, created_at) + hit for hit in hits]
+                )
+                connection.execute(
+                    f"INSERT OR REPLACE INTO score_trends (user_id, {', '.join(SCORE_TREND_FIELDS)}) "
+                    f"VALUES (?{', ?' * len(SCORE_TREND_FIELDS)})",
+                    (user_id,) + tuple(score_trend[field] for field in SCORE_TREND_FIELDS)
+                )
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO category_trends (user_id, category, {', '.join(CATEGORY_TREND_FIELDS)}) "
+                    f"VALUES (?, ?{', ?' * len(CATEGORY_TREND_FIELDS)})",
+                    [(user_id, category) + tuple(trend[field] for field in CATEGORY_TREND_FIELDS)
+                     for category, trend in changed.items()]
+                )
+        except Exception:
+            self._abandon(connection, batch)
+            raise
+
+        # Committed under the lock, so trend() never counts a record both stored and pending
+        with self._trend_lock:
+            try:
+                connection.commit()
+            except Exception:
+                self._abandon(connection, batch)
+                raise
+            for user_id, user_trends in trends.items():
+                self._trends[user_id] = user_trends
+                self._trends.move_to_end(user_id)
+            self._release_pending(batch)
+            # Only committed trends leave the cache; trend() reads them back from the database
+            while len(self._trends) > self.max_cached_users:
+                self._trends.popitem(last=False)
+        self.written += len(batch)
+
+    def _abandon(self, connection, batch):
+        """Roll back a failed batch; the cached trends never saw it"""
+        connection.rollback()
+        self._release_pending(batch)
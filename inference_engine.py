@@ -4,125 +4,552 @@ Processes financial data through knowledge base rules
 """
 
 import math
-from knowledge_base import FINANCIAL_RULES, get_retirement_benchmark
+import os
+import time
+from bisect import bisect_right
+
+# numpy and pandas are imported inside the batch methods, so processes that
+# only score single profiles never pay for loading them
+from assessment import Assessment, EvaluationContext
+from instrumentation import EngineMetrics, NO_MATCH
+from knowledge_base import (
+    FINANCIAL_RULES, get_retirement_benchmark,
+    RETIREMENT_AGE_BRACKETS, RETIREMENT_MULTIPLIERS
+)
+from quantile_sketch import POPULATION_METRICS
+from rule_pack import RulePackWatcher, compile_rule_pack, read_rule_pack
+
+# Raw profile fields collected from the user
+INPUT_FIELDS = (
+    'age', 'monthly_income', 'monthly_expenses', 'housing_cost',
+    'emergency_savings', 'retirement_savings', 'monthly_savings', 'total_monthly_debt'
+)
+
+# Metrics added by _calculate_derived_metrics: name -> (raw inputs, formula)
+DERIVED_METRIC_FORMULAS = {
+    'debt_ratio': (('total_monthly_debt', 'monthly_income'),
+                   lambda d: d['total_monthly_debt'] / d['monthly_income']),
+    'housing_ratio': (('housing_cost', 'monthly_income'),
+                      lambda d: d['housing_cost'] / d['monthly_income']),
+    'savings_rate': (('monthly_savings', 'monthly_income'),
+                     lambda d: d['monthly_savings'] / d['monthly_income']),
+    'annual_income': (('monthly_income',),
+                      lambda d: d['monthly_income'] * 12),
+    'age_benchmark': (('age',),
+                      lambda d: get_retirement_benchmark(d['age'])),
+    'coverage_months': (('emergency_savings', 'monthly_expenses'),
+                        lambda d: d['emergency_savings'] / d['monthly_expenses'])
+}
+
+# Simulated market paths behind retirement_success_probability
+RETIREMENT_RULE_PATHS = 2000
+
+
+def _retirement_success(data):
+    from retirement_projection import success_probability
+    return success_probability(
+        data['age'], data['retirement_savings'], data['monthly_savings'],
+        data['monthly_income'] * 12, RETIREMENT_RULE_PATHS
+    )
+
+
+def _retirement_success_columns(columns):
+    from retirement_projection import success_probability_columns
+    return success_probability_columns(
+        columns['age'], columns['retirement_savings'], columns['monthly_savings'],
+        columns['monthly_income'] * 12, RETIREMENT_RULE_PATHS
+    )
+
+
+# Metrics too costly to compute for every profile: name -> (raw inputs, formula,
+# column formula). They are computed on first lookup, so only profiles whose
+# rules or explanations read them pay for them.
+LAZY_METRIC_FORMULAS = {
+    'retirement_success_probability': (('age', 'retirement_savings', 'monthly_savings', 'monthly_income'),
+                                       _retirement_success, _retirement_success_columns)
+}
+DERIVED_METRICS = tuple(DERIVED_METRIC_FORMULAS) + tuple(LAZY_METRIC_FORMULAS)
+
+
+class ProfileData(dict):
+    """A profile's inputs and derived metrics; lazy metrics are computed on first lookup"""
+    
+    formulas = {name: formula for name, (_, formula, _) in LAZY_METRIC_FORMULAS.items()}
+    
+    def __missing__(self, name):
+        if name not in self.formulas:
+            raise KeyError(name)
+        value = self[name] = self.formulas[name](self)
+        return value
+    
+    def pending(self, names):
+        """Whether reading names would compute a lazy metric"""
+        return any(name in self.formulas and name not in self for name in names)
+
+
+class ProfileColumns(ProfileData):
+    """ProfileData for many profiles at once, one NumPy column per value"""
+    
+    formulas = {name: formula for name, (_, _, formula) in LAZY_METRIC_FORMULAS.items()}
+    
+    def take(self, rows):
+        """The same columns restricted to some rows"""
+        return ProfileColumns({name: values[rows] for name, values in self.items()})
+
+
+class ProfileSchema:
+    """How an EvaluationContext stores a profile compactly
+    
+    Inputs are kept as a tuple in INPUT_FIELDS order (None when missing)
+    and lazy metrics as (name, value) pairs once computed; the other
+    derived metrics are cheap, so they are recomputed on every unpack.
+    """
+    
+    __slots__ = ()
+    fields = INPUT_FIELDS
+    metric_names = DERIVED_METRICS
+    lazy_names = tuple(LAZY_METRIC_FORMULAS)
+    
+    def context(self, data, observe=None):
+        values = tuple(data.get(field) for field in self.fields)
+        return EvaluationContext(values, self.lazy_values(data), self, observe)
+    
+    def lazy_values(self, data):
+        """The lazy metrics in lazy_names order (None if not computed), or None if none were"""
+        if not any(name in data for name in self.lazy_names):
+            return None
+        return tuple(data.get(name) for name in self.lazy_names)
+    
+    def unpack(self, values, lazy):
+        data = ProfileData({field: value for field, value in zip(self.fields, values) if value is not None})
+        data.update((name, formula(data)) for name, (_, formula) in DERIVED_METRIC_FORMULAS.items())
+        if lazy is not None:
+            data.update((name, value) for name, value in zip(self.lazy_names, lazy) if value is not None)
+        return data
+    
+    def __reduce__(self):
+        return 'PROFILE_SCHEMA'
+
+
+PROFILE_SCHEMA = ProfileSchema()
+
+
+# Letter grades by minimum score, lowest first
+GRADE_THRESHOLDS = [40, 50, 55, 60, 65, 70, 75, 80, 85, 90]
+GRADES = ["F", "D", "C-", "C", "C+", "B-", "B", "B+", "A-", "A", "A+"]
+
+# Where the compiled rules are cached between runs; set it empty to disable.
+# Cached code skips the condition allowlist, so keep it writable only by this user.
+RULE_CACHE_DIR = os.environ.get(
+    'WEALTHWISE_RULE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__')
+)
+
+# Raw inputs behind each derived metric, for the dependency graph
+METRIC_INPUTS = {metric: inputs for metric, (inputs, _) in DERIVED_METRIC_FORMULAS.items()}
+METRIC_INPUTS.update({metric: inputs for metric, (inputs, _, _) in LAZY_METRIC_FORMULAS.items()})
+
+# Conditions are validated and compiled once, then loaded from the cache on later starts
+DEFAULT_RULE_PACK = compile_rule_pack(FINANCIAL_RULES, INPUT_FIELDS + DERIVED_METRICS, METRIC_INPUTS, RULE_CACHE_DIR)
+COMPILED_RULES = DEFAULT_RULE_PACK.compiled_rules
+DEPENDENCY_GRAPH = DEFAULT_RULE_PACK.dependency_graph
+
+
+def load_rule_pack(path):
+    """Read, validate and compile a JSON/YAML rule pack file for this engine"""
+    return compile_rule_pack(
+        read_rule_pack(path), INPUT_FIELDS + DERIVED_METRICS, METRIC_INPUTS, RULE_CACHE_DIR, source=path
+    )
+
 
 class WealthWiseInferenceEngine:
-    def __init__(self):
-        self.knowledge_base = FINANCIAL_RULES
+    def __init__(self, metrics=None, rule_pack=None, population=None):
+        # Rule hit counters and phase latencies, cheap enough to leave on
+        self.metrics = metrics if metrics is not None else EngineMetrics()
+        # Optional PopulationStats fed by evaluate_financial_health and evaluate_batch
+        self.population = population
+        self.set_rule_pack(rule_pack if rule_pack is not None else DEFAULT_RULE_PACK)
+        # One bound method shared by every context this engine creates
+        self._observe_render = self.metrics.observe_render
         self.recommendations = []
         self.base_score = 100
         self.final_score = 100
+    
+    # The active rule pack's parts; evaluations read self.rule_pack once
+    knowledge_base = property(lambda self: self.rule_pack.knowledge_base)
+    compiled_rules = property(lambda self: self.rule_pack.compiled_rules)
+    dependency_graph = property(lambda self: self.rule_pack.dependency_graph)
+    
+    def set_rule_pack(self, rule_pack):
+        """Switch to another compiled RulePack
+        
+        A single reference assignment: evaluations already running finish
+        with the pack they started with, and nothing waits on a lock.
+        """
+        self.metrics.register_rules(rule_pack.compiled_rules)
+        self.rule_pack = rule_pack
+    
+    def watch_rule_pack(self, path, interval=2.0):
+        """Load a rule pack file now and hot-reload it whenever it changes
+        
+        Returns the started RulePackWatcher; call stop() on it to stop watching.
+        """
+        self.set_rule_pack(load_rule_pack(path))
+        return RulePackWatcher(path, load_rule_pack, self.set_rule_pack, self.rule_pack.version, interval).start()
         
     def evaluate_financial_health(self, user_data):
-        """Main inference method using forward chaining"""
-        self.recommendations = []
-        self.final_score = self.base_score
+        """Main inference method using forward chaining
+        
+        Kept for existing callers: stores the outcome on the engine; the
+        derived metrics are in the result. Use evaluate() to share an engine.
+        """
+        assessment = self.evaluate(user_data)
+        if self.population is not None:
+            self.population.add(assessment)
+        
+        self.recommendations = [rec.to_dict() for rec in assessment.recommendations]
+        self.final_score = assessment.score
+        return assessment.to_dict()
+    
+    def evaluate(self, user_data):
+        """Reentrant inference returning an immutable Assessment
+        
+        Neither the engine nor user_data is modified, so one engine can
+        serve many threads at once.
+        """
+        rule_pack = self.rule_pack
+        start = time.perf_counter()
         
         # Calculate derived metrics
         calculated_metrics = self._calculate_derived_metrics(user_data)
-        user_data.update(calculated_metrics)
+        # Inputs only: a stale metric left in user_data must not shadow the fresh one
+        data = ProfileData({field: user_data[field] for field in INPUT_FIELDS if field in user_data})
+        data.update(calculated_metrics)
+        derived_at = time.perf_counter()
         
         # Apply all rules from knowledge base
-        for category, ruleset in self.knowledge_base.items():
-            category_applied = False
-            
-            for rule in ruleset['rules']:
-                if self._evaluate_condition(rule['condition'], user_data):
-                    # Apply score impact (weighted)
-                    weighted_impact = rule['score_impact'] * ruleset['weight']
-                    self.final_score += weighted_impact
-                    
-                    # Generate explanation with actual values
-                    explanation = self._generate_explanation(rule, user_data)
-                    
-                    # Add recommendation
-                    self.recommendations.append({
-                        'category': category,
-                        'message': rule['recommendation'],
-                        'severity': rule['severity'],
-                        'explanation': explanation,
-                        'score_impact': weighted_impact,
-                        'weight': ruleset['weight']
-                    })
-                    
-                    category_applied = True
-                    break  # Only apply first matching rule per category
-            
+        rules = self._apply_rules(rule_pack.compiled_rules, data, derived_at - start)
+        return self._build_assessment(data, rules, rule_pack)
+    
+    def update(self, previous_result, changed_fields):
+        """Re-evaluate an Assessment after some inputs changed
+        
+        Only the derived metrics computed from changed_fields, and the
+        categories reading those fields or metrics, are recomputed; every
+        other category's rule is reused from previous_result. If the rule pack
+        changed since previous_result, everything is evaluated again.
+        """
+        unknown = set(changed_fields) - set(INPUT_FIELDS)
+        if unknown:
+            raise KeyError(f"Unknown input fields: {', '.join(sorted(unknown))}")
+        
+        inputs = dict(previous_result.inputs)
+        changed = {field: value for field, value in changed_fields.items() if inputs.get(field) != value}
+        if not changed:
+            return previous_result
+        inputs.update(changed)
+        
+        rule_pack = self.rule_pack
+        if previous_result.rule_pack_version != rule_pack.version:
+            return self.evaluate(inputs)
+        
+        start = time.perf_counter()
+        affected_metrics = rule_pack.dependency_graph.affected_metrics(changed)
+        # Stale lazy metrics are dropped and recomputed only if read again
+        metrics = {name: value for name, value in previous_result.metrics.items() if name not in affected_metrics}
+        metrics.update(self._calculate_derived_metrics(inputs, affected_metrics))
+        data = ProfileData(inputs)
+        data.update(metrics)
+        derived_at = time.perf_counter()
+        
+        affected = rule_pack.dependency_graph.affected_categories(changed)
+        categories = [compiled for compiled in rule_pack.compiled_rules if compiled.name in affected]
+        updated = iter(self._apply_rules(categories, data, derived_at - start))
+        rules = [
+            next(updated) if compiled.name in affected else previous
+            for compiled, previous in zip(rule_pack.compiled_rules, previous_result.rules)
+        ]
+        return self._build_assessment(data, rules, rule_pack)
+    
+    def _apply_rules(self, categories, data, derive_seconds):
+        """The rule applied in each of the given categories, recording hits and timings
+        
+        A category where no rule matched gets its neutral rule.
+        """
+        start = time.perf_counter()
+        rules = []
+        matched = []
+        for compiled in categories:
+            compiled_rule = self._match_category(compiled, data)
+            matched.append((compiled.name, NO_MATCH if compiled_rule is None else compiled_rule.index))
             # If no rule matched for this category, add neutral feedback
-            if not category_applied:
-                self.recommendations.append({
-                    'category': category,
-                    'message': f"✅ {ruleset['description']} - No issues detected",
-                    'severity': 'good',
-                    'explanation': f"Your {ruleset['description'].lower()} appears to be in good standing",
-                    'score_impact': 0,
-                    'weight': ruleset['weight']
-                })
+            rules.append(compiled_rule if compiled_rule is not None else compiled.neutral)
+        self.metrics.record_evaluation(derive_seconds, time.perf_counter() - start, matched)
+        return rules
+    
+    def _build_assessment(self, data, rules, rule_pack):
+        """Total the per-category impacts and wrap everything in an Assessment
+        
+        The Assessment keeps the shared rules and a compact context; its
+        recommendations are only made when read.
+        """
+        # Summed in category order, so update() matches a full evaluation exactly
+        score = self.base_score
+        for compiled_rule in rules:
+            score += compiled_rule.score_impact
         
         # Ensure score is within bounds
-        self.final_score = max(0, min(100, self.final_score))
+        score = max(0, min(100, score))
+        
+        # Built after matching, so lazy metrics the rules read are kept
+        context = PROFILE_SCHEMA.context(data, self._observe_render)
+        return Assessment(
+            round(score), self._calculate_grade(score), rule_pack.shared_rules(rules), score, context,
+            rule_pack.version
+        )
+    
+    def evaluate_batch(self, df):
+        """Score every row of a DataFrame of profiles with column-wise operations
+        
+        Returns a DataFrame aligned with df holding final_score, grade and the
+        index of the first matching rule per category (-1 when none matched).
+        The rule pack version used is in result.attrs['rule_pack_version'].
+        Rows with zero monthly_income or monthly_expenses, which raise
+        ZeroDivisionError on the scalar path, get a missing score and grade.
+        """
+        import numpy as np
+        import pandas as pd
+        rule_pack = self.rule_pack
+        columns = ProfileColumns({field: df[field].to_numpy(dtype=np.float64) for field in INPUT_FIELDS})
+        score, grades, rule_indexes, invalid = self._score_columns(rule_pack.compiled_rules, columns, len(df))
+        self._record_batch(rule_indexes, invalid)
+        rounded = np.round(score).astype(np.int64)
+        if self.population is not None:
+            valid = ~invalid
+            self.population.add_columns(
+                rounded[valid], {name: columns[name][valid] for name in POPULATION_METRICS}
+            )
+        
+        final_score = pd.array(rounded, dtype='Int64')
+        final_score[invalid] = pd.NA
+        
+        result = pd.DataFrame({'final_score': final_score, 'grade': grades}, index=df.index)
+        for category, rule_index in rule_indexes.items():
+            result[f'{category}_rule'] = rule_index
+        result.attrs['rule_pack_version'] = rule_pack.version
+        return result
+    
+    def evaluate_grid(self, base_profile, x_field, x_values, y_field, y_values):
+        """Score a base profile over every combination of two input axes in one pass
+        
+        Returns a dict with the axes plus 'scores' (rounded, NaN where the
+        profile cannot be scored) and 'grades' (None there), both shaped
+        (len(y_values), len(x_values)) so they plot directly as a heatmap,
+        and the 'rule_pack_version' used.
+        """
+        import numpy as np
+        for field in (x_field, y_field):
+            if field not in INPUT_FIELDS:
+                raise KeyError(f"Unknown input field: {field}")
+        if x_field == y_field:
+            raise ValueError("x_field and y_field must differ")
+        
+        x_values = np.asarray(x_values, dtype=np.float64)
+        y_values = np.asarray(y_values, dtype=np.float64)
+        shape = (len(y_values), len(x_values))
+        size = shape[0] * shape[1]
+        
+        columns = {field: np.full(size, float(base_profile[field])) for field in INPUT_FIELDS}
+        grid_x, grid_y = np.meshgrid(x_values, y_values)
+        columns[x_field] = grid_x.ravel()
+        columns[y_field] = grid_y.ravel()
+        
+        rule_pack = self.rule_pack
+        score, grades, _, invalid = self._score_columns(rule_pack.compiled_rules, columns, size)
+        scores = np.round(score)
+        scores[invalid] = np.nan
         
         return {
-            'final_score': round(self.final_score),
-            'grade': self._calculate_grade(self.final_score),
-            'recommendations': self.recommendations,
-            'metrics': calculated_metrics
+            'x_field': x_field,
+            'x_values': x_values,
+            'y_field': y_field,
+            'y_values': y_values,
+            'scores': scores.reshape(shape),
+            'grades': grades.reshape(shape),
+            'rule_pack_version': rule_pack.version
         }
     
-    def _calculate_derived_metrics(self, user_data):
-        """Calculate derived financial metrics"""
-        monthly_income = user_data['monthly_income']
-        annual_income = monthly_income * 12
-        
-        metrics = {
-            'debt_ratio': user_data['total_monthly_debt'] / monthly_income,
-            'housing_ratio': user_data['housing_cost'] / monthly_income,
-            'savings_rate': user_data['monthly_savings'] / monthly_income,
-            'annual_income': annual_income,
-            'age_benchmark': get_retirement_benchmark(user_data['age']),
-            'coverage_months': user_data['emergency_savings'] / user_data['monthly_expenses']
+    def _record_batch(self, rule_indexes, invalid):
+        """Add per-rule hit counts of a scored batch (valid rows only) to the metrics"""
+        import numpy as np
+        valid = ~invalid
+        matched_counts = {}
+        for category, rule_index in rule_indexes.items():
+            counts = np.bincount(rule_index[valid].astype(np.int64) + 1)
+            for position, count in enumerate(counts):
+                if count:
+                    matched_counts[(category, position - 1)] = int(count)
+        self.metrics.record_batch(int(valid.sum()), matched_counts)
+    
+    def _score_columns(self, compiled_rules, columns, size):
+        """Score input columns; returns (clamped score, grades, rule indexes, invalid mask)
+        
+        Rows with zero monthly_income or monthly_expenses, which raise
+        ZeroDivisionError on the scalar path, are flagged invalid and get no
+        grade and no matched rules. Derived metrics are added to columns when
+        it is already a ProfileColumns.
+        """
+        import numpy as np
+        invalid = (columns['monthly_income'] == 0) | (columns['monthly_expenses'] == 0)
+        if not isinstance(columns, ProfileColumns):
+            columns = ProfileColumns(columns)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns.update(self._calculate_derived_metrics_columns(columns))
+        
+        score = np.full(size, float(self.base_score))
+        rule_indexes = {}
+        for compiled in compiled_rules:
+            rule_index = self._match_category_columns(compiled, columns, size)
+            impacts = np.array([r.score_impact for r in compiled.rules] + [0.0])
+            impact = impacts[rule_index]  # -1 picks the trailing 0.0
+            
+            # Accumulate in category order so results match the scalar path bit for bit
+            score += impact
+            rule_indexes[compiled.name] = np.where(invalid, rule_index.dtype.type(-1), rule_index)
+        
+        score = np.clip(score, 0, 100)
+        grades = np.array(GRADES, dtype=object)[np.searchsorted(GRADE_THRESHOLDS, score, side='right')]
+        grades[invalid] = None
+        return score, grades, rule_indexes, invalid
+    
+    def _calculate_derived_metrics_columns(self, columns):
+        """Column-wise counterpart of _calculate_derived_metrics"""
+        import numpy as np
+        monthly_income = columns['monthly_income']
+        age_bracket = np.searchsorted(RETIREMENT_AGE_BRACKETS, columns['age'], side='right')
+        
+        return {
+            'debt_ratio': columns['total_monthly_debt'] / monthly_income,
+            'housing_ratio': columns['housing_cost'] / monthly_income,
+            'savings_rate': columns['monthly_savings'] / monthly_income,
+            'annual_income': monthly_income * 12,
+            'age_benchmark': np.asarray(RETIREMENT_MULTIPLIERS)[age_bracket],
+            'coverage_months': columns['emergency_savings'] / columns['monthly_expenses']
         }
+    
+    def _match_category_columns(self, compiled, columns, size):
+        """Column-wise counterpart of _match_category, returning rule indexes"""
+        import numpy as np
+        if compiled.index is not None:
+            index = compiled.index
+            values = columns[index.variable]
+            breakpoints = np.asarray(index.breakpoints, dtype=np.float64)
+            position = np.searchsorted(breakpoints, values, side='left')
+            on_breakpoint = breakpoints[np.minimum(position, len(breakpoints) - 1)] == values
+            segment = 2 * position + on_breakpoint
+            rule_index = np.asarray(index.segment_rules, dtype=self._rule_index_dtype(compiled))[segment]
+            rule_index[np.isnan(values)] = -1
+            return rule_index
         
-        return metrics
+        rule_index = np.full(size, -1, dtype=self._rule_index_dtype(compiled))
+        unmatched = np.ones(size, dtype=bool)
+        for compiled_rule in compiled.rules:
+            condition = compiled_rule.condition
+            if columns.pending(condition.names):
+                # Compute the lazy metric only for rows still looking for a rule
+                rows = np.flatnonzero(unmatched)
+                matched = np.zeros(size, dtype=bool)
+                matched[rows] = self._evaluate_condition_columns(condition, columns.take(rows), len(rows))
+            else:
+                matched = self._evaluate_condition_columns(condition, columns, size)
+            matched &= unmatched
+            rule_index[matched] = compiled_rule.index
+            unmatched &= ~matched
+        return rule_index
+    
+    def _rule_index_dtype(self, compiled):
+        """Smallest signed integer type holding every rule index of a category"""
+        import numpy as np
+        return np.int8 if len(compiled.rules) < 128 else np.int16
+    
+    def _evaluate_condition_columns(self, condition, columns, size):
+        """Evaluate a precompiled condition over whole columns, returning a mask"""
+        import numpy as np
+        try:
+            with np.errstate(invalid='ignore'):
+                mask = condition.vector_function(columns)
+            return np.broadcast_to(np.asarray(mask, dtype=bool), (size,)).copy()
+        except Exception as e:
+            print(f"Error evaluating condition: {condition.source} - {e}")
+            self.metrics.record_condition_error(condition)
+            return np.zeros(size, dtype=bool)
+    
+    def _calculate_derived_metrics(self, user_data, names=DERIVED_METRICS):
+        """Calculate derived financial metrics (all of them, or only names); lazy ones are skipped"""
+        return {name: DERIVED_METRIC_FORMULAS[name][1](user_data) for name in names if name in DERIVED_METRIC_FORMULAS}
+    
+    def _match_category(self, compiled, data):
+        """Return the first matching rule of a category, or None"""
+        if compiled.index is not None:
+            # Single-variable range category: bisect on the breakpoint index
+            try:
+                rule_index = compiled.index.lookup(data[compiled.index.variable])
+            except Exception as e:
+                print(f"Error evaluating category: {compiled.name} - {e!r}")
+                self.metrics.record_category_error(compiled.name)
+                return None
+            return compiled.rules[rule_index] if rule_index >= 0 else None
+        
+        for compiled_rule in compiled.rules:
+            if self._evaluate_condition(compiled_rule.condition, data):
+                return compiled_rule  # Only apply first matching rule per category
+        return None
     
     def _evaluate_condition(self, condition, data):
-        """Safely evaluate a condition string with data"""
+        """Evaluate a precompiled condition against the data"""
         try:
-            # Create a safe environment for eval
-            safe_dict = {k: v for k, v in data.items() if not k.startswith('_')}
-            return eval(condition, {"__builtins__": {}}, safe_dict)
+            return condition(data)
         except Exception as e:
-            print(f"Error evaluating condition: {condition} - {e}")
+            print(f"Error evaluating condition: {condition.source} - {e}")
+            self.metrics.record_condition_error(condition)
             return False
     
-    def _generate_explanation(self, rule, user_data):
+    def _generate_explanation(self, compiled_rule, data):
         """Generate natural language explanation for recommendations"""
-        try:
-            # Use the template from the rule
-            if 'explanation_template' in rule:
-                explanation = rule['explanation_template'].format(**user_data)
-            else:
-                explanation = "Based on standard financial planning guidelines"
-            
-            return explanation
-        except Exception as e:
-            return "Based on analysis of your financial situation"
+        # Templates are compiled and validated with the knowledge base
+        return compiled_rule.explanation.render(data)
     
     def _calculate_grade(self, score):
         """Convert numerical score to letter grade"""
-        if score >= 90: return "A+"
-        elif score >= 85: return "A"
-        elif score >= 80: return "A-"
-        elif score >= 75: return "B+"
-        elif score >= 70: return "B"
-        elif score >= 65: return "B-"
-        elif score >= 60: return "C+"
-        elif score >= 55: return "C"
-        elif score >= 50: return "C-"
-        elif score >= 40: return "D"
-        else: return "F"
-    
-    def get_recommendations_by_priority(self):
-        """Sort recommendations by severity priority"""
-        priority_order = {'critical': 0, 'high': 1, 'medium': 2, 'good': 3, 'excellent': 4}
-        return sorted(self.recommendations, key=lambda x: priority_order.get(x['severity'], 5))
\ No newline at end of file
+        return GRADES[bisect_right(GRADE_THRESHOLDS, score)]
+    
+    def get_recommendations_by_priority(self, recommendations=None):
+        """Sort recommendations by severity priority
+        
+        Pass the recommendations of a result to avoid depending on the
+        engine's last evaluate_financial_health call.
+        """
+        if recommendations is None:
+            recommendations = self.recommendations
+        return sort_recommendations_by_priority(recommendations)
+
+def sort_recommendations_by_priority(recommendations):
+    """Sort recommendations by severity priority"""
+    priority_order = {'critical': 0, 'high': 1, 'medium': 2, 'good': 3, 'excellent': 4}
+    return sorted(recommendations, key=lambda x: priority_order.get(x['severity'], 5))
+
+# How reports group recommendations, highest priority first: (group, severities)
+SEVERITY_GROUPS = (
+    ('priority', ('critical', 'high')),
+    ('improve', ('medium',)),
+    ('strengths', ('good', 'excellent'))
+)
+
+def group_recommendations_by_severity(recommendations):
+    """Recommendations sorted by priority and split into SEVERITY_GROUPS in one pass"""
+    by_severity = {}
+    for rec in sort_recommendations_by_priority(recommendations):
+        by_severity.setdefault(rec['severity'], []).append(rec)
+    return [
+        (group, [rec for severity in severities for rec in by_severity.get(severity, ())])
+        for group, severities in SEVERITY_GROUPS
+    ]
\ No newline at end of file
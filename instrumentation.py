@@ -0,0 +1,210 @@
+"""
+Instrumentation for WealthWise AI
+Rule hit counters, condition error counters and latency histograms,
+exportable in the Prometheus text format
+"""
+
+import threading
+from bisect import bisect_left
+
+from rule_compiler import NO_MATCH
+
+# Latency bucket upper bounds, in seconds (1 µs .. 1 s)
+LATENCY_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0
+)
+
+# Evaluation phases with a latency histogram
+PHASES = ('derive_metrics', 'match_rules', 'render_explanation')
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds observations <= bounds[i], the last one +Inf"""
+
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, counts, total, count):
+        for i, value in enumerate(counts):
+            self.counts[i] += value
+        self.total += total
+        self.count += count
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (an estimate)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, value in zip(self.bounds + (float('inf'),), self.counts):
+            seen += value
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class EngineMetrics:
+    """Counters and histograms for one engine, safe to share across threads
+
+    Each evaluation takes the lock once, so the overhead stays around a
+    microsecond and the instrumentation can stay on in production.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._condition_labels = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.evaluations = 0
+            self.rule_matches = {}       # (category, rule index) -> count, -1 for no match
+            self.condition_errors = {}   # (category, rule index) -> count
+            self.phases = {phase: Histogram() for phase in PHASES}
+
+    def register_rules(self, compiled_rules):
+        """Remember which category and rule every compiled condition belongs to
+
+        Replaces the previous mapping, so conditions of a pack that was
+        hot-reloaded away are not kept alive.
+        """
+        self._condition_labels = {
+            compiled_rule.condition: (compiled.name, compiled_rule.index)
+            for compiled in compiled_rules for compiled_rule in compiled.rules
+        }
+
+    def record_evaluation(self, derive_seconds, match_seconds, matched):
+        """Record one evaluation; matched is a list of (category, rule index)"""
+        with self._lock:
+            self.evaluations += 1
+            self.phases['derive_metrics'].observe(derive_seconds)
+            self.phases['match_rules'].observe(match_seconds)
+            for key in matched:
+                self.rule_matches[key] = self.rule_matches.get(key, 0) + 1
+
+    def record_batch(self, rows, matched_counts):
+        """Record a batch evaluation; matched_counts maps (category, rule index) to rows"""
+        with self._lock:
+            self.evaluations += rows
+            for key, count in matched_counts.items():
+                self.rule_matches[key] = self.rule_matches.get(key, 0) + count
+
+    def record_condition_error(self, condition):
+        key = self._condition_labels.get(condition, ('unknown', NO_MATCH))
+        with self._lock:
+            self.condition_errors[key] = self.condition_errors.get(key, 0) + 1
+
+    def record_category_error(self, category):
+        with self._lock:
+            key = (category, NO_MATCH)
+            self.condition_errors[key] = self.condition_errors.get(key, 0) + 1
+
+    def observe_render(self, seconds):
+        with self._lock:
+            self.phases['render_explanation'].observe(seconds)
+
+    def snapshot(self):
+        """Plain-data copy of every counter and histogram"""
+        with self._lock:
+            return {
+                'evaluations': self.evaluations,
+                'rule_matches': dict(self.rule_matches),
+                'condition_errors': dict(self.condition_errors),
+                'phases': {
+                    phase: (list(h.counts), h.total, h.count) for phase, h in self.phases.items()
+                }
+            }
+
+    def drain(self):
+        """Return a snapshot and reset, e.g. to ship a worker's counts to its parent"""
+        with self._lock:
+            snapshot = {
+                'evaluations': self.evaluations,
+                'rule_matches': self.rule_matches,
+                'condition_errors': self.condition_errors,
+                'phases': {
+                    phase: (h.counts, h.total, h.count) for phase, h in self.phases.items()
+                }
+            }
+            self.evaluations = 0
+            self.rule_matches = {}
+            self.condition_errors = {}
+            self.phases = {phase: Histogram() for phase in PHASES}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Add the counts of a snapshot from another engine"""
+        with self._lock:
+            self.evaluations += snapshot['evaluations']
+            for key, count in snapshot['rule_matches'].items():
+                self.rule_matches[key] = self.rule_matches.get(key, 0) + count
+            for key, count in snapshot['condition_errors'].items():
+                self.condition_errors[key] = self.condition_errors.get(key, 0) + count
+            for phase, (counts, total, count) in snapshot['phases'].items():
+                self.phases[phase].merge(counts, total, count)
+
+
+def _label_value(value):
+    """A label value escaped as the Prometheus text format requires"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_label_value(value)}"' for name, value in labels.items()) + '}'
+
+
+def render_prometheus(metrics, cache_stats=None):
+    """Prometheus text exposition of an EngineMetrics (and optional result cache stats)"""
+    data = metrics.snapshot()
+    lines = [
+        "# HELP wealthwise_evaluations_total Profiles evaluated.",
+        "# TYPE wealthwise_evaluations_total counter",
+        f"wealthwise_evaluations_total {data['evaluations']}",
+        "# HELP wealthwise_rule_matches_total First-matching rule per category (rule=\"-1\" when none matched).",
+        "# TYPE wealthwise_rule_matches_total counter",
+    ]
+    for (category, rule), count in sorted(data['rule_matches'].items()):
+        lines.append(f"wealthwise_rule_matches_total{_labels(category=category, rule=rule)} {count}")
+
+    lines += [
+        "# HELP wealthwise_condition_errors_total Rule conditions that raised and were treated as false.",
+        "# TYPE wealthwise_condition_errors_total counter",
+    ]
+    for (category, rule), count in sorted(data['condition_errors'].items()):
+        lines.append(f"wealthwise_condition_errors_total{_labels(category=category, rule=rule)} {count}")
+
+    lines += [
+        "# HELP wealthwise_phase_seconds Time spent per evaluation phase.",
+        "# TYPE wealthwise_phase_seconds histogram",
+    ]
+    for phase, (counts, total, count) in data['phases'].items():
+        cumulative = 0
+        for bound, value in zip(LATENCY_BUCKETS + (float('inf'),), counts):
+            cumulative += value
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f"wealthwise_phase_seconds_bucket{_labels(phase=phase, le=le)} {cumulative}")
+        lines.append(f"wealthwise_phase_seconds_sum{_labels(phase=phase)} {total!r}")
+        lines.append(f"wealthwise_phase_seconds_count{_labels(phase=phase)} {count}")
+
+    if cache_stats is not None:
+        lines += [
+            "# HELP wealthwise_result_cache_lookups_total Result cache lookups by outcome.",
+            "# TYPE wealthwise_result_cache_lookups_total counter",
+            f"wealthwise_result_cache_lookups_total{_labels(result='hit')} {cache_stats['hits']}",
+            f"wealthwise_result_cache_lookups_total{_labels(result='miss')} {cache_stats['misses']}",
+            "# HELP wealthwise_result_cache_entries Entries held in the result cache.",
+            "# TYPE wealthwise_result_cache_entries gauge",
+            f"wealthwise_result_cache_entries {cache_stats['size']}",
+        ]
+    return '\n'.join(lines) + '\n'
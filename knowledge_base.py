@@ -3,6 +3,8 @@ Knowledge Base for WealthWise AI
 Contains all financial rules and expert knowledge
 """
 
+from bisect import bisect_right
+
 FINANCIAL_RULES = {
     "emergency_fund": {
         "description": "Emergency savings adequacy",
@@ -161,20 +163,35 @@ FINANCIAL_RULES = {
                 "recommendation": "✅ Excellent retirement planning! You're on track for retirement",
                 "severity": "excellent",
                 "explanation_template": "You have ${retirement_savings} saved - meeting age {age} benchmark of {age_benchmark}x annual income!"
+            },
+            {
+                "condition": "age < 65 and retirement_success_probability < 0.5",
+                "score_impact": -6,
+                "recommendation": "📉 At your current pace you may fall short at retirement. Consider saving more each month",
+                "severity": "medium",
+                "explanation_template": "Only {retirement_success_probability:.0%} of simulated market scenarios grow your savings to 8x annual income (${8 * annual_income}) by age 65"
             }
         ]
     }
 }
 
+# Retirement savings multiple of annual income, by age bracket upper bound
+RETIREMENT_AGE_BRACKETS = [30, 40, 50, 60]
+RETIREMENT_MULTIPLIERS = [0.5, 1.0, 3.0, 6.0, 8.0]
+
 def get_retirement_benchmark(age):
     """Get retirement savings benchmark based on age"""
-    if age < 30:
-        return 0.5
-    elif age < 40:
-        return 1.0
-    elif age < 50:
-        return 3.0
-    elif age < 60:
-        return 6.0
-    else:
-        return 8.0
\ No newline at end of file
+    return RETIREMENT_MULTIPLIERS[bisect_right(RETIREMENT_AGE_BRACKETS, age)]
+
+# Healthy level of each headline metric: name -> (True if lower is better, limit)
+KEY_METRIC_TARGETS = {
+    'debt_ratio': (True, 0.36),
+    'savings_rate': (False, 0.10),
+    'housing_ratio': (True, 0.30),
+    'coverage_months': (False, 3)
+}
+
+def metric_on_target(name, value):
+    """Whether a headline metric is at a healthy level"""
+    lower_is_better, limit = KEY_METRIC_TARGETS[name]
+    return value <= limit if lower_is_better else value >= limit
@@ -4,15 +4,19 @@ Render-optimized version
 """
 
 import streamlit as st
-import pandas as pd
 import sys
 import os
+import hashlib
+import time
+import uuid
 
 # Add the current directory to Python path for Render
 sys.path.append(os.path.dirname(__file__))
 
 try:
-    from inference_engine import WealthWiseInferenceEngine
+    from inference_engine import group_recommendations_by_severity
+    from knowledge_base import metric_on_target
+    from app_resources import fragment, get_evaluator, get_history_store, get_population_stats
 except ImportError as e:
     st.error(f"Error importing inference engine: {e}")
     st.stop()
@@ -33,6 +37,42 @@ def initialize_session_state():
         st.session_state.results = None
     if 'user_data' not in st.session_state:
         st.session_state.user_data = None
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = uuid.uuid4().hex
+
+# PBKDF2 rounds behind a named history key, so a leaked database does not reveal passphrases
+HISTORY_KEY_ROUNDS = 200_000
+
+def history_key(name, passphrase):
+    """History user id for a profile name and passphrase; the same pair always gives the same id"""
+    cached = st.session_state.get('history_key')
+    if cached and cached[0] == (name, passphrase):
+        return cached[1]
+    key = hashlib.pbkdf2_hmac('sha256', passphrase.encode('utf-8'), name.encode('utf-8'), HISTORY_KEY_ROUNDS).hex()
+    st.session_state.history_key = ((name, passphrase), key)
+    return key
+
+# Sidebar inputs: field -> (label, default, step); age is a slider
+PROFILE_INPUTS = {
+    'monthly_income': ("Monthly Income ($)", 5000, 100),
+    'monthly_expenses': ("Monthly Expenses ($)", 3500, 100),
+    'housing_cost': ("Monthly Housing Cost ($)", 1500, 100),
+    'emergency_savings': ("Emergency Savings ($)", 5000, 500),
+    'retirement_savings': ("Retirement Savings ($)", 15000, 1000),
+    'monthly_savings': ("Monthly Savings ($)", 500, 50),
+    'total_monthly_debt': ("Monthly Debt Payments ($)", 800, 50)
+}
+
+# In live mode, changes arriving this soon after the last scored one are scored
+# together once they settle, so a burst of steps costs one evaluation
+LIVE_DEBOUNCE_SECONDS = 0.3
+
+# Recommendation panel of each severity group: (heading, icon, expanded)
+RECOMMENDATION_PANELS = {
+    'priority': ("#### 🚨 Priority Actions (Critical/High)", "🔴", True),
+    'improve': ("#### ⚠️ Areas for Improvement (Medium)", "🟡", False),
+    'strengths': ("#### ✅ What You're Doing Right (Good/Excellent)", "🟢", False)
+}
 
 def main():
     initialize_session_state()
@@ -68,28 +108,35 @@ def main():
     # Sidebar for user input
     with st.sidebar:
         st.header("📊 Your Financial Profile")
+        live = st.toggle("⚡ Live scoring", help="Re-score as you type; only the score and recommendations redraw")
+        if not live:
+            user_data = profile_inputs()
         
-        # Personal Information
-        st.subheader("Personal Info")
-        age = st.slider("Age", 18, 65, 25)
-        
-        # Income & Expenses
-        st.subheader("Income & Expenses")
-        monthly_income = st.number_input("Monthly Income ($)", min_value=0, value=5000, step=100)
-        monthly_expenses = st.number_input("Monthly Expenses ($)", min_value=0, value=3500, step=100)
-        housing_cost = st.number_input("Monthly Housing Cost ($)", min_value=0, value=1500, step=100)
-        
-        # Savings & Debt
-        st.subheader("Savings & Debt")
-        emergency_savings = st.number_input("Emergency Savings ($)", min_value=0, value=5000, step=500)
-        retirement_savings = st.number_input("Retirement Savings ($)", min_value=0, value=15000, step=1000)
-        monthly_savings = st.number_input("Monthly Savings ($)", min_value=0, value=500, step=50)
-        total_monthly_debt = st.number_input("Monthly Debt Payments ($)", min_value=0, value=800, step=50)
+        # History is keyed by this browser session, or by a name and passphrase the user picks
+        if get_history_store() is not None:
+            st.subheader("History")
+            profile_name = st.text_input("Profile name", help="Use the same name and passphrase to track your progress over time")
+            passphrase = st.text_input("Passphrase", type="password", help="Needed with the name; nobody can see your history without it")
+            if profile_name.strip() and passphrase:
+                st.session_state.user_id = history_key(profile_name.strip(), passphrase)
+            elif profile_name.strip():
+                st.caption("Add a passphrase to keep this profile's history")
         
         # Assessment button
-        analyze_button = st.button("🚀 Analyze My Financial Health", type="primary", use_container_width=True)
+        analyze_button = not live and st.button(
+            "🚀 Analyze My Financial Health", type="primary", use_container_width=True
+        )
     
     # Main content area
+    if live:
+        live_assessment()
+        return
+    if st.session_state.get('live_pending'):
+        try:
+            score_live_input(st.session_state.live_pending)
+        except Exception as e:
+            st.error(f"Error during analysis: {str(e)}")
+        st.session_state.live_pending = None
     if not st.session_state.analysis_done:
         show_welcome_content()
     else:
@@ -98,27 +145,19 @@ def main():
     # Process analysis when button is clicked
     if analyze_button:
         with st.spinner("Analyzing your financial health..."):
-            # Prepare user data
-            user_data = {
-                'age': age,
-                'monthly_income': monthly_income,
-                'monthly_expenses': monthly_expenses,
-                'housing_cost': housing_cost,
-                'emergency_savings': emergency_savings,
-                'retirement_savings': retirement_savings,
-                'monthly_savings': monthly_savings,
-                'total_monthly_debt': total_monthly_debt
-            }
-            
             try:
-                # Initialize and run inference engine
-                engine = WealthWiseInferenceEngine()
-                results = engine.evaluate_financial_health(user_data)
+                # Run the shared inference engine (identical profiles come from cache)
+                results = get_evaluator().evaluate(user_data)
+                
+                # Queued for the background writer; never waits on the disk
+                history = get_history_store()
+                if history is not None:
+                    history.record(st.session_state.user_id, results)
+                get_population_stats().add(results)
                 
                 # Store results in session state
                 st.session_state.results = results
                 st.session_state.user_data = user_data
-                st.session_state.engine = engine
                 st.session_state.analysis_done = True
                 
                 # Rerun to show results
@@ -128,6 +167,78 @@ def main():
                 st.error(f"Error during analysis: {str(e)}")
                 st.info("Please check your input values and try again.")
 
+def profile_inputs(key_prefix=''):
+    """Input widgets for a profile, starting from the last analysed values; returns user_data"""
+    previous = st.session_state.user_data or {}
+    st.subheader("Personal Info")
+    user_data = {'age': st.slider("Age", 18, 65, previous.get('age', 25), key=f"{key_prefix}age")}
+    for field, (label, default, step) in PROFILE_INPUTS.items():
+        if field == 'monthly_income':
+            st.subheader("Income & Expenses")
+        elif field == 'emergency_savings':
+            st.subheader("Savings & Debt")
+        user_data[field] = st.number_input(
+            label, min_value=0, value=previous.get(field, default), step=step, key=f"{key_prefix}{field}"
+        )
+    return user_data
+
+@fragment
+def live_assessment():
+    """Inputs and results that re-score on every change, rerunning only this fragment"""
+    inputs_column, results_column = st.columns([1, 3])
+    with inputs_column:
+        user_data = profile_inputs('live_')
+    
+    previous = st.session_state.results
+    now = time.monotonic()
+    if previous is not None and dict(previous.inputs) == user_data:
+        results = previous
+    elif previous is not None and now - st.session_state.get('live_scored_at', 0.0) < LIVE_DEBOUNCE_SECONDS:
+        # Too soon after the last score: show it and let settle_live_input score the latest inputs
+        results = None
+    else:
+        try:
+            results = score_live_input(user_data)
+        except Exception as e:
+            with results_column:
+                st.error(f"Error during analysis: {str(e)}")
+            return
+    # Scored when live mode is switched off before settle_live_input gets to it
+    st.session_state.live_pending = user_data if results is None else None
+    
+    with results_column:
+        if results is None:
+            settle_live_input()
+            results = previous
+        show_score_cards(results)
+        show_key_metrics(results)
+        show_recommendations(results)
+        st.caption("Turn off live scoring for the full report with projections, comparisons and what-if analysis.")
+
+def score_live_input(user_data):
+    """Score live inputs against the last results and keep them for the full report"""
+    evaluator = get_evaluator()
+    previous = st.session_state.results
+    # Only the categories reading the changed inputs are re-evaluated
+    results = evaluator.evaluate(user_data) if previous is None else evaluator.update(previous, user_data)
+    st.session_state.live_scored_at = time.monotonic()
+    # Kept so switching live mode off shows the full report for these inputs
+    st.session_state.results = results
+    st.session_state.user_data = user_data
+    st.session_state.analysis_done = True
+    return results
+
+@fragment(run_every=LIVE_DEBOUNCE_SECONDS)
+def settle_live_input():
+    """Rerun live scoring once the inputs have had LIVE_DEBOUNCE_SECONDS to settle
+    
+    Only drawn while a change waits to be scored; the rerun scores it, and
+    the timer stops with this fragment, so nothing sleeps or polls when idle.
+    """
+    if time.monotonic() - st.session_state.get('live_scored_at', 0.0) >= LIVE_DEBOUNCE_SECONDS:
+        st.rerun()
+    st.caption("Updating…")
+
 def show_welcome_content():
     """Show welcome content before analysis"""
     col1, col2 = st.columns([2, 1])
@@ -161,8 +272,37 @@ def show_results():
     
     results = st.session_state.results
     user_data = st.session_state.user_data
-    engine = st.session_state.engine
     
+    show_score_cards(results)
+    show_key_metrics(results)
+    
+    # Where this profile stands among everyone analysed so far
+    show_population_ranking(results)
+    
+    show_recommendations(results)
+    
+    # Cheapest input changes reaching the next grade
+    show_next_grade_plans(results)
+    
+    # Monte Carlo projection of retirement savings
+    show_retirement_projection(user_data)
+    
+    # Progress across earlier assessments, when history is enabled
+    show_history_trend()
+    
+    # What-if heatmap over two inputs
+    show_what_if_heatmap(user_data)
+    
+    # New Analysis Button
+    st.markdown("---")
+    if st.button("🔄 Perform New Analysis", use_container_width=True):
+        st.session_state.analysis_done = False
+        st.session_state.results = None
+        st.session_state.user_data = None
+        st.rerun()
+
+def show_score_cards(results):
+    """Score, grade and recommendation counts"""
     # Score and Grade Display
     st.markdown("---")
     st.markdown("## 📈 Your Financial Health Report")
@@ -209,70 +349,221 @@ def show_results():
     # Progress bar for visual score representation
     st.progress(results['final_score'] / 100)
     st.caption(f"Financial Health Progress: {results['final_score']}%")
-    
+
+def show_key_metrics(results):
+    """The four key ratios with a good/high status each"""
     # Financial Metrics Overview
     st.markdown("### 📊 Key Financial Metrics")
     metrics_col1, metrics_col2, metrics_col3, metrics_col4 = st.columns(4)
     
     with metrics_col1:
         debt_ratio = results['metrics']['debt_ratio']
-        status = "✅ Good" if debt_ratio <= 0.36 else "⚠️ High"
+        status = "✅ Good" if metric_on_target('debt_ratio', debt_ratio) else "⚠️ High"
         st.metric("Debt-to-Income Ratio", f"{debt_ratio:.1%}", status)
     
     with metrics_col2:
         savings_rate = results['metrics']['savings_rate']
-        status = "✅ Good" if savings_rate >= 0.10 else "⚠️ Low"
+        status = "✅ Good" if metric_on_target('savings_rate', savings_rate) else "⚠️ Low"
         st.metric("Savings Rate", f"{savings_rate:.1%}", status)
     
     with metrics_col3:
         housing_ratio = results['metrics']['housing_ratio']
-        status = "✅ Good" if housing_ratio <= 0.30 else "⚠️ High"
+        status = "✅ Good" if metric_on_target('housing_ratio', housing_ratio) else "⚠️ High"
         st.metric("Housing Cost %", f"{housing_ratio:.1%}", status)
     
     with metrics_col4:
         coverage = results['metrics']['coverage_months']
-        status = "✅ Good" if coverage >= 3 else "⚠️ Low"
+        status = "✅ Good" if metric_on_target('coverage_months', coverage) else "⚠️ Low"
         st.metric("Emergency Fund", f"{coverage:.1f} months", status)
-    
-    # Recommendations by Priority
+
+def show_recommendations(results):
+    """Recommendation panels grouped by severity"""
     st.markdown("### 🎯 Personalized Recommendations")
+    for group, recommendations in group_recommendations_by_severity(results['recommendations']):
+        if not recommendations:
+            continue
+        heading, icon, expanded = RECOMMENDATION_PANELS[group]
+        st.markdown(heading)
+        for rec in recommendations:
+            with st.expander(f"{icon} {rec['message']}", expanded=expanded):
+                st.write(rec['explanation'])
+                st.caption(f"Impact: {rec['score_impact']:+.1f} points")
+
+# Assessments needed before rankings are shown
+MIN_RANKING_POPULATION = 20
+
+# Metric -> (label, True when a lower value is better)
+RANKED_METRICS = {
+    'debt_ratio': ("Debt-to-income ratio", True),
+    'savings_rate': ("Savings rate", False),
+    'housing_ratio': ("Housing cost share", True),
+    'coverage_months': ("Emergency fund", False)
+}
+
+def show_population_ranking(results):
+    """Score and metric percentiles against every profile analysed so far"""
+    ranking = get_population_stats().ranking(results)
+    if ranking['count'] < MIN_RANKING_POPULATION:
+        return
     
-    # Sort recommendations by priority
-    sorted_recommendations = engine.get_recommendations_by_priority()
+    st.markdown("### 👥 How You Compare")
+    st.caption(f"Compared with {ranking['count']:,} financial health analyses.")
+    st.metric("Your score beats", f"{ranking['score_beats']:.0%} of users")
+    columns = st.columns(len(RANKED_METRICS))
+    for column, (name, (label, lower_is_better)) in zip(columns, RANKED_METRICS.items()):
+        rank = ranking['metrics'].get(name)
+        if rank is None:
+            continue
+        better = 1 - rank if lower_is_better else rank
+        column.metric(label, f"Better than {better:.0%}")
+
+def show_next_grade_plans(results):
+    """The cheapest ways to reach the next grade, each checked by the engine"""
+    from counterfactual import LUMP_SUM_MONTHS, next_grade_plans
     
-    # Display by severity categories
-    critical_high = [r for r in sorted_recommendations if r['severity'] in ['critical', 'high']]
-    medium = [r for r in sorted_recommendations if r['severity'] == 'medium']
-    good_excellent = [r for r in sorted_recommendations if r['severity'] in ['good', 'excellent']]
+    plans = next_grade_plans(get_evaluator().engine, results, k=3)
+    if not plans:
+        return
     
-    if critical_high:
-        st.markdown("#### 🚨 Priority Actions (Critical/High)")
-        for rec in critical_high:
-            with st.expander(f"🔴 {rec['message']}", expanded=True):
-                st.write(rec['explanation'])
-                st.caption(f"Impact: {rec['score_impact']:+.1f} points")
+    st.markdown(f"### 🧭 Fastest Path to {plans[0]['grade']}")
+    st.caption("The smallest changes that lift your grade, cheapest first. "
+               f"One-off amounts are counted as if saved over {LUMP_SUM_MONTHS} months.")
+    for column, (number, plan) in zip(st.columns(len(plans)), enumerate(plans, 1)):
+        with column:
+            st.metric(f"Plan {number}", f"${plan['monthly_cost']:,.0f}/month",
+                      f"{plan['score'] - results['score']:+.1f} points → {plan['grade']}")
+            for step in plan['steps']:
+                st.write(f"{step['action']} (${step['from']:,.0f} → ${step['to']:,.0f})")
+
+def show_retirement_projection(user_data):
+    """Percentile fan of projected retirement savings and the odds of meeting each benchmark"""
+    # Imported here so the first page renders before the charting stack loads
+    import plotly.graph_objects as go
+    from retirement_projection import RETIREMENT_AGE, project
     
-    if medium:
-        st.markdown("#### ⚠️ Areas for Improvement (Medium)")
-        for rec in medium:
-            with st.expander(f"🟡 {rec['message']}"):
-                st.write(rec['explanation'])
-                st.caption(f"Impact: {rec['score_impact']:+.1f} points")
+    if user_data['age'] >= RETIREMENT_AGE:
+        return
+    projection = project(
+        user_data['age'], user_data['retirement_savings'],
+        user_data['monthly_savings'], user_data['monthly_income'] * 12
+    )
     
-    if good_excellent:
-        st.markdown("#### ✅ What You're Doing Right (Good/Excellent)")
-        for rec in good_excellent:
-            with st.expander(f"🟢 {rec['message']}"):
-                st.write(rec['explanation'])
-                st.caption(f"Impact: {rec['score_impact']:+.1f} points")
+    st.markdown("### 🔮 Retirement Projection")
+    st.caption(f"{projection['paths']:,} simulated market scenarios, in today's dollars, "
+               "assuming your monthly savings keep pace with inflation.")
     
-    # New Analysis Button
-    st.markdown("---")
-    if st.button("🔄 Perform New Analysis", use_container_width=True):
-        st.session_state.analysis_done = False
-        st.session_state.results = None
-        st.session_state.user_data = None
-        st.rerun()
+    ages = projection['ages']
+    bands = projection['percentiles']
+    fig = go.Figure()
+    for low, high, color in [(5, 95, "rgba(31,119,180,0.15)"), (25, 75, "rgba(31,119,180,0.3)")]:
+        fig.add_trace(go.Scatter(x=ages, y=bands[high], mode="lines", line=dict(width=0), hoverinfo="skip"))
+        fig.add_trace(go.Scatter(
+            x=ages, y=bands[low], mode="lines", line=dict(width=0), fill="tonexty",
+            fillcolor=color, name=f"{low}th-{high}th percentile", hoverinfo="skip"
+        ))
+    fig.add_trace(go.Scatter(x=ages, y=bands[50], mode="lines", line=dict(color="#1f77b4"), name="Median"))
+    fig.add_trace(go.Scatter(
+        x=[b['age'] for b in projection['benchmarks']], y=[b['target'] for b in projection['benchmarks']],
+        mode="markers", marker=dict(symbol="diamond", size=10, color="black"), name="Benchmark",
+        customdata=[[b['multiplier'], b['probability']] for b in projection['benchmarks']],
+        hovertemplate="Age %{x}: %{customdata[0]}x income ($%{y:,.0f})<br>"
+                      "Chance of reaching it: %{customdata[1]:.0%}<extra></extra>"
+    ))
+    fig.update_layout(
+        xaxis_title="Age", yaxis_title="Retirement Savings ($)", height=400,
+        margin=dict(l=0, r=0, t=10, b=0), showlegend=False
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    columns = st.columns(max(1, len(projection['benchmarks'])))
+    for column, benchmark in zip(columns, projection['benchmarks']):
+        column.metric(f"{benchmark['multiplier']:g}x income by {benchmark['age']}", f"{benchmark['probability']:.0%}")
+
+def show_history_trend():
+    """Score trend and category changes from the assessment history"""
+    history = get_history_store()
+    if history is None:
+        return
+    trend = history.trend(st.session_state.user_id)
+    if trend is None or trend['evaluations'] < 2:
+        return
+    
+    st.markdown("### 📅 Your Progress")
+    col1, col2, col3 = st.columns(3)
+    change = None if trend['previous_score'] is None else trend['last_score'] - trend['previous_score']
+    col1.metric("Assessments", trend['evaluations'])
+    col2.metric("Latest Score", f"{trend['last_score']:.1f}", None if change is None else f"{change:+.1f}")
+    col3.metric("Average Score (recent-weighted)", f"{trend['ema_score']:.1f}")
+    
+    scores = [row['score'] for row in reversed(history.history(st.session_state.user_id, limit=50))]
+    if len(scores) > 1:
+        st.line_chart({'Score': scores}, height=200)
+    
+    changed = [(category, values) for category, values in trend['categories'].items() if values['previous_severity']]
+    for category, values in changed:
+        st.caption(f"{category.replace('_', ' ').title()}: {values['previous_severity']} → "
+                   f"{values['severity']} ({values['changes']} change{'s' if values['changes'] != 1 else ''} so far)")
+
+# Sidebar inputs that can be swept in the what-if heatmap
+WHAT_IF_FIELDS = {
+    'monthly_savings': "Monthly Savings ($)",
+    'total_monthly_debt': "Monthly Debt Payments ($)",
+    'housing_cost': "Monthly Housing Cost ($)",
+    'monthly_expenses': "Monthly Expenses ($)",
+    'monthly_income': "Monthly Income ($)",
+    'emergency_savings': "Emergency Savings ($)",
+    'retirement_savings': "Retirement Savings ($)",
+    'age': "Age"
+}
+
+def what_if_axis(field, user_data, points):
+    """Grid values for one heatmap axis, around the user's current value"""
+    import numpy as np
+    if field == 'age':
+        return np.linspace(18, 65, points)
+    upper = max(2 * user_data[field], user_data['monthly_income'])
+    return np.linspace(0, upper, points)
+
+def show_what_if_heatmap(user_data):
+    """Heatmap of the score over two inputs, computed in one vectorized pass"""
+    # Imported here so the first page renders before the charting stack loads
+    import plotly.graph_objects as go
+    
+    st.markdown("### 🔍 What-If Explorer")
+    st.caption("See how your score would change if two of your numbers were different.")
+    
+    fields = list(WHAT_IF_FIELDS)
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        x_field = st.selectbox("Horizontal axis", fields, index=0, format_func=WHAT_IF_FIELDS.get)
+    with col2:
+        y_options = [f for f in fields if f != x_field]
+        y_field = st.selectbox("Vertical axis", y_options, index=0, format_func=WHAT_IF_FIELDS.get)
+    with col3:
+        points = st.select_slider("Resolution", options=[25, 50, 100, 200], value=100)
+    
+    grid = get_evaluator().engine.evaluate_grid(
+        user_data,
+        x_field, what_if_axis(x_field, user_data, points),
+        y_field, what_if_axis(y_field, user_data, points)
+    )
+    
+    fig = go.Figure(go.Heatmap(
+        x=grid['x_values'], y=grid['y_values'], z=grid['scores'],
+        customdata=grid['grades'], zmin=0, zmax=100, colorscale="RdYlGn",
+        colorbar=dict(title="Score"),
+        hovertemplate=f"{WHAT_IF_FIELDS[x_field]}: %{{x:,.0f}}<br>{WHAT_IF_FIELDS[y_field]}: %{{y:,.0f}}"
+                      "<br>Score: %{z:.0f} (%{customdata})<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=[user_data[x_field]], y=[user_data[y_field]], mode="markers",
+        marker=dict(symbol="x", size=12, color="black"), name="You", hoverinfo="skip"
+    ))
+    fig.update_layout(
+        xaxis_title=WHAT_IF_FIELDS[x_field], yaxis_title=WHAT_IF_FIELDS[y_field],
+        height=450, margin=dict(l=0, r=0, t=10, b=0), showlegend=False
+    )
+    st.plotly_chart(fig, use_container_width=True)
 
 def get_score_color(score):
     """Return color based on score"""
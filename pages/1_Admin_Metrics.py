@@ -0,0 +1,97 @@
+"""
+Admin metrics page for WealthWise AI
+Rule hit counts, condition errors, phase latencies and result cache stats
+"""
+
+import sys
+import os
+
+import pandas as pd
+import streamlit as st
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_resources import ADMIN_TOKEN, get_evaluator, is_admin_token
+from instrumentation import Histogram, render_prometheus
+
+st.set_page_config(page_title="WealthWise AI - Metrics", page_icon="📈", layout="wide")
+
+def rule_label(knowledge_base, category, rule):
+    """Short human-readable name of a rule in the active rule pack"""
+    if rule < 0:
+        return "(no rule matched)"
+    rules = knowledge_base.get(category, {}).get('rules', [])
+    # Counts survive rule pack reloads, so the rule may no longer exist
+    return rules[rule]['condition'] if rule < len(rules) else "(not in the active rule pack)"
+
+def require_admin():
+    """Stop the page unless this session has entered the admin token"""
+    if not ADMIN_TOKEN:
+        st.info("The metrics page is disabled. Set WEALTHWISE_ADMIN_TOKEN to enable it.")
+        st.stop()
+    if not st.session_state.get('admin'):
+        token = st.text_input("Admin token", type="password")
+        if not is_admin_token(token):
+            if token:
+                st.error("Wrong token.")
+            st.stop()
+        st.session_state.admin = True
+
+def main():
+    require_admin()
+    evaluator = get_evaluator()
+    data = evaluator.engine.metrics.snapshot()
+    cache = evaluator.cache.stats()
+    rule_pack = evaluator.engine.rule_pack
+    knowledge_base = rule_pack.knowledge_base
+    
+    st.markdown("## 📈 Engine Metrics")
+    source = rule_pack.source or "built-in rules"
+    st.caption(f"Counts since this server process started. Active rule pack: {rule_pack.version} ({source}).")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Evaluations", f"{data['evaluations']:,}")
+    col2.metric("Condition Errors", f"{sum(data['condition_errors'].values()):,}")
+    col3.metric("Cache Hit Rate", f"{cache['hit_rate']:.1%}", f"{cache['hits']:,} hits / {cache['misses']:,} misses")
+    col4.metric("Cached Results", f"{cache['size']:,} / {cache['maxsize']:,}")
+    
+    st.markdown("### 🎯 Rule Hits")
+    rows = [
+        {'category': category, 'rule': rule, 'condition': rule_label(knowledge_base, category, rule), 'hits': count}
+        for (category, rule), count in sorted(data['rule_matches'].items())
+    ]
+    if rows:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    else:
+        st.info("No evaluations yet.")
+    
+    if data['condition_errors']:
+        st.markdown("### ⚠️ Condition Errors")
+        errors = [
+            {'category': category, 'rule': rule, 'condition': rule_label(knowledge_base, category, rule), 'errors': count}
+            for (category, rule), count in sorted(data['condition_errors'].items())
+        ]
+        st.dataframe(pd.DataFrame(errors), use_container_width=True, hide_index=True)
+    
+    st.markdown("### ⏱️ Phase Latency")
+    phases = []
+    for phase, (counts, total, count) in data['phases'].items():
+        histogram = Histogram()
+        histogram.merge(counts, total, count)
+        phases.append({
+            'phase': phase,
+            'count': histogram.count,
+            'mean (µs)': histogram.total / histogram.count * 1e6 if histogram.count else 0.0,
+            'p50 ≤ (µs)': histogram.quantile(0.5) * 1e6,
+            'p95 ≤ (µs)': histogram.quantile(0.95) * 1e6,
+            'p99 ≤ (µs)': histogram.quantile(0.99) * 1e6
+        })
+    st.dataframe(pd.DataFrame(phases), use_container_width=True, hide_index=True)
+    
+    st.markdown("### 📤 Prometheus Export")
+    text = render_prometheus(evaluator.engine.metrics, cache)
+    st.download_button("Download metrics.txt", text, file_name="metrics.txt", mime="text/plain")
+    with st.expander("Show raw metrics"):
+        st.code(text, language="text")
+
+main()
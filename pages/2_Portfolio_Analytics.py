@@ -0,0 +1,105 @@
+"""
+Portfolio analytics page for WealthWise AI
+Grade distributions, rule hit rates and score summaries over a stored scored population
+"""
+
+import sys
+import os
+
+import streamlit as st
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_resources import get_evaluator
+
+st.set_page_config(page_title="WealthWise AI - Portfolio Analytics", page_icon="🗂️", layout="wide")
+
+# Store written by `python analytics_store.py build`
+ANALYTICS_DIR = os.environ.get('WEALTHWISE_ANALYTICS_DIR', 'analytics')
+
+@st.cache_resource
+def get_dataset(root, signature):
+    """Dataset over the store's files; a new signature means files were added"""
+    from analytics_store import open_dataset
+    return open_dataset(root)
+
+# Query results are cached per store signature and filters, so widgets that do
+# not change the query rerender without touching the files
+@st.cache_data(max_entries=64)
+def score_summary(root, signature, by, filters):
+    from analytics_store import score_summary
+    return score_summary(get_dataset(root, signature), by, **dict(filters))
+
+@st.cache_data(max_entries=64)
+def grade_distribution(root, signature, by, filters):
+    from analytics_store import grade_distribution
+    return grade_distribution(get_dataset(root, signature), by, **dict(filters))
+
+@st.cache_data(max_entries=64)
+def rule_hit_rates(root, signature, category, rules, by, filters):
+    from analytics_store import rule_hit_rates
+    return rule_hit_rates(get_dataset(root, signature), category, rules, by, **dict(filters))
+
+def main():
+    # Imported here so other pages never load pyarrow
+    import plotly.graph_objects as go
+    from analytics_store import GROUP_BY, store_signature
+    from inference_engine import GRADES
+
+    st.markdown("## 🗂️ Portfolio Analytics")
+    # Fixed by the deployment: visitors must not point the page at other paths
+    root = ANALYTICS_DIR
+    if not os.path.isdir(root):
+        st.info(f"No analytics store found. Create one with `python analytics_store.py build profiles.csv {root}`, "
+                f"or set WEALTHWISE_ANALYTICS_DIR.")
+        return
+    signature = store_signature(root)
+
+    st.sidebar.markdown("### Filters")
+    min_age, max_age = st.sidebar.slider("Age", 18, 100, (18, 100))
+    grades = st.sidebar.multiselect("Grades", GRADES)
+    by = st.sidebar.selectbox("Group by", GROUP_BY, format_func=lambda name: name.replace('_', ' ').title())
+    filters = (
+        ('min_age', None if min_age == 18 else min_age),
+        ('max_age', None if max_age == 100 else max_age),
+        ('grades', tuple(grades) or None)
+    )
+
+    summary = score_summary(root, signature, by, filters)
+    profiles = int(summary['profiles'].sum())
+    st.caption(f"{profiles:,} scored profiles in {signature[0]:,} files.")
+    if not profiles:
+        st.warning("No profiles match these filters.")
+        return
+
+    st.markdown("### 📊 Scores and Ratios")
+    st.dataframe(summary.style.format({
+        'profiles': '{:,}', 'mean_final_score': '{:.1f}', 'mean_debt_ratio': '{:.1%}',
+        'mean_savings_rate': '{:.1%}', 'mean_housing_ratio': '{:.1%}', 'mean_coverage_months': '{:.1f}'
+    }), use_container_width=True)
+
+    st.markdown("### 🎓 Grade Distribution")
+    distribution = grade_distribution(root, signature, by, filters)
+    fig = go.Figure(go.Heatmap(
+        z=distribution.to_numpy(), x=list(distribution.columns), y=list(distribution.index),
+        colorscale="Blues", zmin=0, zmax=1, colorbar=dict(title="Share", tickformat=".0%"),
+        hovertemplate="%{y}, grade %{x}: %{z:.1%}<extra></extra>"
+    ))
+    fig.update_layout(height=420, margin=dict(l=0, r=0, t=10, b=0), yaxis=dict(autorange="reversed"))
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("### 🎯 Rule Hit Rates")
+    knowledge_base = get_evaluator().engine.rule_pack.knowledge_base
+    category = st.selectbox("Category", list(knowledge_base),
+                            format_func=lambda name: name.replace('_', ' ').title())
+    rules = knowledge_base[category]['rules']
+    try:
+        rates = rule_hit_rates(root, signature, category, len(rules), by, filters)
+    except ValueError as e:
+        st.warning(f"Cannot match stored rules to the active rule pack: {e}")
+        return
+    rates.columns = [rules[column]['condition'] if column != 'none' else "(no rule matched)" for column in rates.columns]
+    st.dataframe(rates.style.format('{:.1%}', na_rep='-'), use_container_width=True)
+    st.caption("Rules are named from the active rule pack; stored rule indexes refer to the pack that scored each profile.")
+
+main()
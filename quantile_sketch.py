@@ -0,0 +1,333 @@
+"""
+Quantile Sketches for WealthWise AI
+Mergeable, persistable summaries of the score and metric distributions
+
+Scores are whole numbers 0-100 and are counted exactly. Metrics go into
+a DDSketch-style sketch: log-spaced buckets whose quantiles are within a
+fixed relative error, using memory that grows with the value range
+rather than with the number of observations.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+# Metrics ranked against the population in the report
+POPULATION_METRICS = ('debt_ratio', 'savings_rate', 'housing_ratio', 'coverage_months')
+
+# Values at or below this are counted in the sketch's zero bucket
+MIN_VALUE = 1e-9
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch; mergeable when relative_accuracy matches
+
+    Every value v > MIN_VALUE lands in bucket ceil(log_gamma(v)), so any
+    quantile is returned within relative_accuracy. Rank lookups bisect
+    the sorted bucket keys, O(log n) in the number of buckets.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.counts = {}        # bucket key -> count
+        self.zero_count = 0
+        self.count = 0
+        # Sorted keys and running totals, rebuilt on the first lookup after a change
+        self._keys = None
+        self._cumulative = None
+
+    def key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value):
+        """Add one value; NaN and infinite values are ignored"""
+        if not math.isfinite(value):
+            return
+        if value <= MIN_VALUE:
+            self.zero_count += 1
+        else:
+            key = self.key(value)
+            self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self._keys = None
+
+    def add_many(self, values):
+        """Add an array of values in one vectorized pass"""
+        import numpy as np
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        positive = values[values > MIN_VALUE]
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        self._keys = None
+
+    def merge(self, other):
+        """Add the counts of another sketch with the same relative_accuracy"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self._keys = None
+
+    def _build(self):
+        if self._keys is None:
+            keys = sorted(self.counts)
+            cumulative = []
+            total = 0
+            for key in keys:
+                total += self.counts[key]
+                cumulative.append(total)
+            self._keys, self._cumulative = keys, cumulative
+
+    def percentile_rank(self, value):
+        """Share of values below value, counting values in the same bucket as half below"""
+        if not self.count:
+            return None
+        self._build()
+        if value <= MIN_VALUE:
+            below, same = 0, self.zero_count
+        else:
+            key = self.key(value)
+            position = bisect_left(self._keys, key)
+            below = self.zero_count + (self._cumulative[position - 1] if position else 0)
+            same = self.counts.get(key, 0)
+        return (below + same / 2) / self.count
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0..1)"""
+        if not self.count:
+            return None
+        self._build()
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        position = bisect_right(self._cumulative, rank - self.zero_count)
+        key = self._keys[min(position, len(self._keys) - 1)]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'zero_count': self.zero_count,
+            'counts': {str(key): count for key, count in sorted(self.counts.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.counts = {int(key): count for key, count in data['counts'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = sketch.zero_count + sum(sketch.counts.values())
+        return sketch
+
+
+class ScoreHistogram:
+    """Exact counts of whole scores 0-100"""
+
+    def __init__(self):
+        self.counts = [0] * 101
+        self.count = 0
+        self._below = None
+
+    def add(self, score):
+        self.counts[min(100, max(0, int(score)))] += 1
+        self.count += 1
+        self._below = None
+
+    def add_many(self, scores):
+        import numpy as np
+        scores = np.clip(np.asarray(scores, dtype=np.int64), 0, 100)
+        for score, count in enumerate(np.bincount(scores, minlength=101).tolist()):
+            self.counts[score] += count
+        self.count += len(scores)
+        self._below = None
+
+    def merge(self, other):
+        for score, count in enumerate(other.counts):
+            self.counts[score] += count
+        self.count += other.count
+        self._below = None
+
+    def fraction_below(self, score):
+        """Share of scores strictly below score, in O(1) after a change"""
+        if not self.count:
+            return None
+        if self._below is None:
+            below, total = [], 0
+            for count in self.counts:
+                below.append(total)
+                total += count
+            self._below = below
+        return self._below[min(100, max(0, int(score)))] / self.count
+
+    def to_dict(self):
+        return {'counts': list(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = list(data['counts'])
+        histogram.count = sum(histogram.counts)
+        return histogram
+
+
+class PopulationStats:
+    """Score histogram and metric sketches of every profile seen, safe to share across threads
+
+    With a path, existing stats are loaded from it and add() and merge()
+    save at most once per save_interval seconds; save() writes immediately.
+    """
+
+    def __init__(self, path=None, save_interval=30.0, relative_accuracy=0.01):
+        self.path = path
+        self.save_interval = save_interval
+        self.relative_accuracy = relative_accuracy
+        self._lock = threading.Lock()
+        # Held while writing the file; separate so counting never waits on the disk
+        self._save_lock = threading.Lock()
+        self._reset()
+        self._saved_at = time.monotonic()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.merge(json.load(f))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # A damaged file must not keep the app from starting
+                print(f"Ignoring unreadable population stats {path}: {e!r}")
+                with self._lock:
+                    self._reset()
+
+    def _reset(self):
+        self.scores = ScoreHistogram()
+        self.metrics = {name: QuantileSketch(self.relative_accuracy) for name in POPULATION_METRICS}
+
+    @property
+    def count(self):
+        return self.scores.count
+
+    def add(self, assessment):
+        """Count one evaluation result (anything with final_score and metrics)"""
+        with self._lock:
+            self.scores.add(assessment['final_score'])
+            metrics = assessment['metrics']
+            for name, sketch in self.metrics.items():
+                if name in metrics:
+                    sketch.add(metrics[name])
+        self._maybe_save()
+
+    def add_columns(self, final_scores, metric_columns):
+        """Count a scored batch in one pass; metric_columns maps names to arrays"""
+        with self._lock:
+            self.scores.add_many(final_scores)
+            for name, sketch in self.metrics.items():
+                if name in metric_columns:
+                    sketch.add_many(metric_columns[name])
+        self._maybe_save()
+
+    def summary(self, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+        """Count plus score and metric values at the given quantiles"""
+        with self._lock:
+            return {
+                'count': self.scores.count,
+                'score': {q: self._score_quantile(q) for q in quantiles},
+                'metrics': {
+                    name: {q: sketch.quantile(q) for q in quantiles}
+                    for name, sketch in self.metrics.items()
+                }
+            }
+
+    def _score_quantile(self, q):
+        if not self.scores.count:
+            return None
+        rank = q * (self.scores.count - 1)
+        total = 0
+        for score, count in enumerate(self.scores.counts):
+            total += count
+            if total > rank:
+                return score
+
+    def ranking(self, assessment):
+        """Where a result stands: {'count', 'score_beats', 'metrics': {name: percentile rank}}"""
+        with self._lock:
+            metrics = assessment['metrics']
+            return {
+                'count': self.scores.count,
+                'score_beats': self.scores.fraction_below(assessment['final_score']),
+                'metrics': {
+                    name: sketch.percentile_rank(metrics[name])
+                    for name, sketch in self.metrics.items() if name in metrics
+                }
+            }
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'scores': self.scores.to_dict(),
+                'metrics': {name: sketch.to_dict() for name, sketch in self.metrics.items()}
+            }
+
+    def merge(self, data):
+        """Add another PopulationStats, or its to_dict()/drain() output"""
+        if isinstance(data, PopulationStats):
+            data = data.to_dict()
+        with self._lock:
+            self.scores.merge(ScoreHistogram.from_dict(data['scores']))
+            for name, sketch in data['metrics'].items():
+                if name in self.metrics:
+                    self.metrics[name].merge(QuantileSketch.from_dict(sketch))
+        self._maybe_save()
+
+    def drain(self):
+        """Return to_dict() and reset, e.g. to ship a worker's counts to its parent"""
+        with self._lock:
+            data = {
+                'scores': self.scores.to_dict(),
+                'metrics': {name: sketch.to_dict() for name, sketch in self.metrics.items()}
+            }
+            self._reset()
+        return data
+
+    def save(self, path=None):
+        """Write the stats as JSON, atomically"""
+        with self._save_lock:
+            self._save(path or self.path)
+
+    def _save(self, path):
+        data = self.to_dict()
+        # A unique temp file per write, so concurrent saves never share one
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), prefix=f"{os.path.basename(path)}.", suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._saved_at = time.monotonic()
+
+    def _maybe_save(self):
+        if not self.path or time.monotonic() - self._saved_at < self.save_interval:
+            return
+        # Another thread already saving covers this one
+        if not self._save_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self._save(self.path)
+        except OSError as e:
+            print(f"Could not save population stats to {self.path}: {e}")
+        finally:
+            self._save_lock.release()
@@ -0,0 +1,338 @@
+"""
+Traffic Replay for WealthWise AI
+Load-test the scoring path by replaying recorded profile requests
+
+A recording is JSONL with one request per line:
+
+    {"ts": 1760000000.25, "profile": {"age": 35, "monthly_income": 5000, ...}}
+
+ts is in seconds (any epoch; only the gaps matter). Requests are sent
+open-loop on the recorded schedule, sped up by --speed, or at a fixed
+--rate, so a slow target builds a queue instead of slowing the load.
+Latency is measured from each request's scheduled time and includes that
+queueing.
+
+Targets:
+    engine          WealthWiseInferenceEngine.evaluate in this process
+    cached          the same behind a CachedEvaluator, as the Streamlit app uses it
+    http://host:port
+                    POST /score on a running scoring_service.py
+
+The in-process targets share one interpreter, so --concurrency there
+overlaps requests without adding CPU; use the HTTP target with service
+workers to measure a deployment's capacity.
+
+Usage:
+    python replay.py synthesize traffic.jsonl -n 20000 --rate 200 --repeat 0.3
+    python replay.py run traffic.jsonl --target cached --speed 10
+    python replay.py run traffic.jsonl --target http://127.0.0.1:8080 --rate 500 -j 16 -o run.json
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from cli import to_profile
+from quantile_sketch import QuantileSketch
+from result_cache import CachedEvaluator
+
+# Latency percentiles reported, in the order printed
+PERCENTILES = (0.5, 0.95, 0.99)
+
+# Requests queued for the workers beyond the ones in flight, per worker
+QUEUED_PER_WORKER = 64
+
+
+def read_traffic(path):
+    """Yield (ts, profile) pairs of a recording; ts is None on lines without one"""
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON: {e}") from None
+            if not isinstance(record, dict) or not isinstance(record.get('profile'), dict):
+                raise ValueError(f"{path}:{line_number}: expected {{\"ts\": ..., \"profile\": {{...}}}}")
+            yield record.get('ts'), record['profile']
+
+
+def synthesize(path, n, rate, repeat=0.0, seed=0):
+    """Write a recording of n generated profiles arriving as a Poisson process at rate/s
+
+    A repeat share of the requests resends a profile seen earlier, as
+    returning users do, so cached targets see a realistic hit rate.
+    """
+    from profile_generator import iter_profiles
+    rng = random.Random(seed)
+    ts = time.time()
+    seen = []
+    profiles = iter_profiles(n, seed=seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(n):
+            if seen and rng.random() < repeat:
+                profile = rng.choice(seen)
+            else:
+                profile = {field: float(value) for field, value in next(profiles).items()}
+                seen.append(profile)
+            f.write(json.dumps({'ts': round(ts, 6), 'profile': profile}) + '\n')
+            ts += rng.expovariate(rate)
+
+
+def schedule(traffic, speed=1.0, rate=None):
+    """Yield (offset in seconds from the start, profile) for each request
+
+    rate overrides the recorded timestamps with a fixed rate. With speed
+    0 the offset is None: requests go out as fast as the target takes
+    them, closed-loop, and latency is timed from when each one is sent.
+    """
+    first = None
+    for index, (ts, profile) in enumerate(traffic):
+        if rate:
+            yield index / rate, profile
+        elif not speed:
+            yield None, profile
+        else:
+            if ts is None:
+                raise ValueError("recording has lines without ts; replay it with --rate")
+            first = ts if first is None else first
+            yield (ts - first) / speed, profile
+
+
+class EngineTarget:
+    """Scores in this process, through a CachedEvaluator when cached is set"""
+
+    def __init__(self, cached=False):
+        from inference_engine import WealthWiseInferenceEngine
+        engine = WealthWiseInferenceEngine()
+        self.evaluator = CachedEvaluator(engine, maxsize=4096) if cached else None
+        self.evaluate = self.evaluator.evaluate if cached else engine.evaluate
+        self.name = 'cached' if cached else 'engine'
+
+    def send(self, profile):
+        self.evaluate(to_profile(profile))
+
+    def cache_stats(self):
+        return self.evaluator.cache.stats() if self.evaluator else None
+
+    def close(self):
+        pass
+
+
+class HTTPTarget:
+    """POSTs to /score over one keep-alive connection per thread"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.name = url
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def send(self, profile):
+        connection = self._connection()
+        try:
+            connection.request('POST', '/score', body=json.dumps(profile),
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request
+            connection.close()
+            self._local.connection = None
+            raise
+        if response.status >= 400:
+            raise RuntimeError(f"HTTP {response.status}: {body[:200].decode('utf-8', 'replace')}")
+
+    def cache_stats(self):
+        """Result cache counters from /metrics, when the service exposes them"""
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=10)
+        try:
+            connection.request('GET', '/metrics')
+            text = connection.getresponse().read().decode('utf-8')
+        except (OSError, http.client.HTTPException):
+            return None
+        finally:
+            connection.close()
+        counts = {}
+        for line in text.splitlines():
+            if line.startswith('wealthwise_result_cache_lookups_total{'):
+                outcome = line.split('result="', 1)[1].split('"', 1)[0]
+                counts[outcome] = float(line.rsplit(' ', 1)[1])
+        if not counts:
+            return None
+        hits, misses = counts.get('hit', 0.0), counts.get('miss', 0.0)
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+
+
+def make_target(target):
+    if target in ('engine', 'cached'):
+        return EngineTarget(cached=target == 'cached')
+    if target.startswith('http://'):
+        return HTTPTarget(target)
+    raise ValueError(f"Unknown target {target!r}; expected engine, cached or http://host:port")
+
+
+def replay(target, requests, concurrency=8, progress=None):
+    """Send scheduled (offset, profile) requests to target; returns the run's statistics
+
+    progress, if given, is called about once a second with the counts so far.
+    """
+    latencies = QuantileSketch(relative_accuracy=0.005)
+    lock = threading.Lock()
+    counts = {'sent': 0, 'completed': 0, 'errors': 0}
+    error_samples = []
+    queued = threading.BoundedSemaphore(concurrency * (1 + QUEUED_PER_WORKER))
+    # Closed-loop runs never queue, so latency is the target's alone
+    closed_loop = threading.BoundedSemaphore(concurrency)
+    cache_before = target.cache_stats()
+
+    def send(scheduled, profile, slot):
+        if scheduled is None:
+            scheduled = time.perf_counter()
+        try:
+            target.send(profile)
+            failed = None
+        except Exception as e:
+            failed = f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - scheduled
+        with lock:
+            counts['completed'] += 1
+            if failed is None:
+                latencies.add(latency)
+            else:
+                counts['errors'] += 1
+                if len(error_samples) < 5:
+                    error_samples.append(failed)
+        slot.release()
+
+    start = time.perf_counter()
+    reported = start
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for offset, profile in requests:
+            scheduled = None if offset is None else start + offset
+            delay = 0 if offset is None else scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            slot = closed_loop if offset is None else queued
+            slot.acquire()
+            pool.submit(send, scheduled, profile, slot)
+            counts['sent'] += 1
+            now = time.perf_counter()
+            if progress is not None and now - reported >= 1.0:
+                reported = now
+                with lock:
+                    progress(dict(counts), now - start)
+    elapsed = time.perf_counter() - start
+
+    cache = target.cache_stats() if cache_before is not None else None
+    if cache is not None:
+        hits = cache['hits'] - cache_before['hits']
+        lookups = hits + cache['misses'] - cache_before['misses']
+        cache = {'hits': hits, 'lookups': lookups, 'hit_rate': hits / lookups if lookups else 0.0}
+    succeeded = counts['completed'] - counts['errors']
+    return {
+        'target': target.name,
+        'requests': counts['completed'],
+        'errors': counts['errors'],
+        'error_rate': counts['errors'] / counts['completed'] if counts['completed'] else 0.0,
+        'elapsed_seconds': elapsed,
+        'throughput': succeeded / elapsed if elapsed > 0 else 0.0,
+        'latency_ms': {f"p{round(q * 100)}": (latencies.quantile(q) or 0.0) * 1000 for q in PERCENTILES},
+        'cache': cache,
+        'error_samples': error_samples
+    }
+
+
+def print_report(report, file=sys.stdout):
+    latency = ', '.join(f"{name} {value:.2f}ms" for name, value in report['latency_ms'].items())
+    print(f"Target:      {report['target']}", file=file)
+    print(f"Requests:    {report['requests']:,} in {report['elapsed_seconds']:.2f}s - "
+          f"{report['throughput']:,.0f} ok/s", file=file)
+    print(f"Latency:     {latency}", file=file)
+    print(f"Errors:      {report['errors']:,} ({report['error_rate']:.2%})", file=file)
+    if report['cache'] is not None:
+        print(f"Cache hits:  {report['cache']['hit_rate']:.1%} of {report['cache']['lookups']:,} lookups", file=file)
+    else:
+        print("Cache hits:  n/a (target has no result cache)", file=file)
+    for sample in report['error_samples']:
+        print(f"  e.g. {sample}", file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded WealthWise AI traffic against the scoring path")
+    commands = parser.add_subparsers(dest='command', required=True)
+    synthesize_command = commands.add_parser('synthesize', help="write a synthetic recording")
+    synthesize_command.add_argument('output', help="recording to write (JSONL)")
+    synthesize_command.add_argument('-n', '--requests', type=int, default=10000)
+    synthesize_command.add_argument('--rate', type=float, default=100.0, help="mean requests per second (default: 100)")
+    synthesize_command.add_argument('--repeat', type=float, default=0.0,
+                                    help="share of requests repeating an earlier profile (default: 0)")
+    synthesize_command.add_argument('--seed', type=int, default=0)
+    run_command = commands.add_parser('run', help="replay a recording")
+    run_command.add_argument('recording', help="recording to replay (JSONL)")
+    run_command.add_argument('-t', '--target', default='engine', help="engine, cached or http://host:port (default: engine)")
+    run_command.add_argument('-s', '--speed', type=float, default=1.0,
+                             help="time compression: 10 replays ten times faster; 0 as fast as possible (default: 1)")
+    run_command.add_argument('--rate', type=float, help="ignore timestamps and send this many requests per second")
+    run_command.add_argument('-j', '--concurrency', type=int, default=8, help="requests in flight (default: 8)")
+    run_command.add_argument('-o', '--output', help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.command == 'synthesize':
+        if args.rate <= 0 or not 0 <= args.repeat < 1:
+            parser.error("--rate must be positive and --repeat in [0, 1)")
+        synthesize(args.output, args.requests, args.rate, args.repeat, args.seed)
+        print(f"Wrote {args.requests:,} requests to {args.output}", file=sys.stderr)
+        return
+
+    if args.speed < 0 or (args.rate is not None and args.rate <= 0) or args.concurrency < 1:
+        parser.error("--speed must be >= 0, --rate positive and --concurrency at least 1")
+    try:
+        target = make_target(args.target)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def progress(counts, elapsed):
+        print(f"\r{counts['sent']:,} sent, {counts['completed']:,} done, {counts['errors']:,} errors "
+              f"in {elapsed:.0f}s", end='', file=sys.stderr, flush=True)
+
+    try:
+        report = replay(target, schedule(read_traffic(args.recording), args.speed, args.rate),
+                        args.concurrency, progress)
+    except (OSError, ValueError) as e:
+        print(f"\nCannot replay {args.recording}: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        target.close()
+    print(file=sys.stderr)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Report Generator for WealthWise AI
+Printable HTML (or PDF) client reports rendered in parallel from scored records
+
+Reads the JSONL written by cli.py, or scores a CSV/JSONL of profiles
+itself with --score, and writes one report per record to a directory or
+a zip archive. Records are rendered in chunks by a process pool with a
+bounded number of chunks in flight, so memory stays flat however many
+reports are written.
+
+Usage:
+    python cli.py profiles.csv -o scored.jsonl && python report_generator.py scored.jsonl -o reports/
+    python report_generator.py profiles.csv --score -o reports.zip
+    python report_generator.py scored.jsonl --pdf -o reports/      # needs weasyprint
+"""
+
+import argparse
+import html
+import importlib.util
+import json
+import os
+import re
+import string
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from cli import detect_format, iter_chunks, read_records, score_record
+from inference_engine import WealthWiseInferenceEngine, group_recommendations_by_severity
+from knowledge_base import metric_on_target
+
+# Report templates: string.Template sources, compiled once per process
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>WealthWise AI - Financial Health Report $client</title>
+<style>
+body { font-family: Helvetica, Arial, sans-serif; color: #262730; max-width: 800px; margin: 2rem auto; }
+h1 { color: #1f77b4; text-align: center; }
+.cards, .metrics { display: flex; gap: 1rem; margin: 1rem 0; }
+.card, .metric { flex: 1; background: #f0f2f6; border-radius: 10px; padding: 1rem; text-align: center; }
+.card h2 { margin: 0.25rem 0; font-size: 2rem; }
+.metric .value { font-size: 1.4rem; font-weight: bold; }
+.good { color: #2e7d32; } .fair { color: #ffa726; } .poor { color: #ef5350; }
+.recommendation { border-left: 4px solid #ccc; padding: 0.25rem 0.75rem; margin: 0.5rem 0; page-break-inside: avoid; }
+.recommendation.priority { border-color: #ff4b4b; } .recommendation.improve { border-color: #ffa726; }
+.recommendation.strengths { border-color: #66bb6a; }
+.impact { color: #808495; font-size: 0.85rem; }
+footer { color: #808495; font-size: 0.8rem; margin-top: 2rem; }
+</style>
+</head>
+<body>
+<h1>💰 WealthWise AI</h1>
+<h2>Financial Health Report $client</h2>
+<div class="cards">
+<div class="card"><h3>Overall Score</h3><h2 class="$score_class">$final_score/100</h2></div>
+<div class="card"><h3>Grade</h3><h2 class="$grade_class">$grade</h2></div>
+<div class="card"><h3>Priority Actions</h3><h2>$priority_count</h2></div>
+<div class="card"><h3>Total Recommendations</h3><h2>$recommendation_count</h2></div>
+</div>
+<h3>📊 Key Financial Metrics</h3>
+<div class="metrics">$metrics</div>
+<h3>🎯 Personalized Recommendations</h3>
+$recommendations
+<footer>Rule pack $rule_pack_version. Based on established financial planning principles; for educational purposes.</footer>
+</body>
+</html>
+"""
+
+METRIC_TEMPLATE = """<div class="metric"><div>$label</div><div class="value">$value</div><div class="$status_class">$status</div></div>"""
+
+GROUP_TEMPLATE = """<h4>$heading</h4>
+$items
+"""
+
+RECOMMENDATION_TEMPLATE = """<div class="recommendation $group"><strong>$message</strong><p>$explanation</p><div class="impact">Impact: $impact points</div></div>"""
+
+# Headline metrics: name -> (label, format, status when off target)
+METRIC_PANEL = {
+    'debt_ratio': ("Debt-to-Income Ratio", "{:.1%}", "⚠️ High"),
+    'savings_rate': ("Savings Rate", "{:.1%}", "⚠️ Low"),
+    'housing_ratio': ("Housing Cost %", "{:.1%}", "⚠️ High"),
+    'coverage_months': ("Emergency Fund", "{:.1f} months", "⚠️ Low")
+}
+
+GROUP_HEADINGS = {
+    'priority': "🚨 Priority Actions (Critical/High)",
+    'improve': "⚠️ Areas for Improvement (Medium)",
+    'strengths': "✅ What You're Doing Right (Good/Excellent)"
+}
+
+# Fields of a scored record (cli.py output) that a report is rendered from
+REPORT_FIELDS = ('final_score', 'grade', 'metrics', 'recommendations')
+
+# Replaced in report file names, which come from client_id when records have one
+UNSAFE_NAME_CHARACTERS = re.compile(r'[^A-Za-z0-9._-]')
+
+# Chunks in flight per worker while rendering
+CHUNKS_PER_WORKER = 2
+
+
+class CompiledHTMLTemplate:
+    """A string.Template split once into literals and placeholder names
+
+    Rendering is a single join; values are HTML-escaped unless passed in
+    raw, which holds fragments that were rendered from templates already.
+    """
+
+    __slots__ = ('parts',)
+
+    def __init__(self, source):
+        self.parts = []
+        position = 0
+        for match in string.Template.pattern.finditer(source):
+            self.parts.append(source[position:match.start()])
+            if match.group('escaped') is not None:
+                self.parts.append('$')
+            elif match.group('invalid') is not None:
+                raise ValueError(f"Invalid placeholder in template at offset {match.start()}")
+            else:
+                self.parts.append((match.group('named') or match.group('braced'),))
+            position = match.end()
+        self.parts.append(source[position:])
+
+    def render(self, values, raw=()):
+        return ''.join(
+            part if isinstance(part, str)
+            else (values[part[0]] if part[0] in raw else html.escape(str(values[part[0]])))
+            for part in self.parts
+        )
+
+
+@lru_cache(maxsize=None)
+def load_templates(template_dir=None):
+    """Compiled (report, metric, group, recommendation) templates
+
+    Files report.html, metric.html, group.html and recommendation.html in
+    template_dir replace the built-in templates of the same name.
+    """
+    sources = []
+    for name, builtin in (('report', REPORT_TEMPLATE), ('metric', METRIC_TEMPLATE),
+                          ('group', GROUP_TEMPLATE), ('recommendation', RECOMMENDATION_TEMPLATE)):
+        path = os.path.join(template_dir, f"{name}.html") if template_dir else None
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                builtin = f.read()
+        sources.append(CompiledHTMLTemplate(builtin))
+    return tuple(sources)
+
+
+def _grade_class(grade):
+    if grade.startswith('A'):
+        return 'good'
+    return 'fair' if grade.startswith('B') else 'poor'
+
+
+def render_report(result, client=None, template_dir=None):
+    """HTML report of one scored record (a score_record result or an Assessment dict)"""
+    report, metric, group, recommendation = load_templates(template_dir)
+    score = result['final_score']
+    metrics = ''.join(
+        metric.render({
+            'label': label,
+            'value': value_format.format(result['metrics'][name]),
+            'status_class': 'good' if metric_on_target(name, result['metrics'][name]) else 'poor',
+            'status': "✅ Good" if metric_on_target(name, result['metrics'][name]) else off_target
+        })
+        for name, (label, value_format, off_target) in METRIC_PANEL.items()
+    )
+    groups = ''.join(
+        group.render({
+            'heading': GROUP_HEADINGS[name],
+            'items': ''.join(
+                recommendation.render({
+                    'group': name, 'message': rec['message'], 'explanation': rec['explanation'],
+                    'impact': f"{rec['score_impact']:+.1f}"
+                })
+                for rec in recommendations
+            )
+        }, raw=('items',))
+        for name, recommendations in group_recommendations_by_severity(result['recommendations'])
+        if recommendations
+    )
+    return report.render({
+        'client': '' if client is None else f"— {client}",
+        'final_score': score,
+        'score_class': 'good' if score >= 80 else 'fair' if score >= 60 else 'poor',
+        'grade': result['grade'],
+        'grade_class': _grade_class(result['grade']),
+        'priority_count': sum(rec['severity'] in ('critical', 'high') for rec in result['recommendations']),
+        'recommendation_count': len(result['recommendations']),
+        'metrics': metrics,
+        'recommendations': groups,
+        'rule_pack_version': result.get('rule_pack_version', '')
+    }, raw=('metrics', 'recommendations'))
+
+
+# Worker state, set by the pool initializer
+_worker_options = {}
+
+
+def _init_worker(score=False, pdf=False, template_dir=None):
+    _worker_options.update(score=score, pdf=pdf, template_dir=template_dir)
+    if score:
+        _worker_options['engine'] = WealthWiseInferenceEngine()
+    load_templates(template_dir)
+
+
+def _missing_fields(record):
+    """What a record lacks to be rendered, or None when it has everything"""
+    if not isinstance(record, dict):
+        return "record is not an object"
+    missing = [field for field in REPORT_FIELDS if field not in record]
+    if missing:
+        return f"missing fields: {', '.join(missing)} (score profiles with --score)"
+    if not isinstance(record['metrics'], dict) or any(name not in record['metrics'] for name in METRIC_PANEL):
+        return f"metrics must include {', '.join(METRIC_PANEL)}"
+    if not isinstance(record['recommendations'], list):
+        return "recommendations must be a list"
+    return None
+
+
+def render_chunk(chunk):
+    """Render a chunk of (row_number, record) pairs into (row, file name, bytes, error) tuples"""
+    rendered = []
+    for row_number, record in chunk:
+        client = record.get('client_id') if isinstance(record, dict) else None
+        if _worker_options.get('score'):
+            record = score_record(_worker_options['engine'], row_number, record)
+        elif isinstance(record, Exception):
+            record = {'row': row_number, 'error': str(record)}
+        row = record.get('row', row_number) if isinstance(record, dict) else row_number
+        error = record['error'] if isinstance(record, dict) and 'error' in record else _missing_fields(record)
+        if error is not None:
+            rendered.append((row, None, None, f"row {row}: {error}"))
+            continue
+        if client in (None, ''):
+            client = row
+        name = f"report-{UNSAFE_NAME_CHARACTERS.sub('_', str(client))}"
+        try:
+            text = render_report(record, client, _worker_options.get('template_dir'))
+        except (KeyError, TypeError, ValueError) as e:
+            rendered.append((row, None, None, f"row {row}: cannot render: {type(e).__name__}: {e}"))
+            continue
+        if _worker_options.get('pdf'):
+            from weasyprint import HTML
+            rendered.append((row, f"{name}.pdf", HTML(string=text).write_pdf(), None))
+        else:
+            rendered.append((row, f"{name}.html", text.encode('utf-8'), None))
+    return rendered
+
+
+class ReportWriter:
+    """Writes reports into a directory, or a zip archive when the path ends in .zip"""
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = None
+        # Every name written, so colliding client ids never overwrite a report
+        self.names = set()
+        if path.endswith('.zip'):
+            self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, name, data, row=None):
+        """Write one report; a name already written gets the row number appended
+
+        Returns the name used.
+        """
+        if name in self.names:
+            stem, extension = os.path.splitext(name)
+            name = f"{stem}-row{row}{extension}"
+            suffix = 2
+            while name in self.names:
+                name = f"{stem}-row{row}-{suffix}{extension}"
+                suffix += 1
+        self.names.add(name)
+        if self.archive is not None:
+            self.archive.writestr(name, data)
+        else:
+            with open(os.path.join(self.path, name), 'wb') as f:
+                f.write(data)
+        return name
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+
+def generate_reports(records, writer, workers, chunk_size, score=False, pdf=False, template_dir=None, progress=None):
+    """Render records into writer; returns (reports written, errors)
+
+    progress, if given, is called with (reports written, errors) after
+    every chunk.
+    """
+    written = errors = 0
+
+    def write(rendered):
+        nonlocal written, errors
+        for row, name, data, error in rendered:
+            if error is not None:
+                errors += 1
+                print(f"Skipped {error}", file=sys.stderr)
+                continue
+            writer.write(name, data, row)
+            written += 1
+        if progress is not None:
+            progress(written, errors)
+
+    initargs = (score, pdf, template_dir)
+    chunks = iter_chunks(records, chunk_size)
+    if workers <= 1:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            write(render_chunk(chunk))
+        return written, errors
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(render_chunk, chunk))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return written, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render WealthWise AI client reports")
+    parser.add_argument('input', nargs='?', default='-', help="scored JSONL from cli.py, or - for stdin (default)")
+    parser.add_argument('-o', '--output', required=True, help="output directory, or a .zip archive")
+    parser.add_argument('-f', '--format', choices=['csv', 'jsonl'], help="input format (default: from extension, else jsonl)")
+    parser.add_argument('--score', action='store_true', help="input holds profiles to score first")
+    parser.add_argument('--pdf', action='store_true', help="write PDF instead of HTML (needs weasyprint)")
+    parser.add_argument('--template-dir', help="directory with report/metric/group/recommendation.html overrides")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument('-c', '--chunk-size', type=int, default=200, help="reports per chunk sent to a worker (default: 200)")
+    args = parser.parse_args(argv)
+
+    if args.pdf and importlib.util.find_spec('weasyprint') is None:
+        parser.error("--pdf needs weasyprint (pip install weasyprint)")
+    if args.template_dir:
+        try:
+            load_templates(args.template_dir)
+        except (OSError, ValueError) as e:
+            parser.error(f"invalid templates: {e}")
+
+    # Scored input is always JSONL; profiles to score may also be CSV
+    fmt = detect_format(args.input, args.format) if args.score else 'jsonl'
+    source = sys.stdin if args.input == '-' else open(args.input, newline='' if fmt == 'csv' else None, encoding='utf-8')
+    start = time.perf_counter()
+    last_report = [start]
+
+    def progress(written, errors):
+        now = time.perf_counter()
+        if now - last_report[0] >= 1.0:
+            last_report[0] = now
+            print(f"\r{written:,} reports ({errors} skipped), {written / (now - start):,.0f}/s",
+                  end='', file=sys.stderr, flush=True)
+
+    writer = ReportWriter(args.output)
+    try:
+        written, errors = generate_reports(
+            read_records(source, fmt), writer, args.workers, max(1, args.chunk_size),
+            args.score, args.pdf, args.template_dir, progress
+        )
+    finally:
+        writer.close()
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else 0.0
+    print(f"\rWrote {written:,} reports ({errors} skipped) to {args.output} in {elapsed:.2f}s - {rate:,.0f}/s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Result Cache for WealthWise AI
+Bounded LRU cache of evaluation results keyed by the normalized profile
+"""
+
+import threading
+from collections import OrderedDict
+
+from inference_engine import INPUT_FIELDS
+
+
+def normalize_profile(user_data):
+    """Return the input fields as numbers, with whole floats collapsed to ints"""
+    profile = {}
+    for field in INPUT_FIELDS:
+        value = float(user_data[field])
+        profile[field] = int(value) if value.is_integer() else value
+    return profile
+
+
+def profile_key(profile):
+    """Hashable cache key of a normalized profile"""
+    return tuple(profile[field] for field in INPUT_FIELDS)
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a size limit and hit/miss counters"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss"""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize
+            }
+
+
+class CachedEvaluator:
+    """Shared engine front-end that answers repeated profiles from a ResultCache"""
+
+    def __init__(self, engine, maxsize=1024):
+        self.engine = engine
+        self.cache = ResultCache(maxsize)
+
+    def evaluate(self, user_data):
+        """Evaluate a profile, reusing the cached result for identical inputs"""
+        profile = normalize_profile(user_data)
+        key = profile_key(profile)
+
+        # Results are only reused while the rule pack that produced them is active
+        hit, results = self.cache.get((self.engine.rule_pack.version, key))
+        if hit:
+            return results
+
+        # Assessments are immutable, so one instance can be shared by every session
+        results = self.engine.evaluate(profile)
+        self.cache.put((results.rule_pack_version, key), results)
+        return results
+
+    def update(self, previous_result, user_data):
+        """Evaluate a profile that differs from previous_result in a few inputs
+
+        Uses the cached result when there is one, else the engine's
+        incremental update(), which re-runs only the affected categories.
+        """
+        profile = normalize_profile(user_data)
+        key = profile_key(profile)
+        hit, results = self.cache.get((self.engine.rule_pack.version, key))
+        if hit:
+            return results
+
+        results = self.engine.update(previous_result, profile)
+        self.cache.put((results.rule_pack_version, key), results)
+        return results
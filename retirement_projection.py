@@ -0,0 +1,167 @@
+"""
+Retirement Projection for WealthWise AI
+Seeded Monte Carlo simulation of retirement savings over many market paths at once
+
+Every projection with the same seed and path count uses the same market
+paths (common random numbers), so results are reproducible and two
+profiles, or two what-if variants of one profile, differ only by their
+inputs and never by sampling noise.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from knowledge_base import RETIREMENT_AGE_BRACKETS, get_retirement_benchmark
+
+RETIREMENT_AGE = 65
+MIN_AGE = 18
+MAX_YEARS = RETIREMENT_AGE - MIN_AGE
+
+# Annual market assumptions: lognormal nominal returns, normal inflation
+RETURN_MEAN = 0.07
+RETURN_VOLATILITY = 0.15
+INFLATION_MEAN = 0.025
+INFLATION_VOLATILITY = 0.01
+
+DEFAULT_SEED = 2024
+DEFAULT_PATHS = 10000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Ages at which savings are checked against get_retirement_benchmark
+BENCHMARK_AGES = tuple(RETIREMENT_AGE_BRACKETS) + (RETIREMENT_AGE,)
+
+# Cells (profiles x paths) held at once by the chunked batch mode
+CHUNK_CELLS = 2_000_000
+
+
+@lru_cache(maxsize=8)
+def growth_factors(paths=DEFAULT_PATHS, seed=DEFAULT_SEED, years=MAX_YEARS):
+    """Per-path growth (A) and contribution (B) factors, each shaped (years + 1, paths)
+
+    With real growth g_t and a contribution C at the end of every year,
+    savings after t years are S0 * A[t] + C * B[t]. Neither factor
+    depends on the profile, so each is computed once and shared.
+    """
+    rng = np.random.default_rng(seed)
+    log_mean = np.log1p(RETURN_MEAN) - RETURN_VOLATILITY ** 2 / 2
+    nominal = np.exp(rng.normal(log_mean, RETURN_VOLATILITY, (years, paths)))
+    inflation = rng.normal(INFLATION_MEAN, INFLATION_VOLATILITY, (years, paths))
+    real_growth = nominal / (1 + inflation)
+
+    growth = np.empty((years + 1, paths))
+    contributions = np.empty((years + 1, paths))
+    growth[0] = 1.0
+    contributions[0] = 0.0
+    for year in range(years):
+        growth[year + 1] = growth[year] * real_growth[year]
+        contributions[year + 1] = contributions[year] * real_growth[year] + 1.0
+    growth.flags.writeable = False
+    contributions.flags.writeable = False
+    return growth, contributions
+
+
+def years_to_retirement(age):
+    """Whole simulated years until RETIREMENT_AGE (0 once reached)"""
+    return int(max(0, min(MAX_YEARS, RETIREMENT_AGE - age)))
+
+
+def retirement_target(annual_income, age=RETIREMENT_AGE):
+    """Savings the age benchmark asks for, in today's dollars"""
+    return get_retirement_benchmark(age) * annual_income
+
+
+def project(age, retirement_savings, monthly_savings, annual_income, paths=DEFAULT_PATHS, seed=DEFAULT_SEED):
+    """Simulate savings from age to RETIREMENT_AGE over `paths` market paths
+
+    Amounts are in today's dollars and monthly_savings is assumed to keep
+    pace with inflation. Returns the ages, a percentile fan of savings per
+    age, the probability of meeting each remaining age benchmark, and the
+    probability of meeting the benchmark at retirement.
+    """
+    growth, contributions = growth_factors(paths, seed)
+    years = years_to_retirement(age)
+    savings = retirement_savings * growth[:years + 1] + (12 * monthly_savings) * contributions[:years + 1]
+
+    benchmarks = []
+    for benchmark_age in BENCHMARK_AGES:
+        year = benchmark_age - age
+        if 0 <= year <= years:
+            target = retirement_target(annual_income, benchmark_age)
+            benchmarks.append({
+                'age': benchmark_age,
+                'multiplier': get_retirement_benchmark(benchmark_age),
+                'target': target,
+                'probability': float(np.mean(savings[int(year)] >= target))
+            })
+
+    return {
+        'ages': age + np.arange(years + 1),
+        'percentiles': dict(zip(PERCENTILES, np.percentile(savings, PERCENTILES, axis=1))),
+        'benchmarks': benchmarks,
+        'success_probability': float(np.mean(savings[years] >= retirement_target(annual_income))),
+        'paths': paths,
+        'seed': seed
+    }
+
+
+def success_probability(age, retirement_savings, monthly_savings, annual_income, paths=DEFAULT_PATHS, seed=DEFAULT_SEED):
+    """Share of paths reaching the retirement benchmark by RETIREMENT_AGE"""
+    growth, contributions = growth_factors(paths, seed)
+    years = years_to_retirement(age)
+    savings = retirement_savings * growth[years] + (12 * monthly_savings) * contributions[years]
+    return float(np.mean(savings >= retirement_target(annual_income)))
+
+
+def success_threshold(age, retirement_savings, monthly_savings, annual_income, probability, solve_for,
+                      paths=DEFAULT_PATHS, seed=DEFAULT_SEED):
+    """Smallest retirement_savings or monthly_savings (solve_for) giving at least `probability`
+
+    Path i succeeds once the solved input reaches (target - other term) /
+    its factor, so the answer is the matching order statistic of those
+    per-path requirements. Returns inf when no amount is enough.
+    """
+    growth, contributions = growth_factors(paths, seed)
+    years = years_to_retirement(age)
+    target = retirement_target(annual_income)
+    if solve_for == 'retirement_savings':
+        factor, other = growth[years], (12 * monthly_savings) * contributions[years]
+        scale = 1.0
+    elif solve_for == 'monthly_savings':
+        factor, other = contributions[years], retirement_savings * growth[years]
+        scale = 12.0
+    else:
+        raise ValueError(f"Cannot solve for {solve_for!r}")
+    needed = int(np.ceil(probability * paths))
+    if needed <= 0:
+        return 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        required = np.where(other >= target, 0.0, (target - other) / (factor * scale))
+    required = np.nan_to_num(required, nan=np.inf)
+    return float(max(0.0, np.partition(required, needed - 1)[needed - 1]))
+
+
+def success_probability_columns(age, retirement_savings, monthly_savings, annual_income,
+                                paths=DEFAULT_PATHS, seed=DEFAULT_SEED, chunk_size=None):
+    """success_probability for arrays of profiles, in chunks of rows
+
+    Matches the scalar function exactly. chunk_size defaults to as many
+    rows as fit in CHUNK_CELLS simulated values; NaN rows give NaN.
+    """
+    growth, contributions = growth_factors(paths, seed)
+    age = np.asarray(age, dtype=np.float64)
+    retirement_savings = np.asarray(retirement_savings, dtype=np.float64)
+    contribution = 12 * np.asarray(monthly_savings, dtype=np.float64)
+    target = retirement_target(np.asarray(annual_income, dtype=np.float64))
+
+    years = np.clip(np.nan_to_num(RETIREMENT_AGE - age), 0, MAX_YEARS).astype(np.int64)
+    result = np.empty(len(age))
+    chunk_size = chunk_size or max(1, CHUNK_CELLS // paths)
+    for start in range(0, len(age), chunk_size):
+        rows = slice(start, start + chunk_size)
+        savings = retirement_savings[rows, None] * growth[years[rows]] + contribution[rows, None] * contributions[years[rows]]
+        result[rows] = np.mean(savings >= target[rows, None], axis=1)
+
+    invalid = np.isnan(age) | np.isnan(retirement_savings) | np.isnan(contribution) | np.isnan(target)
+    result[invalid] = np.nan
+    return result
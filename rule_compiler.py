@@ -0,0 +1,613 @@
+"""
+Rule Compiler for WealthWise AI
+Validates knowledge base conditions and compiles them once into callables
+"""
+
+import ast
+import copy
+import hashlib
+import json
+import marshal
+import math
+import os
+import string
+import sys
+import types
+from bisect import bisect_left
+
+# Only plain arithmetic, comparisons and boolean logic may appear in a rule
+ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div,
+    ast.Compare, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+    ast.Name, ast.Load, ast.Constant,
+)
+
+DATA_ARG = '_d'
+
+# Bump whenever the layout of the cached compiled rules, or the code compiled for them, changes
+ARTIFACT_FORMAT = 3
+
+# Explanation used for rules without a template, and when rendering fails
+DEFAULT_EXPLANATION = "Based on standard financial planning guidelines"
+FALLBACK_EXPLANATION = "Based on analysis of your financial situation"
+
+
+class RuleCompileError(ValueError):
+    """Raised when a rule condition is not a safe, well-formed expression"""
+
+
+class CompiledCondition:
+    """A rule condition compiled once into a function of the data dict"""
+
+    __slots__ = ('source', 'names', '_tree', 'function', 'vector_function')
+
+    def __init__(self, source, names, tree, function, vector_function):
+        self.source = source
+        self.names = names
+        # None when loaded from the rule cache; parsed again on first use
+        self._tree = tree
+        self.function = function
+        # Same condition over a dict of NumPy columns, returning a mask
+        self.vector_function = vector_function
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = parse_expression(self.source)[0]
+        return self._tree
+
+    def __call__(self, data):
+        return self.function(data)
+
+    def __reduce__(self):
+        # Compiled code cannot be pickled; recompile from the source instead
+        return (compile_condition, (self.source,))
+
+    def __repr__(self):
+        return f"CompiledCondition({self.source!r})"
+
+
+def parse_expression(source, allowed_names=None):
+    """Parse an expression and check every node against the allowlist"""
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise RuleCompileError(f"Invalid syntax in {source!r}: {e.msg}") from None
+
+    names = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise RuleCompileError(f"Disallowed {type(node).__name__} in {source!r}")
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+            raise RuleCompileError(f"Only numeric constants are allowed in {source!r}")
+        if isinstance(node, ast.Name):
+            if allowed_names is not None and node.id not in allowed_names:
+                raise RuleCompileError(f"Unknown variable {node.id!r} in {source!r}")
+            if node.id not in names:
+                names.append(node.id)
+
+    return tree, tuple(names)
+
+
+class _NameToLookup(ast.NodeTransformer):
+    """Rewrite every variable reference into a lookup on the data dict"""
+
+    def visit_Name(self, node):
+        lookup = ast.Subscript(
+            value=ast.Name(id=DATA_ARG, ctx=ast.Load()),
+            slice=ast.Constant(value=node.id),
+            ctx=ast.Load()
+        )
+        return ast.copy_location(lookup, node)
+
+
+def _is_boolean(node):
+    """Whether an expression always yields a bool, so & | ~ on it match and/or/not"""
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.op, ast.Not)
+    return isinstance(node, (ast.Compare, ast.BoolOp))
+
+
+def _truth(node):
+    """node as a boolean: numbers are true when non-zero, as in `x and ...`"""
+    if _is_boolean(node):
+        return node
+    return ast.copy_location(ast.Compare(left=node, ops=[ast.NotEq()], comparators=[ast.Constant(value=0)]), node)
+
+
+class _VectorizeLogic(ast.NodeTransformer):
+    """Rewrite boolean logic so it works element-wise on NumPy arrays
+
+    Operands of and/or/not that are plain numbers are compared with 0
+    first, so the result matches the scalar condition's truth value.
+    """
+
+    def visit_BoolOp(self, node):
+        node.values = [_truth(value) for value in node.values]
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return ast.copy_location(result, node)
+
+    def visit_UnaryOp(self, node):
+        if isinstance(node.op, ast.Not):
+            node.operand = _truth(node.operand)
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.copy_location(ast.UnaryOp(op=ast.Invert(), operand=node.operand), node)
+        return node
+
+    def visit_Compare(self, node):
+        # a < b < c  ->  (a < b) & (b < c)
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        operands = [node.left] + node.comparators
+        result = None
+        for op, left, right in zip(node.ops, operands, operands[1:]):
+            pair = ast.Compare(left=left, ops=[op], comparators=[right])
+            result = pair if result is None else ast.BinOp(left=result, op=ast.BitAnd(), right=pair)
+        return ast.copy_location(result, node)
+
+
+def _build_function(tree, source, vectorize=False):
+    """Wrap an expression tree into `lambda _d: <expr>` and compile it"""
+    tree = copy.deepcopy(tree)
+    if vectorize:
+        tree = _VectorizeLogic().visit(tree)
+    body = _NameToLookup().visit(tree).body
+    function_tree = ast.Expression(body=ast.Lambda(
+        args=ast.arguments(
+            posonlyargs=[], args=[ast.arg(arg=DATA_ARG)], vararg=None,
+            kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[]
+        ),
+        body=body
+    ))
+    ast.fix_missing_locations(function_tree)
+    code = compile(function_tree, f"<rule: {source}>", 'eval')
+    return eval(code, {"__builtins__": {}})
+
+
+def compile_condition(source, allowed_names=None):
+    """Compile a condition string into a CompiledCondition"""
+    tree, names = parse_expression(source, allowed_names)
+    return CompiledCondition(
+        source, names, tree,
+        _build_function(tree, source),
+        _build_function(tree, source, vectorize=True)
+    )
+
+
+class CompiledTemplate:
+    """An explanation template split once into literals and compiled fields
+    
+    Fields may hold simple arithmetic, e.g. "${3 * monthly_expenses}".
+    """
+
+    __slots__ = ('source', 'names', 'parts')
+
+    def __init__(self, source, names, parts):
+        self.source = source
+        self.names = names
+        # Literal strings and (function, conversion, format_spec) triples
+        self.parts = parts
+
+    def render(self, data):
+        """Format the template with data, or return the fallback text on error"""
+        try:
+            pieces = []
+            for part in self.parts:
+                if isinstance(part, str):
+                    pieces.append(part)
+                    continue
+                function, conversion, format_spec = part
+                value = function(data)
+                if conversion == 'r':
+                    value = repr(value)
+                elif conversion == 's':
+                    value = str(value)
+                elif conversion == 'a':
+                    value = ascii(value)
+                pieces.append(format(value, format_spec))
+            return ''.join(pieces)
+        except Exception:
+            return FALLBACK_EXPLANATION
+
+    def __reduce__(self):
+        if all(isinstance(part, str) for part in self.parts):
+            return (literal_template, (self.source,))
+        return (compile_template, (self.source,))
+
+    def __repr__(self):
+        return f"CompiledTemplate({self.source!r})"
+
+
+def literal_template(text):
+    """Template that always renders text as-is, braces included"""
+    return CompiledTemplate(text, (), [text] if text else [])
+
+
+def compile_template(source, allowed_names=None):
+    """Compile an explanation template, validating every field and format spec"""
+    parts = []
+    names = []
+    try:
+        parsed = list(string.Formatter().parse(source))
+    except ValueError as e:
+        raise RuleCompileError(f"Invalid template {source!r}: {e}") from None
+
+    for literal, field, format_spec, conversion in parsed:
+        if literal:
+            parts.append(literal)
+        if field is None:
+            continue
+        if not field.strip():
+            raise RuleCompileError(f"Empty field in template {source!r}")
+        if '{' in format_spec:
+            raise RuleCompileError(f"Nested format specs are not supported in {source!r}")
+
+        tree, field_names = parse_expression(field, allowed_names)
+        names.extend(name for name in field_names if name not in names)
+        if not any(_format_accepts(sample, format_spec) for sample in (1.0, 1)):
+            raise RuleCompileError(f"Invalid format spec {format_spec!r} in {source!r}")
+        parts.append((_build_function(tree, field), conversion, format_spec))
+
+    return CompiledTemplate(source, tuple(names), parts)
+
+
+def _format_accepts(sample, format_spec):
+    try:
+        format(sample, format_spec)
+        return True
+    except ValueError:
+        return False
+
+
+_FLIPPED_OPS = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Eq: ast.Eq}
+
+
+def _constant_value(node):
+    """Return the numeric value of a (possibly negated) constant node, else None"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _constant_value(node.operand)
+        if value is None:
+            return None
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    return None
+
+
+def _comparison_bounds(node):
+    """Yield (variable, op, constant) for each link of a variable-vs-constant comparison"""
+    operands = [node.left] + node.comparators
+    for op, left, right in zip(node.ops, operands, operands[1:]):
+        if type(op) not in _FLIPPED_OPS:
+            raise ValueError("unsupported operator")
+        if isinstance(left, ast.Name) and _constant_value(right) is not None:
+            yield left.id, type(op), _constant_value(right)
+        elif isinstance(right, ast.Name) and _constant_value(left) is not None:
+            yield right.id, _FLIPPED_OPS[type(op)], _constant_value(left)
+        else:
+            raise ValueError("not a variable-vs-constant comparison")
+
+
+def extract_range(tree):
+    """Describe a condition as (variable, bounds) if it only bounds one variable by constants
+    
+    Returns None for anything else, e.g. conditions mixing several variables.
+    """
+    node = tree.body
+    parts = node.values if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And) else [node]
+    variable = None
+    bounds = []
+    for part in parts:
+        if not isinstance(part, ast.Compare):
+            return None
+        try:
+            links = list(_comparison_bounds(part))
+        except ValueError:
+            return None
+        for name, op, value in links:
+            if variable not in (None, name):
+                return None
+            variable = name
+            bounds.append(value)
+    return variable, bounds
+
+
+class IntervalIndex:
+    """Sorted breakpoints of a single-variable category for bisect rule lookup
+    
+    The breakpoints split the number line into 2n+1 segments: the open
+    intervals between breakpoints and the breakpoints themselves. The first
+    matching rule is precomputed for every segment.
+    """
+
+    __slots__ = ('variable', 'breakpoints', 'segment_rules')
+
+    def __init__(self, variable, breakpoints, segment_rules):
+        self.variable = variable
+        self.breakpoints = breakpoints
+        self.segment_rules = segment_rules
+
+    def lookup(self, value):
+        """Return the index of the first matching rule, or -1"""
+        if value != value:
+            return -1  # NaN fails every comparison
+        position = bisect_left(self.breakpoints, value)
+        if position < len(self.breakpoints) and self.breakpoints[position] == value:
+            return self.segment_rules[2 * position + 1]
+        return self.segment_rules[2 * position]
+
+
+def build_interval_index(rules):
+    """Build an IntervalIndex when every rule bounds the same variable, else None"""
+    variable = None
+    breakpoints = set()
+    for compiled_rule in rules:
+        described = extract_range(compiled_rule.condition.tree)
+        if described is None or variable not in (None, described[0]):
+            return None
+        variable = described[0]
+        breakpoints.update(described[1])
+
+    breakpoints = sorted(breakpoints)
+    if variable is None or not all(math.isfinite(value) for value in breakpoints):
+        return None
+
+    # A representative value for each segment, checked with the compiled conditions themselves
+    representatives = []
+    for position, value in enumerate(breakpoints):
+        below = breakpoints[position - 1] if position else value - 1
+        representatives.append((below + value) / 2 if position else below)
+        representatives.append(value)
+    representatives.append(breakpoints[-1] + 1)
+
+    segment_rules = []
+    for value in representatives:
+        data = {variable: value}
+        matched = next((r.index for r in rules if r.condition(data)), -1)
+        segment_rules.append(matched)
+
+    return IntervalIndex(variable, breakpoints, segment_rules)
+
+
+NO_MATCH = -1
+
+
+class CompiledRule:
+    """A knowledge base rule with its condition and explanation compiled
+
+    One instance per rule is shared by every evaluation, so results only
+    need to reference it. score_impact is already weighted by the category.
+    """
+
+    __slots__ = ('index', 'condition', 'explanation', 'rule',
+                 'category', 'message', 'severity', 'score_impact', 'weight')
+
+    def __init__(self, index, condition, explanation, rule, category, message, severity, score_impact, weight):
+        self.index = index
+        self.condition = condition
+        self.explanation = explanation
+        self.rule = rule
+        self.category = category
+        self.message = message
+        self.severity = severity
+        self.score_impact = score_impact
+        self.weight = weight
+
+    def __repr__(self):
+        return f"CompiledRule({self.category!r}, {self.index})"
+
+
+class CompiledCategory:
+    """A knowledge base category with all of its rules compiled"""
+
+    __slots__ = ('name', 'description', 'weight', 'rules', 'index', 'neutral')
+
+    def __init__(self, name, description, weight, rules, index=None):
+        self.name = name
+        self.description = description
+        self.weight = weight
+        self.rules = rules
+        # IntervalIndex for single-variable range categories, else None
+        self.index = index
+        # Shared outcome used when no rule matches
+        self.neutral = CompiledRule(
+            NO_MATCH, None,
+            literal_template(f"Your {description.lower()} appears to be in good standing"),
+            None, name, f"✅ {description} - No issues detected", 'good', 0, weight
+        )
+
+
+def _compiled_rule(index, condition, explanation, rule, category, ruleset):
+    return CompiledRule(
+        index, condition, explanation, rule, category,
+        rule['recommendation'], rule['severity'],
+        rule['score_impact'] * ruleset['weight'], ruleset['weight']
+    )
+
+
+def compile_knowledge_base(knowledge_base, allowed_names=None, build_indexes=True):
+    """Compile every condition of a knowledge base, preserving rule order"""
+    categories = []
+    for category, ruleset in knowledge_base.items():
+        rules = []
+        for index, rule in enumerate(ruleset['rules']):
+            try:
+                condition = compile_condition(rule['condition'], allowed_names)
+                explanation = compile_template(rule.get('explanation_template', DEFAULT_EXPLANATION), allowed_names)
+            except RuleCompileError as e:
+                raise RuleCompileError(f"{category} rule {index}: {e}") from None
+            rules.append(_compiled_rule(index, condition, explanation, rule, category, ruleset))
+        categories.append(CompiledCategory(
+            category, ruleset['description'], ruleset['weight'], rules,
+            build_interval_index(rules) if build_indexes else None
+        ))
+    return categories
+
+
+def rule_pack_hash(knowledge_base):
+    """SHA-256 of a knowledge base's compact JSON form
+    
+    Key order is kept: category order decides the order scores are summed in.
+    """
+    canonical = json.dumps(knowledge_base, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def artifact_path(cache_dir, knowledge_base, allowed_names=None):
+    """Cache file for a compiled knowledge base
+    
+    The name covers the rule pack, the allowed variables, the artifact
+    format and the interpreter, since marshalled code is version specific.
+    """
+    key = json.dumps([
+        rule_pack_hash(knowledge_base), ARTIFACT_FORMAT,
+        sorted(allowed_names) if allowed_names is not None else None
+    ])
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+    return os.path.join(cache_dir, f"rules-{digest}.{sys.implementation.cache_tag}.bin")
+
+
+def _source_digest(condition, template):
+    """SHA-256 of the condition and explanation sources a cached rule was compiled from"""
+    return hashlib.sha256(f"{condition}\0{template}".encode('utf-8')).hexdigest()
+
+
+def _check_code(code):
+    """Refuse cached code that could reach anything beyond its data argument
+
+    Compiled conditions and templates only subscript their argument, so
+    their code never names a global, builtin or attribute. Code that does
+    was not produced by this compiler and is not run.
+    """
+    if code.co_names:
+        raise ValueError(f"cached code refers to {', '.join(code.co_names)}")
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            _check_code(constant)
+    return code
+
+
+def dump_compiled_rules(compiled_rules):
+    """Serialize compiled categories to bytes: code objects, names, indexes and source digests"""
+    categories = []
+    for compiled in compiled_rules:
+        rules = []
+        for compiled_rule in compiled.rules:
+            condition, explanation = compiled_rule.condition, compiled_rule.explanation
+            parts = [
+                part if isinstance(part, str) else (part[0].__code__,) + tuple(part[1:])
+                for part in explanation.parts
+            ]
+            rules.append((
+                _source_digest(condition.source, explanation.source),
+                condition.names, condition.function.__code__, condition.vector_function.__code__,
+                explanation.names, parts
+            ))
+        index = compiled.index
+        if index is not None:
+            index = (index.variable, index.breakpoints, index.segment_rules)
+        categories.append((compiled.name, rules, index))
+    return marshal.dumps(categories)
+
+
+def _load_function(code):
+    return types.FunctionType(_check_code(code), {"__builtins__": {}})
+
+
+def load_compiled_rules(knowledge_base, data):
+    """Rebuild compiled categories from dump_compiled_rules() output for the same knowledge base
+
+    Raises ValueError when an entry was not compiled from the knowledge
+    base's own condition and template, or holds code the compiler never
+    emits, so the caller compiles from source instead.
+    """
+    dumped = marshal.loads(data)
+    if [name for name, _, _ in dumped] != list(knowledge_base):
+        raise ValueError("cached rules belong to a different knowledge base")
+
+    categories = []
+    for (category, rule_parts, index), ruleset in zip(dumped, knowledge_base.values()):
+        if len(rule_parts) != len(ruleset['rules']):
+            raise ValueError(f"cached rules for {category} do not match the knowledge base")
+        rules = []
+        for position, (rule, dumped_rule) in enumerate(zip(ruleset['rules'], rule_parts)):
+            digest, names, code, vector_code, template_names, parts = dumped_rule
+            template = rule.get('explanation_template', DEFAULT_EXPLANATION)
+            if digest != _source_digest(rule['condition'], template):
+                raise ValueError(f"cached {category} rule {position} was compiled from a different source")
+            condition = CompiledCondition(
+                rule['condition'], names, None, _load_function(code), _load_function(vector_code)
+            )
+            explanation = CompiledTemplate(
+                template, template_names,
+                [part if isinstance(part, str) else (_load_function(part[0]),) + part[1:] for part in parts]
+            )
+            rules.append(_compiled_rule(position, condition, explanation, rule, category, ruleset))
+        categories.append(CompiledCategory(
+            category, ruleset['description'], ruleset['weight'], rules,
+            IntervalIndex(*index) if index is not None else None
+        ))
+    return categories
+
+
+def _check_cache_owner(path):
+    """Raise ValueError unless path belongs to this user and only this user can write it"""
+    status = os.stat(path)
+    if hasattr(os, 'getuid') and status.st_uid != os.getuid():
+        raise ValueError("owned by another user")
+    if status.st_mode & 0o022:
+        raise ValueError("writable by other users")
+
+
+def load_knowledge_base(knowledge_base, allowed_names=None, cache_dir=None):
+    """Compile a knowledge base, reusing the cached artifact in cache_dir when present
+    
+    The artifact is written on the first compile (e.g. during the build) so
+    later cold starts skip parsing, validation and index construction.
+    Without a cache_dir this is compile_knowledge_base().
+
+    Cached code is run without going through the AST allowlist again, so
+    cache_dir must not be writable by other users. Entries are checked
+    against the rule sources and for code the compiler never emits, and a
+    cache that others can write to, or that another user owns, is ignored.
+    """
+    if not cache_dir:
+        return compile_knowledge_base(knowledge_base, allowed_names)
+
+    path = artifact_path(cache_dir, knowledge_base, allowed_names)
+    try:
+        _check_cache_owner(cache_dir)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Not using rule cache {cache_dir}: {e}")
+        return compile_knowledge_base(knowledge_base, allowed_names)
+
+    try:
+        _check_cache_owner(path)
+        with open(path, 'rb') as f:
+            return load_compiled_rules(knowledge_base, f.read())
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        print(f"Ignoring rule cache {path}: {e}")
+
+    compiled_rules = compile_knowledge_base(knowledge_base, allowed_names)
+    try:
+        os.makedirs(cache_dir, mode=0o755, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(dump_compiled_rules(compiled_rules))
+        # Atomic, so concurrent workers never read a partial file
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Could not write rule cache {path}: {e}")
+    return compiled_rules
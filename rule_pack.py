@@ -0,0 +1,245 @@
+"""
+Rule Packs for WealthWise AI
+Knowledge bases loaded from JSON/YAML files, versioned by content hash and hot-reloadable
+
+A rule pack has the same layout as FINANCIAL_RULES:
+
+    {"emergency_fund": {"description": "...", "weight": 0.25,
+                        "rules": [{"condition": "...", "score_impact": -20,
+                                   "recommendation": "...", "severity": "high",
+                                   "explanation_template": "..."}]}}
+
+Usage:
+    python rule_pack.py export rules.json     # write the built-in rules as a starting point
+    python rule_pack.py check rules.yaml      # validate and compile, print the version
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+
+from dependency_graph import DependencyGraph
+from rule_compiler import RuleCompileError, load_knowledge_base, rule_pack_hash
+
+SEVERITIES = ('critical', 'high', 'medium', 'good', 'excellent')
+
+# Characters of the content hash used as the version label
+VERSION_LENGTH = 12
+
+# Distinct rule outcomes a pack keeps one shared tuple for; further ones are not shared
+MAX_SHARED_RULE_SETS = 65536
+
+
+class RulePackError(ValueError):
+    """Raised when a rule pack file cannot be read or fails validation"""
+
+
+class RulePack:
+    """A validated, compiled knowledge base and its content-hash version
+
+    Instances are never modified; the engine switches packs by replacing
+    its reference, so an evaluation keeps the pack it started with.
+    """
+
+    __slots__ = ('knowledge_base', 'compiled_rules', 'dependency_graph', 'version', 'source', '_rule_sets')
+
+    def __init__(self, knowledge_base, compiled_rules, metric_inputs, source=None):
+        self.knowledge_base = knowledge_base
+        self.compiled_rules = compiled_rules
+        self.dependency_graph = DependencyGraph(metric_inputs, compiled_rules)
+        self.version = rule_pack_hash(knowledge_base)[:VERSION_LENGTH]
+        # File the pack was read from, None for the built-in rules
+        self.source = source
+        self._rule_sets = {}
+
+    def shared_rules(self, rules):
+        """The matched rules as a tuple shared by every result with the same outcome"""
+        rules = tuple(rules)
+        shared = self._rule_sets.get(rules)
+        if shared is None:
+            if len(self._rule_sets) >= MAX_SHARED_RULE_SETS:
+                return rules
+            shared = self._rule_sets.setdefault(rules, rules)
+        return shared
+
+    def __repr__(self):
+        return f"RulePack({self.version!r}, source={self.source!r})"
+
+
+def read_rule_pack(path):
+    """Parse a JSON or YAML rule pack file into a knowledge base dict"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+    except OSError as e:
+        raise RulePackError(f"Cannot read rule pack {path}: {e}") from None
+
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise RulePackError("YAML rule packs need PyYAML (pip install pyyaml)") from None
+        try:
+            return yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise RulePackError(f"Invalid YAML in {path}: {e}") from None
+
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise RulePackError(f"Invalid JSON in {path}: {e}") from None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_rule_pack(knowledge_base):
+    """Check the layout of a knowledge base; conditions are checked when compiled"""
+    if not isinstance(knowledge_base, dict) or not knowledge_base:
+        raise RulePackError("A rule pack must be a non-empty mapping of categories")
+    # The version is a hash of the JSON form; YAML dates and the like have none
+    try:
+        rule_pack_hash(knowledge_base)
+    except (TypeError, ValueError) as e:
+        raise RulePackError(f"A rule pack may only hold JSON values (quote dates in YAML): {e}") from None
+
+    for category, ruleset in knowledge_base.items():
+        if not isinstance(ruleset, dict):
+            raise RulePackError(f"{category}: expected a mapping")
+        if not isinstance(ruleset.get('description'), str):
+            raise RulePackError(f"{category}: 'description' must be a string")
+        if not _is_number(ruleset.get('weight')) or ruleset['weight'] < 0:
+            raise RulePackError(f"{category}: 'weight' must be a non-negative number")
+        if not isinstance(ruleset.get('rules'), list) or not ruleset['rules']:
+            raise RulePackError(f"{category}: 'rules' must be a non-empty list")
+
+        for index, rule in enumerate(ruleset['rules']):
+            where = f"{category} rule {index}"
+            if not isinstance(rule, dict):
+                raise RulePackError(f"{where}: expected a mapping")
+            for key in ('condition', 'recommendation'):
+                if not isinstance(rule.get(key), str):
+                    raise RulePackError(f"{where}: '{key}' must be a string")
+            if not _is_number(rule.get('score_impact')):
+                raise RulePackError(f"{where}: 'score_impact' must be a number")
+            if rule.get('severity') not in SEVERITIES:
+                raise RulePackError(f"{where}: 'severity' must be one of {', '.join(SEVERITIES)}")
+            if not isinstance(rule.get('explanation_template', ''), str):
+                raise RulePackError(f"{where}: 'explanation_template' must be a string")
+
+
+def compile_rule_pack(knowledge_base, allowed_names, metric_inputs, cache_dir=None, source=None):
+    """Validate and compile a knowledge base into a RulePack"""
+    validate_rule_pack(knowledge_base)
+    try:
+        compiled_rules = load_knowledge_base(knowledge_base, allowed_names, cache_dir)
+    except RuleCompileError as e:
+        raise RulePackError(str(e)) from None
+    except Exception as e:
+        raise RulePackError(f"Cannot compile rule pack: {e!r}") from e
+    return RulePack(knowledge_base, compiled_rules, metric_inputs, source)
+
+
+class RulePackWatcher:
+    """Background thread that reloads a rule pack file when it changes
+
+    The file is re-read when its modification time or size changes. A pack
+    that fails to load is reported and the current one stays in use. The
+    new pack is compiled on this thread and handed to apply() complete, so
+    scoring never waits for a reload.
+    """
+
+    def __init__(self, path, load, apply, current_version=None, interval=2.0):
+        self.path = path
+        self.load = load
+        self.apply = apply
+        self.version = current_version
+        self.interval = interval
+        self.reloads = 0
+        self.last_error = None
+        self._signature = self._stat()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rule-pack-watcher', daemon=True)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def check(self):
+        """Reload now if the file changed; returns True when a new pack was applied"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            pack = self.load(self.path)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Keeping rule pack {self.version}: {e}")
+            return False
+        self.last_error = None
+        if pack.version == self.version:
+            return False
+        self.apply(pack)
+        self.version = pack.version
+        self.reloads += 1
+        return True
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            # One bad reload must not end hot reloading
+            try:
+                self.check()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error reloading rule pack {self.path}: {e!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WealthWise AI rule pack tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help="write the built-in rules as a JSON or YAML rule pack")
+    export.add_argument('path')
+    check = commands.add_parser('check', help="validate and compile a rule pack")
+    check.add_argument('path')
+    args = parser.parse_args(argv)
+
+    # Imported here: the engine imports this module
+    from inference_engine import DEFAULT_RULE_PACK, load_rule_pack
+
+    if args.command == 'export':
+        knowledge_base = DEFAULT_RULE_PACK.knowledge_base
+        with open(args.path, 'w', encoding='utf-8') as f:
+            if args.path.endswith(('.yaml', '.yml')):
+                import yaml
+                yaml.safe_dump(knowledge_base, f, allow_unicode=True, sort_keys=False)
+            else:
+                json.dump(knowledge_base, f, indent=2, ensure_ascii=False)
+        print(f"Wrote rule pack {DEFAULT_RULE_PACK.version} to {args.path}")
+        return
+
+    try:
+        pack = load_rule_pack(args.path)
+    except RulePackError as e:
+        print(f"Invalid rule pack: {e}", file=sys.stderr)
+        sys.exit(1)
+    rules = sum(len(compiled.rules) for compiled in pack.compiled_rules)
+    print(f"{args.path}: version {pack.version}, {len(pack.compiled_rules)} categories, {rules} rules")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Scoring Service for WealthWise AI
+Small asyncio HTTP/JSON service; CPU-bound scoring runs in a worker pool
+
+Endpoints:
+    GET  /health       liveness check
+    GET  /metrics      Prometheus text metrics
+    GET  /population   population size and score/metric quantiles
+    POST /score        one profile object -> assessment
+    POST /score/batch  {"profiles": [...]} -> {"results": [...]}
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+from cli import record_population, score_record
+from inference_engine import WealthWiseInferenceEngine, load_rule_pack
+from instrumentation import EngineMetrics, render_prometheus
+from quantile_sketch import PopulationStats
+from rule_pack import RulePackError
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_BATCH_SIZE = 10000
+
+# One engine per worker; evaluate() is reentrant so threads can share it
+_worker_engine = None
+
+
+def _init_worker(rule_pack_path=None):
+    global _worker_engine
+    _worker_engine = WealthWiseInferenceEngine(population=PopulationStats())
+    if rule_pack_path:
+        # Each worker reloads the file itself; requests in flight keep their pack
+        _worker_engine.watch_rule_pack(rule_pack_path)
+
+
+def score_profiles(records):
+    """Score a list of raw profile records in a worker
+    
+    Returns the results plus the worker's metrics and population counts
+    since its last call, so the parent process can aggregate them.
+    """
+    if _worker_engine is None:
+        _init_worker()
+    results = [score_record(_worker_engine, index, record) for index, record in enumerate(records)]
+    population = record_population(_worker_engine.population, results)
+    return results, _worker_engine.metrics.drain(), population
+
+
+class HTTPError(Exception):
+    """Error answered with an HTTP status and a JSON error body"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ScoringService:
+    """Asyncio HTTP front-end that forwards scoring to an executor"""
+
+    def __init__(self, executor, population=None):
+        self.executor = executor
+        # Aggregate of every worker's engine metrics
+        self.metrics = EngineMetrics()
+        # Aggregate of every worker's population counts, used to rank results
+        self.population = population if population is not None else PopulationStats()
+
+    async def score(self, records):
+        loop = asyncio.get_running_loop()
+        results, worker_metrics, worker_population = await loop.run_in_executor(
+            self.executor, score_profiles, records
+        )
+        self.metrics.merge(worker_metrics)
+        self.population.merge(worker_population)
+        for result in results:
+            if 'error' not in result:
+                result['ranking'] = self.population.ranking(result)
+        return results
+
+    async def route(self, method, path, body):
+        """Return (status, payload) for a request"""
+        if path == '/health':
+            if method != 'GET':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+            return HTTPStatus.OK, {'status': 'ok'}
+
+        if path == '/metrics':
+            if method != 'GET':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+            return HTTPStatus.OK, render_prometheus(self.metrics)
+
+        if path == '/population':
+            if method != 'GET':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+            return HTTPStatus.OK, self.population.summary()
+
+        if path not in ('/score', '/score/batch'):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no route for {path}")
+        if method != 'POST':
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST")
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}")
+
+        if path == '/score':
+            result = (await self.score([payload]))[0]
+            result.pop('row')
+            status = HTTPStatus.UNPROCESSABLE_ENTITY if 'error' in result else HTTPStatus.OK
+            return status, result
+
+        profiles = payload.get('profiles') if isinstance(payload, dict) else payload
+        if not isinstance(profiles, list):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "expected a list of profiles or {\"profiles\": [...]}")
+        if len(profiles) > MAX_BATCH_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"at most {MAX_BATCH_SIZE} profiles per batch")
+        return HTTPStatus.OK, {'results': await self.score(profiles)}
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection, honouring HTTP/1.1 keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, {'error': "malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                try:
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # The body cannot be skipped, so the connection is closed
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, {'error': "invalid Content-Length"}, False)
+                    break
+
+                try:
+                    if length > MAX_BODY_BYTES:
+                        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.route(method, target.split('?', 1)[0], body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': e.message}
+                    keep_alive = keep_alive and e.status != HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    raise
+                except Exception as e:
+                    # The body has been read, so the connection stays usable
+                    print(f"Error serving {method} {target}: {e!r}")
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "internal error while scoring"}
+
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            body, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+async def serve(host, port, workers, rule_pack_path=None, population_path=None):
+    """Run the service until cancelled"""
+    initargs = (rule_pack_path,)
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+    else:
+        executor = ThreadPoolExecutor(max_workers=1, initializer=_init_worker, initargs=initargs)
+
+    population = PopulationStats(population_path)
+    service = ScoringService(executor, population)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"WealthWise scoring service listening on http://{host}:{port} ({workers or 'in-process'} workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if population_path:
+            population.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WealthWise AI scoring HTTP service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8080)))
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="scoring processes; 0 scores on a single background thread")
+    parser.add_argument('-r', '--rule-pack', default=os.environ.get('WEALTHWISE_RULE_PACK'),
+                        help="JSON/YAML rule pack, reloaded when the file changes (default: built-in rules)")
+    parser.add_argument('-p', '--population', default=os.environ.get('WEALTHWISE_POPULATION'),
+                        help="JSON file keeping the population stats results are ranked against (default: in memory)")
+    args = parser.parse_args(argv)
+
+    if args.rule_pack:
+        try:
+            print(f"Using rule pack {load_rule_pack(args.rule_pack).version} from {args.rule_pack}")
+        except RulePackError as e:
+            parser.error(f"invalid rule pack: {e}")
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.rule_pack, args.population))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
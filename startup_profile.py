@@ -0,0 +1,140 @@
+"""
+Startup Profiler for WealthWise AI
+Reports import time per module and time-to-first-render of the Streamlit app
+
+Usage:
+    python startup_profile.py                  # profile main.py's first render
+    python startup_profile.py --module cli     # profile a plain `import cli`
+    python startup_profile.py --runs 5 --top 25
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Marks where the test harness stops importing and the app starts
+PHASE_MARKER = "--- wealthwise first render ---"
+
+# Child process: import the Streamlit test harness, then render the app once
+RENDER_CHILD = f"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter() - start
+print({PHASE_MARKER!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+print(json.dumps({{'harness': harness, 'first_render': time.perf_counter() - start,
+                  'exceptions': len(app.exception)}}))
+"""
+
+IMPORT_CHILD = f"""
+import importlib, json, sys, time
+print({PHASE_MARKER!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({{'harness': 0.0, 'first_render': time.perf_counter() - start, 'exceptions': 0}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr):
+    """Split -X importtime output at the phase marker into (harness, app) entries
+
+    Each entry is (module, self µs, cumulative µs, depth); depth 0 marks a
+    top-level import whose cumulative time includes everything below it.
+    """
+    phases = ([], [])
+    phase = 0
+    for line in stderr.splitlines():
+        if line.strip() == PHASE_MARKER:
+            phase = 1
+            continue
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            phases[phase].append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return phases
+
+
+def profile_once(script=None, module=None):
+    """Run one cold start in a fresh interpreter; returns (timings, harness imports, app imports)"""
+    if module is not None:
+        command = [sys.executable, '-X', 'importtime', '-c', IMPORT_CHILD, module]
+    else:
+        command = [sys.executable, '-X', 'importtime', '-c', RENDER_CHILD, script]
+    completed = subprocess.run(command, cwd=HERE, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"profiled process failed:\n{completed.stderr[-2000:]}")
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    harness, app = parse_importtime(completed.stderr)
+    return timings, harness, app
+
+
+def top_level(entries):
+    """Cumulative µs per top-level package, largest first"""
+    totals = {}
+    for module, _, cumulative_us, depth in entries:
+        if depth == 0:
+            package = module.split('.')[0]
+            totals[package] = totals.get(package, 0) + cumulative_us
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile WealthWise AI cold start")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--script', default='main.py', help="Streamlit script to render (default main.py)")
+    target.add_argument('--module', help="profile a plain import of this module instead")
+    parser.add_argument('--runs', type=int, default=3, help="cold starts to time (default 3)")
+    parser.add_argument('--top', type=int, default=15, help="modules to list (default 15)")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    runs = [profile_once(None if args.module else args.script, args.module) for _ in range(max(1, args.runs))]
+    first_render = [timings['first_render'] for timings, _, _ in runs]
+    # Module breakdown of the fastest run, the one least disturbed by noise
+    timings, harness, app = min(runs, key=lambda run: run[0]['first_render'])
+
+    report = {
+        'target': args.module or args.script,
+        'runs': len(runs),
+        'first_render_s': {'min': min(first_render), 'median': statistics.median(first_render)},
+        'harness_import_s': timings['harness'],
+        'exceptions': timings['exceptions'],
+        'modules_imported': len(app),
+        'top_level_imports_ms': {package: us / 1000 for package, us in top_level(app)[:args.top]},
+        'slowest_modules_self_ms': {
+            module: self_us / 1000
+            for module, self_us, _, _ in sorted(app, key=lambda entry: -entry[1])[:args.top]
+        }
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    label = 'import' if args.module else 'first render'
+    print(f"{report['target']}: {label} {report['first_render_s']['min'] * 1000:.0f} ms "
+          f"(median {report['first_render_s']['median'] * 1000:.0f} ms over {len(runs)} runs, "
+          f"{len(app)} modules imported)")
+    if not args.module:
+        print(f"test harness import (streamlit itself): {timings['harness'] * 1000:.0f} ms")
+    if timings['exceptions']:
+        print(f"warning: the app raised {timings['exceptions']} exception(s) while rendering")
+    print("\nTop-level imports (cumulative ms):")
+    for package, ms in report['top_level_imports_ms'].items():
+        print(f"  {package:<40} {ms:9.1f}")
+    print("\nSlowest modules (self ms):")
+    for module, ms in report['slowest_modules_self_ms'].items():
+        print(f"  {module:<40} {ms:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
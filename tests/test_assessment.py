@@ -0,0 +1,37 @@
+import pickle
+
+from inference_engine import WealthWiseInferenceEngine
+
+PROFILE = {
+    'age': 45,
+    'monthly_income': 4000,
+    'monthly_expenses': 3800,
+    'housing_cost': 1800,
+    'emergency_savings': 2000,
+    'retirement_savings': 10000,
+    'monthly_savings': 100,
+    'total_monthly_debt': 1800
+}
+
+
+def test_same_outcomes_share_one_rules_tuple():
+    engine = WealthWiseInferenceEngine()
+    first = engine.evaluate(PROFILE)
+    second = engine.evaluate(dict(PROFILE, emergency_savings=2100))
+    assert first.rules is second.rules
+    assert first.recommendations is first.recommendations
+    assert [rec.rule for rec in first.recommendations] == list(first.rules)
+
+
+def test_pickled_assessment_keeps_results_and_lazy_metrics():
+    # Past the savings-gap rules, so matching reads the lazy success probability
+    profile = dict(PROFILE, age=50, monthly_income=5000, retirement_savings=200000)
+    assessment = WealthWiseInferenceEngine().evaluate(profile)
+    assert assessment.context.lazy is not None
+    explanations = [rec.explanation for rec in assessment.recommendations]
+
+    restored = pickle.loads(pickle.dumps(assessment))
+    assert restored == assessment
+    assert restored.context.lazy == assessment.context.lazy
+    assert [rec.explanation for rec in restored.recommendations] == explanations
+    assert dict(restored.inputs) == profile
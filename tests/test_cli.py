@@ -0,0 +1,38 @@
+import io
+import json
+
+from cli import read_records, score_record
+from inference_engine import INPUT_FIELDS, WealthWiseInferenceEngine
+
+PROFILE = {
+    'age': 45,
+    'monthly_income': 4000,
+    'monthly_expenses': 3800,
+    'housing_cost': 1800,
+    'emergency_savings': 2000,
+    'retirement_savings': 10000,
+    'monthly_savings': 100,
+    'total_monthly_debt': 1800
+}
+
+
+def score_csv(rows):
+    lines = [','.join(INPUT_FIELDS)] + [','.join(str(row[field]) for field in INPUT_FIELDS) for row in rows]
+    engine = WealthWiseInferenceEngine()
+    return [score_record(engine, *record) for record in read_records(io.StringIO('\n'.join(lines)), 'csv')]
+
+
+def test_non_finite_csv_values_are_row_errors():
+    results = score_csv([PROFILE, dict(PROFILE, age='nan'), dict(PROFILE, monthly_savings='inf'),
+                         dict(PROFILE, total_monthly_debt='-Infinity')])
+    assert 'grade' in results[0]
+    for result in results[1:]:
+        assert 'not a finite number' in result['error']
+
+
+def test_non_finite_json_values_are_row_errors():
+    # json.loads accepts the NaN and Infinity literals
+    stream = io.StringIO(json.dumps(dict(PROFILE, age=float('nan'))) + '\n')
+    engine = WealthWiseInferenceEngine()
+    [result] = [score_record(engine, *record) for record in read_records(stream, 'jsonl')]
+    assert 'not a finite number' in result['error']
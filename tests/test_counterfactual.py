@@ -0,0 +1,48 @@
+from counterfactual import next_grade_plans
+from inference_engine import WealthWiseInferenceEngine
+
+# Graded A-: high debt and housing cost, little saved
+PROFILE = {
+    'age': 45,
+    'monthly_income': 4000,
+    'monthly_expenses': 3800,
+    'housing_cost': 1800,
+    'emergency_savings': 2000,
+    'retirement_savings': 10000,
+    'monthly_savings': 100,
+    'total_monthly_debt': 1800
+}
+
+
+def test_plans_reach_the_next_grade():
+    engine = WealthWiseInferenceEngine()
+    assessment = engine.evaluate(PROFILE)
+    plans = next_grade_plans(engine, assessment)
+    assert plans
+    for plan in plans:
+        assert plan['assessment'].score > assessment.score
+
+
+def test_plans_leave_engine_metrics_untouched():
+    engine = WealthWiseInferenceEngine()
+    assessment = engine.evaluate(PROFILE)
+    # Renders of the evaluated profile are real ones and reach the metrics
+    for recommendation in assessment.recommendations:
+        recommendation.explanation
+    before = engine.metrics.snapshot()
+    plans = next_grade_plans(engine, assessment)
+    for plan in plans:
+        for recommendation in plan['assessment'].recommendations:
+            recommendation.explanation
+    assert plans
+    assert engine.metrics.snapshot() == before
+
+
+def test_plans_are_deterministic():
+    profile = dict(PROFILE, age=50, monthly_income=5000, retirement_savings=200000)
+    runs = []
+    for _ in range(2):
+        engine = WealthWiseInferenceEngine()
+        plans = next_grade_plans(engine, engine.evaluate(profile))
+        runs.append([(plan['changes'], plan['monthly_cost'], plan['assessment'].to_dict()) for plan in plans])
+    assert runs[0] and runs[0] == runs[1]
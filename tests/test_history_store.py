@@ -0,0 +1,92 @@
+from history_store import HistoryStore, connect
+from inference_engine import WealthWiseInferenceEngine
+
+PROFILE = {
+    'age': 45,
+    'monthly_income': 4000,
+    'monthly_expenses': 3800,
+    'housing_cost': 1800,
+    'emergency_savings': 2000,
+    'retirement_savings': 10000,
+    'monthly_savings': 100,
+    'total_monthly_debt': 1800
+}
+
+
+def assessments():
+    engine = WealthWiseInferenceEngine()
+    return [engine.evaluate(dict(PROFILE, emergency_savings=savings)) for savings in (2000, 12000, 30000)]
+
+
+def test_record_never_reads_the_database(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    # A reader that fails on use: record() must not touch it
+    store._reader.close()
+    assessment = assessments()[0]
+    assert store.record('alice', assessment, created_at=1.0)
+    store.flush()
+    store._reader = connect(str(tmp_path / 'history.db'))
+    assert store.trend('alice')['evaluations'] == 1
+    store.close()
+
+
+def test_trends_survive_cache_eviction(tmp_path):
+    path = str(tmp_path / 'history.db')
+    users = ['alice', 'bob', 'carol']
+    store = HistoryStore(path, flush_interval=0, max_cached_users=1)
+    samples = assessments()
+    for step, assessment in enumerate(samples):
+        for user in users:
+            store.record(user, assessment, created_at=float(step))
+        # Queued records count before they are written
+        assert store.trend('alice')['evaluations'] == step + 1
+        store.flush()
+        assert len(store._trends) <= 1
+    store.close()
+
+    reopened = HistoryStore(path)
+    for user in users:
+        trend = reopened.trend(user)
+        assert trend['evaluations'] == 3
+        assert trend['last_score'] == samples[2].score
+        assert trend['previous_score'] == samples[1].score
+        ema = samples[0].score
+        for assessment in samples[1:]:
+            ema = 0.3 * assessment.score + 0.7 * ema
+        assert abs(trend['ema_score'] - ema) < 1e-9
+    reopened.close()
+
+
+def test_failed_batches_leave_trends_and_writer_intact(tmp_path):
+    path = str(tmp_path / 'history.db')
+    store = HistoryStore(path, flush_interval=0)
+    samples = assessments()
+    store.record('alice', samples[0], created_at=1.0)
+    store.flush()
+
+    # A batch that fails in SQLite leaves no phantom point in the trends
+    other = connect(path)
+    other.execute("ALTER TABLE category_hits RENAME TO category_hits_away")
+    store.record('alice', samples[1], created_at=2.0)
+    store.flush()
+    assert store.trend('alice')['evaluations'] == 1
+    other.execute("ALTER TABLE category_hits_away RENAME TO category_hits")
+    other.close()
+
+    # Nor does any other error stop the writer
+    apply = store._apply
+    def fail_once(*args):
+        store._apply = apply
+        raise RuntimeError("boom")
+    store._apply = fail_once
+    store.record('alice', samples[1], created_at=3.0)
+    store.flush()
+    store.record('alice', samples[2], created_at=4.0)
+    store.flush()
+    store.close()
+
+    reopened = HistoryStore(path)
+    trend = reopened.trend('alice')
+    assert (trend['evaluations'], trend['previous_score'], trend['last_score']) == (2, samples[0].score, samples[2].score)
+    assert len(reopened.history('alice')) == 2
+    reopened.close()
@@ -0,0 +1,60 @@
+import json
+import random
+
+from inference_engine import DEFAULT_RULE_PACK, INPUT_FIELDS, WealthWiseInferenceEngine, load_rule_pack
+from profile_generator import iter_profiles
+
+
+def profiles(count, seed):
+    return [p for p in iter_profiles(count, seed=seed) if p['monthly_income'] and p['monthly_expenses']]
+
+
+def test_update_matches_full_evaluation():
+    engine = WealthWiseInferenceEngine()
+    rng = random.Random(8)
+    for profile in profiles(1500, seed=8):
+        previous = engine.evaluate(profile)
+        # One slider, or several inputs at once
+        fields = rng.sample(INPUT_FIELDS, rng.choice([1, 1, 2, 3]))
+        changes = {field: float(max(1, round(profile[field] * rng.uniform(0.3, 2.5)) + rng.choice([0, 500])))
+                   for field in fields}
+        updated = engine.update(previous, changes)
+        full = engine.evaluate(dict(profile, **changes))
+        assert updated.to_dict() == full.to_dict(), (profile, changes)
+        assert updated.rules == full.rules
+
+
+def test_update_chains_match_full_evaluation():
+    """Updates built on updates, so reused lazy metrics must stay correct"""
+    engine = WealthWiseInferenceEngine()
+    rng = random.Random(9)
+    for profile in profiles(200, seed=9):
+        assessment = engine.evaluate(profile)
+        current = dict(profile)
+        for field in rng.choices(('age', 'retirement_savings', 'monthly_savings', 'housing_cost'), k=4):
+            current[field] = float(max(1, round(current[field] * rng.uniform(0.5, 1.8))))
+            assessment = engine.update(assessment, {field: current[field]})
+        assert assessment.to_dict() == engine.evaluate(current).to_dict(), current
+
+
+def test_update_without_changes_returns_the_previous_result():
+    engine = WealthWiseInferenceEngine()
+    profile = profiles(10, seed=1)[0]
+    previous = engine.evaluate(profile)
+    assert engine.update(previous, {'age': profile['age']}) is previous
+
+
+def test_update_after_a_rule_pack_change_evaluates_everything(tmp_path):
+    engine = WealthWiseInferenceEngine()
+    profile = profiles(10, seed=2)[0]
+    previous = engine.evaluate(profile)
+
+    edited = {name: dict(ruleset) for name, ruleset in DEFAULT_RULE_PACK.knowledge_base.items()}
+    edited['housing_cost']['weight'] = 0.3
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(edited))
+    engine.set_rule_pack(load_rule_pack(str(path)))
+
+    updated = engine.update(previous, {'age': profile['age'] + 1})
+    assert updated.rule_pack_version == engine.rule_pack.version
+    assert updated.to_dict() == engine.evaluate(dict(profile, age=profile['age'] + 1)).to_dict()
@@ -0,0 +1,39 @@
+from inference_engine import WealthWiseInferenceEngine
+
+# 3.3x annual income saved for retirement: past the age-40 gap rule but short
+# of the 6x and 8x benchmarks, with little put aside each month
+PROFILE = {
+    'monthly_income': 5000,
+    'monthly_expenses': 3500,
+    'housing_cost': 1500,
+    'emergency_savings': 5000,
+    'retirement_savings': 200000,
+    'monthly_savings': 100,
+    'total_monthly_debt': 800
+}
+
+
+def retirement_messages(age):
+    assessment = WealthWiseInferenceEngine().evaluate(dict(PROFILE, age=age))
+    return [rec.explanation for rec in assessment.recommendations if rec.category == 'retirement_savings']
+
+
+def test_retirement_shortfall_rule_fires_before_65():
+    assert any('by age 65' in message for message in retirement_messages(55))
+
+
+def test_retirement_shortfall_rule_skips_65_and_over():
+    for age in (65, 72):
+        assert not any('by age 65' in message for message in retirement_messages(age))
+
+
+def test_rescoring_an_edited_profile_recomputes_retirement_success():
+    engine = WealthWiseInferenceEngine()
+    profile = dict(PROFILE, age=55, housing_cost=2500, total_monthly_debt=2500)
+    engine.evaluate_financial_health(profile)
+    profile['monthly_savings'] = 3000
+    rescored = engine.evaluate_financial_health(profile)
+    fresh = engine.evaluate_financial_health(dict(profile))
+    assert rescored == fresh
+    stale = engine.evaluate(dict(profile, retirement_success_probability=0.0))
+    assert stale.metrics == engine.evaluate(profile).metrics
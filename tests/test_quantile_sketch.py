@@ -0,0 +1,63 @@
+import glob
+import json
+import threading
+
+import numpy as np
+
+from quantile_sketch import PopulationStats, QuantileSketch
+
+
+def test_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(7).lognormal(mean=0.0, sigma=2.0, size=20000)
+    scalar = QuantileSketch(0.01)
+    for value in values:
+        scalar.add(value)
+    vectorized = QuantileSketch(0.01)
+    vectorized.add_many(values)
+
+    ordered = np.sort(values)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert abs(scalar.quantile(q) - exact) <= 0.01 * exact
+        assert vectorized.quantile(q) == scalar.quantile(q)
+
+
+def test_merged_sketches_match_one_sketch():
+    values = np.random.default_rng(11).lognormal(size=5000)
+    whole = QuantileSketch()
+    whole.add_many(values)
+    merged = QuantileSketch()
+    for part in np.array_split(values, 4):
+        sketch = QuantileSketch()
+        sketch.add_many(part)
+        merged.merge(QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict()))))
+    assert merged.to_dict() == whole.to_dict()
+
+
+def test_concurrent_saves_leave_a_readable_file(tmp_path):
+    path = str(tmp_path / 'population.json')
+    stats = PopulationStats(path, save_interval=0)
+    assessment = {'final_score': 80, 'metrics': {'debt_ratio': 0.2, 'savings_rate': 0.1}}
+
+    def add_many():
+        for _ in range(200):
+            stats.add(assessment)
+
+    threads = [threading.Thread(target=add_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.save()
+
+    assert PopulationStats(path).count == 1600
+    assert not glob.glob(f"{path}.*")
+
+
+def test_unreadable_stats_file_starts_empty(tmp_path):
+    path = tmp_path / 'population.json'
+    path.write_text('{"scores": {"counts": [1, 2')
+    stats = PopulationStats(str(path))
+    assert stats.count == 0
+    stats.add({'final_score': 50, 'metrics': {}})
+    assert stats.count == 1
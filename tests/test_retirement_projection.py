@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from retirement_projection import (
+    growth_factors, project, success_probability, success_probability_columns, success_threshold
+)
+
+PROFILES = [
+    # age, retirement_savings, monthly_savings, annual_income
+    (25, 15000, 500, 60000),
+    (40, 120000, 800, 90000),
+    (58, 400000, 1500, 110000),
+    (70, 250000, 0, 40000)
+]
+
+
+def test_same_seed_gives_the_same_projection():
+    for profile in PROFILES:
+        first = project(*profile, paths=2000, seed=5)
+        second = project(*profile, paths=2000, seed=5)
+        assert first['success_probability'] == second['success_probability']
+        assert first['benchmarks'] == second['benchmarks']
+        for percentile, values in first['percentiles'].items():
+            assert np.array_equal(values, second['percentiles'][percentile])
+
+    # Recomputing the market paths, not just reading them back, gives the same paths
+    growth, contributions = growth_factors(2000, 5)
+    fresh_growth, fresh_contributions = growth_factors.__wrapped__(2000, 5)
+    assert np.array_equal(growth, fresh_growth) and np.array_equal(contributions, fresh_contributions)
+    assert not np.array_equal(growth, growth_factors(2000, 6)[0])
+
+
+def test_columns_match_scalar_exactly_in_any_chunking():
+    columns = [np.array(values, dtype=float) for values in zip(*PROFILES)]
+    expected = [success_probability(*profile, paths=2000) for profile in PROFILES]
+    for chunk_size in (None, 1, 3):
+        result = success_probability_columns(*columns, paths=2000, chunk_size=chunk_size)
+        assert result.tolist() == expected
+
+
+@pytest.mark.parametrize('solve_for', ['retirement_savings', 'monthly_savings'])
+def test_success_threshold_is_the_smallest_amount_reaching_the_probability(solve_for):
+    age, retirement_savings, monthly_savings, annual_income = PROFILES[1]
+    for probability in (0.25, 0.5, 0.9):
+        amount = success_threshold(age, retirement_savings, monthly_savings, annual_income, probability,
+                                   solve_for, paths=2000)
+        inputs = {'retirement_savings': retirement_savings, 'monthly_savings': monthly_savings}
+
+        def probability_at(value):
+            changed = dict(inputs, **{solve_for: value})
+            return success_probability(age, changed['retirement_savings'], changed['monthly_savings'],
+                                       annual_income, paths=2000)
+
+        assert probability_at(amount * (1 + 1e-9)) >= probability
+        assert probability_at(amount * (1 - 1e-6)) < probability
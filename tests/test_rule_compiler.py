@@ -0,0 +1,123 @@
+import marshal
+import os
+
+import pytest
+
+from inference_engine import DERIVED_METRICS, INPUT_FIELDS, METRIC_INPUTS, WealthWiseInferenceEngine
+from knowledge_base import FINANCIAL_RULES
+from profile_generator import generate_profiles
+from rule_compiler import artifact_path, load_compiled_rules, load_knowledge_base
+from rule_pack import compile_rule_pack
+
+ALLOWED_NAMES = INPUT_FIELDS + DERIVED_METRICS
+
+
+def rule(condition, score_impact):
+    return {'condition': condition, 'score_impact': score_impact, 'recommendation': condition, 'severity': 'medium'}
+
+
+# and/or/not on plain numbers as well as comparisons
+COMPOUND_RULES = {
+    'savings': {'description': "Savings", 'weight': 1.0, 'rules': [
+        rule("not monthly_savings", -20),
+        rule("monthly_savings and not emergency_savings", -10),
+        rule("savings_rate > 0.2 or retirement_savings and age < 30", 10)
+    ]},
+    'debt': {'description': "Debt", 'weight': 1.0, 'rules': [
+        rule("total_monthly_debt and debt_ratio > 0.4", -15),
+        rule("not (total_monthly_debt or housing_cost > 0.3 * monthly_income)", 5),
+        rule("0.1 < debt_ratio < 0.2 and not age < 25", 2)
+    ]}
+}
+
+
+def assert_batch_matches_scalar(engine, profiles):
+    batch = engine.evaluate_batch(profiles)
+    for position, row in enumerate(profiles.itertuples(index=False)):
+        profile = dict(zip(INPUT_FIELDS, row))
+        if profile['monthly_income'] == 0 or profile['monthly_expenses'] == 0:
+            continue
+        assessment = engine.evaluate(profile)
+        result = batch.iloc[position]
+        assert (result['final_score'], result['grade']) == (assessment.final_score, assessment.grade), profile
+        for recommendation in assessment.recommendations:
+            assert result[f'{recommendation.category}_rule'] == recommendation.rule_index, profile
+
+
+def with_zeros(profiles):
+    """Profiles plus copies with savings, debt and housing zeroed, so numeric operands are falsy"""
+    zeroed = profiles.copy()
+    for field in ('monthly_savings', 'emergency_savings', 'retirement_savings', 'total_monthly_debt'):
+        zeroed.loc[zeroed.index % 2 == 0, field] = 0.0
+    return zeroed
+
+
+def test_batch_matches_scalar_on_default_pack():
+    profiles = generate_profiles(600, seed=3)
+    assert_batch_matches_scalar(WealthWiseInferenceEngine(), profiles)
+
+
+def test_batch_matches_scalar_on_compound_conditions():
+    pack = compile_rule_pack(COMPOUND_RULES, ALLOWED_NAMES, METRIC_INPUTS)
+    engine = WealthWiseInferenceEngine(rule_pack=pack)
+    profiles = with_zeros(generate_profiles(600, seed=5))
+    assert_batch_matches_scalar(engine, profiles)
+    assert not engine.metrics.snapshot()['condition_errors']
+
+
+def cached_artifact(cache_dir):
+    """Compile FINANCIAL_RULES into cache_dir; returns the artifact path and its decoded entries"""
+    load_knowledge_base(FINANCIAL_RULES, ALLOWED_NAMES, str(cache_dir))
+    path = artifact_path(str(cache_dir), FINANCIAL_RULES, ALLOWED_NAMES)
+    with open(path, 'rb') as f:
+        return path, marshal.loads(f.read())
+
+
+def tamper(dumped, position, **changes):
+    """The dumped categories with one field of the first category's rule replaced"""
+    fields = ('digest', 'names', 'code', 'vector_code', 'template_names', 'parts')
+    name, rules, index = dumped[0]
+    rule = list(rules[position])
+    for field, value in changes.items():
+        rule[fields.index(field)] = value
+    rules = rules[:position] + [tuple(rule)] + rules[position + 1:]
+    return marshal.dumps([(name, rules, index)] + dumped[1:])
+
+
+def test_cached_rules_match_a_fresh_compile(tmp_path, capsys):
+    cached_artifact(tmp_path)
+    cached = compile_rule_pack(FINANCIAL_RULES, ALLOWED_NAMES, METRIC_INPUTS, str(tmp_path))
+    assert not capsys.readouterr().out
+    fresh = compile_rule_pack(FINANCIAL_RULES, ALLOWED_NAMES, METRIC_INPUTS)
+    profiles = generate_profiles(300, seed=4)
+    batch = WealthWiseInferenceEngine(rule_pack=cached).evaluate_batch(profiles)
+    assert batch.equals(WealthWiseInferenceEngine(rule_pack=fresh).evaluate_batch(profiles))
+    assert_batch_matches_scalar(WealthWiseInferenceEngine(rule_pack=cached), profiles)
+
+
+def test_tampered_cache_entries_are_rejected(tmp_path):
+    _, dumped = cached_artifact(tmp_path)
+    # Code reaching for a builtin, as an attacker's replacement would
+    escape = (lambda data: __import__('os').getcwd()).__code__
+    for tampered in (
+        tamper(dumped, 0, code=escape),
+        tamper(dumped, 0, vector_code=escape),
+        tamper(dumped, 0, parts=[(escape,)]),
+        # An entry compiled from some other condition
+        tamper(dumped, 0, digest='0' * 64)
+    ):
+        with pytest.raises(ValueError):
+            load_compiled_rules(FINANCIAL_RULES, tampered)
+
+
+def test_tampered_or_exposed_cache_falls_back_to_compiling(tmp_path, capsys):
+    path, dumped = cached_artifact(tmp_path)
+    with open(path, 'wb') as f:
+        f.write(tamper(dumped, 0, code=(lambda data: __import__('os')).__code__))
+    compiled = load_knowledge_base(FINANCIAL_RULES, ALLOWED_NAMES, str(tmp_path))
+    assert 'Ignoring rule cache' in capsys.readouterr().out
+    assert not compiled[0].rules[0].condition.function.__code__.co_names
+
+    os.chmod(tmp_path, 0o777)
+    load_knowledge_base(FINANCIAL_RULES, ALLOWED_NAMES, str(tmp_path))
+    assert 'writable by other users' in capsys.readouterr().out
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+import yaml
+
+from inference_engine import DEFAULT_RULE_PACK, load_rule_pack
+from rule_pack import RulePackError, RulePackWatcher
+
+
+def write_pack(path, knowledge_base):
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(knowledge_base, f, sort_keys=False)
+
+
+def write_dated_pack(path, knowledge_base):
+    """The pack with an unquoted date, which YAML loads as datetime.date, in a free-form key"""
+    dated = dict(knowledge_base)
+    dated['emergency_fund'] = dict(knowledge_base['emergency_fund'], reviewed='@DATE@')
+    write_pack(path, dated)
+    with open(path, encoding='utf-8') as f:
+        text = f.read().replace("'@DATE@'", "2024-05-01")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_unquoted_yaml_date_is_a_rule_pack_error(tmp_path):
+    path = str(tmp_path / 'rules.yaml')
+    write_dated_pack(path, DEFAULT_RULE_PACK.knowledge_base)
+    with pytest.raises(RulePackError):
+        load_rule_pack(path)
+
+
+def test_watcher_survives_a_bad_pack(tmp_path):
+    path = str(tmp_path / 'rules.yaml')
+    knowledge_base = DEFAULT_RULE_PACK.knowledge_base
+    write_pack(path, knowledge_base)
+    applied = []
+    watcher = RulePackWatcher(path, load_rule_pack, applied.append, DEFAULT_RULE_PACK.version, interval=0.01)
+    watcher.start()
+    try:
+        write_dated_pack(path, knowledge_base)
+        assert wait_for(lambda: watcher.last_error is not None)
+        assert watcher._thread.is_alive()
+
+        edited = dict(knowledge_base)
+        edited['emergency_fund'] = dict(knowledge_base['emergency_fund'], description="Edited")
+        write_pack(path, edited)
+        assert wait_for(lambda: applied)
+        assert watcher.last_error is None
+    finally:
+        watcher.stop()
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from scoring_service import ScoringService, _init_worker
+
+PROFILE = {
+    'age': 45,
+    'monthly_income': 4000,
+    'monthly_expenses': 3800,
+    'housing_cost': 1800,
+    'emergency_savings': 2000,
+    'retirement_savings': 10000,
+    'monthly_savings': 100,
+    'total_monthly_debt': 1800
+}
+
+
+def request(method, path, body=b'', headers=None):
+    headers = dict({'Content-Length': str(len(body))}, **(headers or {}))
+    head = f"{method} {path} HTTP/1.1\r\n" + ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return head.encode('latin-1') + b'\r\n' + body
+
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, headers, body
+
+
+def exchange(service, *requests):
+    """Send requests on one connection; returns (status, headers, body) per response received"""
+    async def run():
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(b''.join(requests))
+            await writer.drain()
+            responses = []
+            for _ in requests:
+                try:
+                    responses.append(await read_response(reader))
+                except (asyncio.IncompleteReadError, IndexError, ConnectionError):
+                    break
+            writer.close()
+            return responses
+    return asyncio.run(run())
+
+
+def make_service():
+    return ScoringService(ThreadPoolExecutor(max_workers=1, initializer=_init_worker))
+
+
+def test_scoring_failures_answer_500_and_keep_the_connection():
+    service = make_service()
+
+    async def fail(records):
+        raise ValueError("bad metric")
+    service.score = fail
+    body = json.dumps(PROFILE).encode()
+    responses = exchange(service, request('POST', '/score', body), request('GET', '/health'))
+    assert [status for status, _, _ in responses] == [500, 200]
+    assert 'Content-Length' not in json.loads(responses[0][2])['error']
+
+
+def test_bad_profile_is_422_and_bad_content_length_is_400():
+    service = make_service()
+    bad = json.dumps(dict(PROFILE, monthly_income='lots')).encode()
+    responses = exchange(
+        service,
+        request('POST', '/score', bad),
+        request('POST', '/score', b'{}', {'Content-Length': 'two'}),
+        request('GET', '/health')
+    )
+    assert [status for status, _, _ in responses] == [422, 400]
+    assert responses[1][1]['connection'] == 'close'